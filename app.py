@@ -3,10 +3,16 @@ Main application file for the Credit Card Recommendation Engine.
 This file connects the user interface with the recommendation engine.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import io
+import itertools
 import json
 import os
 import sys
+import uuid
+
+import numpy as np
 
 # Add the src directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -14,42 +20,476 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 # Import the recommendation engine and database
 from src.recommendation_engine import RecommendationEngine
 from src.credit_card_database import CreditCardDatabase
+from src.recommendation_cache import RecommendationCache
+from src.card_view import CardView
+from src.category_taxonomy import CategoryTaxonomy
+from src.user_preference_input import UserPreferenceInput
+from src.cost_projection import parse_behaviour
+from src.ranking_constraints import parse_constraints
+from src.statement_ingestion import (TransactionCategorizer, StatementAggregator, read_transactions,
+                                     simulate_cards, detect_format)
+
+class CardJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes read-only card views."""
+    @staticmethod
+    def default(o):
+        if isinstance(o, CardView):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = CardJSONProvider(app)
 
 # Initialize the database and recommendation engine
 db_file = os.path.join(os.path.dirname(__file__), 'data', 'credit_cards.json')
-card_db = CreditCardDatabase(db_file)
-recommendation_engine = RecommendationEngine(card_db.get_all_cards())
+category_taxonomy = CategoryTaxonomy()
+card_db = CreditCardDatabase(db_file, category_taxonomy)
+recommendation_engine = RecommendationEngine(card_db.get_all_cards(), vectorized=True,
+                                             category_taxonomy=category_taxonomy)
+
+# Cache recommendations for repeated answer combinations
+recommendation_cache = RecommendationCache(max_size=4096, ttl=3600)
+
+# What-if sessions by session ID, dropped after 30 minutes without use
+recommendation_sessions = RecommendationCache(max_size=1024, ttl=1800)
+
+# Questionnaire steps ask the most informative question next
+preference_input = UserPreferenceInput(adaptive=True)
+
+# Merchant and MCC lookup for uploaded statements
+statement_categorizer = TransactionCategorizer(category_taxonomy)
+
+# Number of users of a batch request scored together
+BATCH_CHUNK_SIZE = 1024
+
+def on_catalog_change(database):
+    """Rebuild the engine indexes and drop cached results when the catalog changes."""
+    recommendation_engine.set_card_database(database.get_all_cards())
+    recommendation_cache.clear()
+
+card_db.add_change_listener(on_catalog_change)
 
 @app.route('/')
 def index():
     """Render the main page."""
     return render_template('index.html')
 
+def explain_requested():
+    """Whether the request asks for match reasons (pass ?explain=false to skip them)."""
+    return request.args.get('explain', 'true').lower() not in ('false', '0', 'no')
+
+def ranking_requested():
+    """The ranking mode of the request (pass ?ranking=reward_value to rank by estimated rupee value)."""
+    return request.args.get('ranking', 'score')
+
+def constraints_requested():
+    """
+    The ranking constraints of the request, e.g. ?max_per_issuer=1&max_per_tier=2,
+    ?network_mix=Visa:2,Mastercard or ?best_per_issuer=true.
+    """
+    return parse_constraints(request.args)
+
+def recommended_card_views(recommendations, explain):
+    """
+    Get full card details for recommended cards, with the match score and
+    reasons in a per-request overlay so the shared catalog is never modified.
+    """
+    recommended_cards = []
+    for card in card_db.get_cards_by_ids(recommendations['recommended_cards']):
+        overlay = {'match_score': recommendations['match_scores'][card['card_id']]}
+        if explain:
+            overlay['match_reasons'] = tuple(recommendations['match_reasons'][card['card_id']])
+        recommended_cards.append(CardView(card, **overlay))
+    return recommended_cards
+
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
-    """API endpoint for getting credit card recommendations."""
+    """
+    API endpoint for getting credit card recommendations.
+    
+    The request may include monthly_category_spend (category -> monthly amount
+    in rupees), used by the reward_value ranking mode.
+    """
+    try:
+        # Get user preferences from request, parsed once for both the cache key and scoring
+        profile = recommendation_engine.compile_preferences(request.json)
+        explain = explain_requested()
+        ranking = ranking_requested()
+        constraints = constraints_requested()
+        
+        # Get recommendations, reusing cached results for equivalent preferences
+        cache_key = recommendation_engine.preference_cache_key(profile, explain=explain, ranking=ranking,
+                                                               constraints=constraints)
+        recommendations = recommendation_cache.get_or_compute(
+            cache_key, lambda: recommendation_engine.recommend_cards(profile, explain=explain, ranking=ranking,
+                                                                     constraints=constraints))
+        
+        return jsonify({
+            'success': True,
+            'recommendations': recommended_card_views(recommendations, explain)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/recommend/batch', methods=['POST'])
+def recommend_batch():
+    """
+    API endpoint for getting credit card recommendations for many users.
+    
+    Accepts a JSON array of preference dictionaries, or one preference dictionary
+    per line with the application/x-ndjson content type. Results are streamed back
+    as NDJSON in input order; an item that cannot be parsed or scored gets an
+    {"index": i, "error": ...} line instead of ending the stream.
+    """
+    limit = request.args.get('limit', default=5, type=int)
+    explain = explain_requested()
+    ranking = ranking_requested()
+    if ranking not in recommendation_engine.RANKING_MODES:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown ranking mode {ranking}'
+        })
+    try:
+        constraints = constraints_requested()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+    if request.mimetype == 'application/x-ndjson':
+        items = (line for line in request.stream if line.strip())
+        parse_item = json.loads
+    else:
+        items = request.get_json(silent=True)
+        parse_item = None
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return jsonify({
+                'success': False,
+                'error': 'Expected a JSON array of preference objects'
+            })
+    
+    def compile_item(item):
+        preferences = parse_item(item) if parse_item else item
+        if not isinstance(preferences, dict):
+            raise ValueError('Expected a JSON object of preferences')
+        return recommendation_engine.compile_preferences(preferences)
+    
+    def recommend_chunk(profiles):
+        return list(recommendation_engine.recommend_batch(profiles, limit, chunk_size=BATCH_CHUNK_SIZE,
+                                                          explain=explain, ranking=ranking,
+                                                          constraints=constraints))
+    
+    def generate():
+        item_iterator = iter(items)
+        for start in itertools.count(0, BATCH_CHUNK_SIZE):
+            chunk = list(itertools.islice(item_iterator, BATCH_CHUNK_SIZE))
+            if not chunk:
+                return
+            profiles, errors = [], {}
+            for offset, item in enumerate(chunk):
+                try:
+                    profiles.append(compile_item(item))
+                except Exception as e:
+                    errors[offset] = str(e)
+            try:
+                results = iter(recommend_chunk(profiles))
+            except Exception:
+                # Score the users one at a time so only the failing ones get an error
+                results = []
+                for profile in profiles:
+                    try:
+                        results.extend(recommend_chunk([profile]))
+                    except Exception as e:
+                        results.append({'error': str(e)})
+                results = iter(results)
+            for offset in range(len(chunk)):
+                if offset in errors:
+                    line = {'index': start + offset, 'error': errors[offset]}
+                else:
+                    line = dict(next(results), index=start + offset)
+                yield json.dumps(line) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/recommend/session', methods=['POST'])
+def start_recommendation_session():
+    """
+    API endpoint for starting a what-if session with a full set of answers.
+    
+    The returned session_id can be used to change single answers and re-rank
+    without re-scoring the components that did not change.
+    """
+    try:
+        explain = explain_requested()
+        session_id = uuid.uuid4().hex
+        session = recommendation_engine.start_session()
+        recommendations = session.recommend(request.json, explain=explain)
+        recommendation_sessions.put(session_id, session)
+        
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'recommendations': recommended_card_views(recommendations, explain)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/recommend/session/<session_id>', methods=['PATCH'])
+def update_recommendation_session(session_id):
+    """API endpoint for changing some answers of a what-if session and re-ranking."""
+    try:
+        session = recommendation_sessions.get(session_id)
+        if session is None:
+            return jsonify({
+                'success': False,
+                'error': f'Session {session_id} not found or expired'
+            })
+        
+        explain = explain_requested()
+        recommendations = session.update(request.json, explain=explain)
+        
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'recomputed': session.recomputed,
+            'recommendations': recommended_card_views(recommendations, explain)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/questionnaire', methods=['POST'])
+def start_questionnaire():
+    """
+    API endpoint for starting a questionnaire whose answers are sent step by step.
+    
+    The request body may hold the answers of the first step. The response has
+    the session_id and the progress, including the number of candidate cards,
+    the next question to ask and whether the top recommendations can still change.
+    """
+    try:
+        session_id = uuid.uuid4().hex
+        session = recommendation_engine.start_questionnaire()
+        progress = session.submit(request.get_json(silent=True) or {})
+        recommendation_sessions.put(session_id, session)
+        
+        next_question = preference_input.next_question(session.preferences, session)
+        return jsonify(dict(progress, **next_question, success=True, session_id=session_id))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/questionnaire/<session_id>', methods=['POST'])
+def submit_questionnaire_step(session_id):
+    """API endpoint for sending the answers of one questionnaire step."""
+    try:
+        session = recommendation_sessions.get(session_id)
+        if session is None:
+            return jsonify({
+                'success': False,
+                'error': f'Session {session_id} not found or expired'
+            })
+        
+        progress = session.submit(request.json)
+        next_question = preference_input.next_question(session.preferences, session)
+        return jsonify(dict(progress, **next_question, success=True, session_id=session_id))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/questionnaire/<session_id>/recommend', methods=['POST'])
+def recommend_questionnaire(session_id):
+    """API endpoint for getting recommendations from a questionnaire, with optional final answers."""
     try:
-        # Get user preferences from request
-        user_preferences = request.json
+        session = recommendation_sessions.get(session_id)
+        if session is None:
+            return jsonify({
+                'success': False,
+                'error': f'Session {session_id} not found or expired'
+            })
         
-        # Get recommendations
-        recommendations = recommendation_engine.recommend_cards(user_preferences)
+        explain = explain_requested()
+        recommendations = session.recommend(request.get_json(silent=True), explain=explain)
+        if 'error' in recommendations:
+            return jsonify({
+                'success': False,
+                'error': recommendations['error']
+            })
         
-        # Get full card details for recommended cards
-        recommended_cards = []
-        for card_id in recommendations['recommended_cards']:
-            card = card_db.get_card_by_id(card_id)
-            if card:
-                # Add match score and reasons
-                card['match_score'] = recommendations['match_scores'][card_id]
-                card['match_reasons'] = recommendations['match_reasons'][card_id]
-                recommended_cards.append(card)
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'recommendations': recommended_card_views(recommendations, explain)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/statement', methods=['POST'])
+def ingest_statement():
+    """
+    API endpoint for simulating every card on an uploaded bank statement.
+    
+    Accepts a multipart upload in the "statement" field (CSV, or JSONL or a
+    JSON array by file name), or the statement as the request body (text/csv,
+    application/x-ndjson or application/json). CSV and JSONL statements are
+    streamed, so they are never held in memory. With questionnaire answers in
+    the "preferences" form field, the eligible cards are also recommended by
+    reward value on the statement's spend.
+    """
+    try:
+        limit = request.args.get('limit', default=5, type=int)
+        explain = explain_requested()
+        upload = request.files.get('statement')
+        if upload is not None:
+            stream = upload.stream
+            file_format = request.args.get('format') or detect_format(upload.filename)
+        else:
+            stream = request.stream
+            file_format = request.args.get('format') or {
+                'application/x-ndjson': 'jsonl', 'application/json': 'json'}.get(request.mimetype, 'csv')
+        
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        aggregator = StatementAggregator(statement_categorizer).consume(read_transactions(text_stream, file_format))
+        response = {
+            'success': True,
+            'summary': aggregator.summary(),
+            'cards': simulate_cards(recommendation_engine, aggregator.preferences())[:limit]
+        }
+        
+        if request.form.get('preferences'):
+            preferences = dict(json.loads(request.form['preferences']), **aggregator.preferences())
+            recommendations = recommendation_engine.recommend_cards(
+                preferences, limit, explain=explain, ranking='reward_value')
+            response['recommendations'] = recommended_card_views(recommendations, explain)
+        
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/cost-projection', methods=['POST'])
+def project_costs():
+    """
+    API endpoint for projecting the cost of owning each card over several years.
+    
+    The request body has a list of payment behaviour "scenarios" (monthly_spend,
+    revolving_share, late_payments_per_year, cash_advance_per_year), the number
+    of "years" (default 3) and optionally the questionnaire answers in
+    "preferences" to project only the eligible cards. Cards are listed
+    cheapest first for each scenario.
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        body = request.json or {}
+        scenarios = [parse_behaviour(scenario) for scenario in body.get('scenarios', [])]
+        if not scenarios:
+            return jsonify({
+                'success': False,
+                'error': 'At least one payment behaviour scenario is required'
+            })
+        
+        catalog = recommendation_engine.catalog
+        if body.get('preferences'):
+            rows = recommendation_engine._eligible_rows(recommendation_engine.compile_preferences(body['preferences']))
+        else:
+            rows = np.arange(catalog.size)
+        costs = recommendation_engine.compile_cost_projector().project(scenarios, rows, body.get('years', 3))
+        
+        projections = []
+        for index, scenario in enumerate(scenarios):
+            order = np.lexsort((catalog.id_rank[rows], costs['total'][index]))[:limit]
+            projections.append({
+                'scenario': scenario._asdict(),
+                'cards': [dict({'card_id': catalog.card_ids[rows[position]]},
+                               **{name: round(float(values[index, position]), 2) for name, values in costs.items()})
+                          for position in order]
+            })
+        
+        return jsonify({
+            'success': True,
+            'projections': projections
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/portfolio', methods=['POST'])
+def recommend_portfolio():
+    """
+    API endpoint for recommending combinations of cards that work best together.
+    
+    The request body has the questionnaire answers in "preferences", the
+    maximum number of cards per combination in "size" (default 3), the
+    "objective" ("coverage" of the spending categories or combined
+    "reward_value") and an optional combined annual "fee_budget". Pass
+    ?limit= for the number of combinations (default 3).
+    """
+    try:
+        body = request.json or {}
+        fee_budget = body.get('fee_budget')
+        portfolios = recommendation_engine.recommend_portfolio(
+            body.get('preferences', {}),
+            size=int(body.get('size', 3)),
+            objective=body.get('objective', 'coverage'),
+            fee_budget=float(fee_budget) if fee_budget is not None else None,
+            limit=request.args.get('limit', 3, type=int))
+        if 'error' in portfolios:
+            return jsonify({
+                'success': False,
+                'error': portfolios['error']
+            })
+        
+        return jsonify({
+            'success': True,
+            'portfolios': [dict(portfolio, cards=[CardView(card) for card in card_db.get_cards_by_ids(portfolio['cards'])])
+                           for portfolio in portfolios['portfolios']]
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/api/pareto', methods=['POST'])
+def get_pareto_cards():
+    """
+    API endpoint for the eligible cards that no other card beats on annual fee,
+    estimated reward value, forex markup and lounge visits at once.
+    
+    The request body is the questionnaire answers, optionally with
+    monthly_category_spend and monthly_international_spend for the reward value.
+    """
+    try:
+        front = recommendation_engine.pareto_cards(request.json or {})
+        if 'error' in front:
+            return jsonify({
+                'success': False,
+                'error': front['error']
+            })
         
         return jsonify({
             'success': True,
-            'recommendations': recommended_cards
+            'cards': [CardView(card, pareto_criteria=front['criteria'][card['card_id']])
+                      for card in card_db.get_cards_by_ids(front['pareto_cards'])]
         })
     except Exception as e:
         return jsonify({
@@ -57,13 +497,21 @@ def recommend():
             'error': str(e)
         })
 
+@app.route('/api/recommend/cache', methods=['GET'])
+def get_recommendation_cache_stats():
+    """API endpoint for getting the recommendation cache hit/miss counters."""
+    return jsonify({
+        'success': True,
+        'cache': recommendation_cache.stats()
+    })
+
 @app.route('/api/cards', methods=['GET'])
 def get_cards():
     """API endpoint for getting all credit cards."""
     try:
         return jsonify({
             'success': True,
-            'cards': card_db.get_all_cards()
+            'cards': [CardView(card) for card in card_db.get_all_cards()]
         })
     except Exception as e:
         return jsonify({
@@ -79,7 +527,7 @@ def get_card(card_id):
         if card:
             return jsonify({
                 'success': True,
-                'card': card
+                'card': CardView(card)
             })
         else:
             return jsonify({
@@ -0,0 +1,90 @@
+"""
+Benefit condition parsing for the Credit Card Recommendation Engine.
+This file turns the free-text fee waiver, welcome and milestone conditions of
+a card into numeric thresholds, so that they are parsed once when the catalog
+loads instead of on every request.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+
+# Amounts as written in Indian card terms: "₹3,00,000", "Rs. 50000", "1.5 lakh", "2 crore", "₹3L", "10K"
+AMOUNT_PATTERN = re.compile(
+    r"(?:₹|\brs\.?|\binr)?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s*(lakhs?|lacs?|crores?|cr|l|k)?\b", re.IGNORECASE)
+UNIT_MULTIPLIERS = {
+    "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5, "l": 1e5,
+    "crore": 1e7, "crores": 1e7, "cr": 1e7,
+    "k": 1e3
+}
+# Spending amount that a condition is tied to, e.g. "on spending ₹1,00,000" or "spends above 3 lakh"
+SPEND_PATTERN = re.compile(r"spend(?:s|ing)?\s+(?:of\s+|above\s+|over\s+|at\s+least\s+)?(?=(?:₹|rs|inr|\d))",
+                           re.IGNORECASE)
+# Periods: "in the first 90 days", "within 3 months", "in a year", "in the previous year"
+DAYS_PATTERN = re.compile(r"(\d+)\s*days?\b", re.IGNORECASE)
+MONTHS_PATTERN = re.compile(r"(\d+)\s*months?\b", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"\b(?:a|the\s+previous|previous|one|per|every|calendar|card|anniversary)\s+year\b|\bannual",
+                          re.IGNORECASE)
+
+# Parsed condition: spending needed, period it must be reached in (days) and bonus amount,
+# each NaN when the text does not state it; bonus_in_rupees tells cash bonuses from points
+BenefitTerms = namedtuple("BenefitTerms", ["spend_threshold", "period_days", "bonus", "bonus_in_rupees"])
+
+
+def parse_amount(text):
+    """
+    Parse the first amount in a piece of text.
+
+    Args:
+        text: Text starting at or before the amount
+
+    Returns:
+        Amount in rupees (or points), or None if the text holds no amount
+    """
+    match = AMOUNT_PATTERN.search(text)
+    if match is None:
+        return None
+    amount = float(match.group(1).replace(",", ""))
+    unit = (match.group(2) or "").lower()
+    return amount * UNIT_MULTIPLIERS.get(unit, 1.0)
+
+
+def parse_benefit_terms(text):
+    """
+    Parse a fee waiver, welcome or milestone condition.
+
+    Args:
+        text: Condition as written on the card, e.g. "5,000 reward points on spending ₹8,00,000 in a year"
+
+    Returns:
+        BenefitTerms of the condition
+    """
+    text = text or ""
+    spend_threshold = math.nan
+    spend = SPEND_PATTERN.search(text)
+    if spend is not None:
+        amount = parse_amount(text[spend.end():])
+        if amount is not None:
+            spend_threshold = amount
+
+    period_days = math.nan
+    days = DAYS_PATTERN.search(text)
+    months = MONTHS_PATTERN.search(text)
+    if days is not None:
+        period_days = float(days.group(1))
+    elif months is not None:
+        period_days = float(months.group(1)) * 365 / 12
+    elif YEAR_PATTERN.search(text):
+        period_days = 365.0
+
+    # The bonus is the amount before the condition, e.g. "₹500 cashback on ..."
+    bonus = math.nan
+    bonus_in_rupees = False
+    head = re.split(r"\bon\b", text, maxsplit=1)[0]
+    bonus_match = AMOUNT_PATTERN.search(head)
+    if bonus_match is not None and head.strip():
+        bonus = parse_amount(head)
+        bonus_in_rupees = "₹" in bonus_match.group(0) or bool(re.search(r"\brs\b|\binr\b|cashback", head, re.IGNORECASE))
+
+    return BenefitTerms(spend_threshold, period_days, bonus, bonus_in_rupees)
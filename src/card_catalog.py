@@ -0,0 +1,251 @@
+"""
+Columnar card catalog for the Credit Card Recommendation Engine.
+This file packs the list of credit card dictionaries into NumPy column arrays
+so that the recommendation engine can score every card at once.
+"""
+
+import math
+
+import numpy as np
+
+from src.benefit_terms import parse_benefit_terms
+
+
+class CardCatalog:
+    """
+    Column-oriented view of a list of credit cards.
+
+    Each attribute used by the recommendation engine is stored as an array with
+    one entry per card, in the same order as the original card list.
+    """
+    # Annual spend assumed for fee waiver conditions that do not state an amount
+    DEFAULT_FEE_WAIVER_THRESHOLD = 100000.0
+
+    def __init__(self, cards, category_taxonomy, normalize_tier):
+        """
+        Pack the cards into column arrays.
+
+        Args:
+            cards: List of credit card dictionaries
+            category_taxonomy: CategoryTaxonomy used to match reward categories
+            normalize_tier: Function used to normalize card tiers
+        """
+        self.cards = cards
+        self.size = len(cards)
+        self.card_ids = [card["card_id"] for card in cards]
+        self.row_of = {card_id: row for row, card_id in enumerate(self.card_ids)}
+        # Position of each card_id in sorted order, used to break score ties
+        self.id_rank = np.empty(self.size, dtype=np.int64)
+        self.id_rank[sorted(range(self.size), key=lambda row: self.card_ids[row])] = np.arange(self.size)
+
+        # Numeric columns
+        self.annual_fee = self._numeric_column("annual_fee")
+        self.reward_rate = self._numeric_column("reward_rate")
+        self.cashback_rate = self._numeric_column("cashback_rate")
+        self.forex_markup = self._numeric_column("forex_markup")
+        self.popularity_score = self._numeric_column("popularity_score")
+        self.lounge_visits = self._numeric_column("lounge_access_count")
+
+        # Cost columns; the renewal fee defaults to the annual fee
+        self.joining_fee = self._numeric_column("joining_fee")
+        self.renewal_fee = np.array([card.get("renewal_fee", card.get("annual_fee", 0)) for card in cards],
+                                    dtype=float)
+        self.interest_rate = self._numeric_column("interest_rate")
+        self.interest_free_period = self._numeric_column("interest_free_period")
+        self.late_payment_fee = self._numeric_column("late_payment_fee")
+        self.cash_advance_fee = self._numeric_column("cash_advance_fee")
+
+        # Boolean benefit flags
+        self.has_fee_waiver = self._flag_column("fee_waiver_condition", "")
+        self.travel_benefits = self._flag_column("travel_benefits")
+        self.lounge_access = self._flag_column("lounge_access")
+        self.fuel_surcharge_waiver = self._flag_column("fuel_surcharge_waiver")
+        self.dining_benefits = self._flag_column("dining_benefits")
+        self.shopping_benefits = self._flag_column("shopping_benefits")
+        self.movie_benefits = self._flag_column("movie_benefits")
+
+        # Thresholds parsed from the benefit conditions. The annual spend needed
+        # for the fee waiver is NaN for cards without one and 0 for lifetime free
+        # cards; conditions without an amount keep the common ₹1 lakh threshold.
+        # Welcome and milestone columns hold the spend needed (0 when the benefit
+        # comes on activation), the period in days and the bonus, NaN where unknown.
+        self.fee_waiver_threshold = np.array(
+            [self._fee_waiver_threshold(card.get("fee_waiver_condition", "")) for card in cards], dtype=float)
+        for prefix in ("welcome", "milestone"):
+            self._benefit_columns(prefix)
+
+        # Flags derived from the raw reward categories
+        self.has_travel_category = np.array(
+            ["travel" in card.get("reward_categories", []) for card in cards], dtype=bool)
+        self.has_discount_category = np.array(
+            [any(cat in ["shopping", "dining", "entertainment"] for cat in card.get("reward_categories", []))
+             for card in cards], dtype=bool)
+
+        # Categorical columns stored as integer codes
+        self.tier_codes = {}
+        self.tier_code = self._code_column(
+            [normalize_tier(card.get("card_tier", "")) for card in cards], self.tier_codes)
+        self.issuer_codes = {}
+        self.issuer_code = self._code_column(
+            [card.get("issuer", "") for card in cards], self.issuer_codes)
+        self.network_codes = {}
+        self.network_code = self._code_column(
+            [card.get("card_network", "") for card in cards], self.network_codes)
+
+        # Reward categories as bitmasks over the taxonomy, kept both as Python ints for
+        # per-card scoring and as rows of 64-bit words for whole-catalog scoring.
+        # A card fully covers its categories and everything narrower, and partly
+        # covers everything broader. Categories outside the taxonomy get their own bit.
+        self.category_taxonomy = category_taxonomy
+        self.category_codes = dict(category_taxonomy.codes)
+        self.category_bits = []
+        self.partial_category_bits = []
+        for card in cards:
+            full_bits = 0
+            broader_bits = 0
+            for category in card.get("reward_categories", []):
+                name = category_taxonomy.canonical(category)
+                if name in category_taxonomy.codes:
+                    full_bits |= category_taxonomy.descendant_bits(name)
+                    broader_bits |= category_taxonomy.ancestor_bits(name)
+                else:
+                    full_bits |= 1 << self.category_codes.setdefault(name, len(self.category_codes))
+            self.category_bits.append(full_bits)
+            self.partial_category_bits.append(broader_bits & ~full_bits)
+        self.category_words = self.to_words(self.category_bits)
+        self.partial_category_words = self.to_words(self.partial_category_bits)
+
+    def _numeric_column(self, field, default=0):
+        """
+        Build a float column from a numeric card field.
+
+        Args:
+            field: Name of the card field
+            default: Value used when the field is missing
+
+        Returns:
+            NumPy float array
+        """
+        return np.array([card.get(field, default) for card in self.cards], dtype=float)
+
+    def _flag_column(self, field, default=False):
+        """
+        Build a boolean column from the truthiness of a card field.
+
+        Args:
+            field: Name of the card field
+            default: Value used when the field is missing
+
+        Returns:
+            NumPy boolean array
+        """
+        return np.array([bool(card.get(field, default)) for card in self.cards], dtype=bool)
+
+    def _fee_waiver_threshold(self, condition):
+        """
+        Parse the annual spend needed for a fee waiver.
+
+        Args:
+            condition: Fee waiver condition as written on the card
+
+        Returns:
+            Spend threshold in rupees, NaN if the card has no waiver
+        """
+        if not condition:
+            return math.nan
+        threshold = parse_benefit_terms(condition).spend_threshold
+        if not math.isnan(threshold):
+            return threshold
+        if "free" in condition.lower():
+            return 0.0
+        return self.DEFAULT_FEE_WAIVER_THRESHOLD
+
+    def _benefit_columns(self, prefix):
+        """
+        Build the threshold columns of a welcome or milestone benefit.
+
+        Sets <prefix>_spend_threshold, <prefix>_period_days, <prefix>_bonus and
+        <prefix>_bonus_in_rupees, parsed from the <prefix>_benefits card field.
+
+        Args:
+            prefix: "welcome" or "milestone"
+        """
+        texts = [card.get(f"{prefix}_benefits", "") or "" for card in self.cards]
+        terms = [parse_benefit_terms(text) for text in texts]
+        setattr(self, f"{prefix}_spend_threshold", np.array([
+            0.0 if text and math.isnan(parsed.spend_threshold) else parsed.spend_threshold
+            for text, parsed in zip(texts, terms)
+        ], dtype=float))
+        setattr(self, f"{prefix}_period_days", np.array([parsed.period_days for parsed in terms], dtype=float))
+        setattr(self, f"{prefix}_bonus", np.array([parsed.bonus for parsed in terms], dtype=float))
+        setattr(self, f"{prefix}_bonus_in_rupees",
+                np.array([parsed.bonus_in_rupees for parsed in terms], dtype=bool))
+
+    def _code_column(self, values, codes):
+        """
+        Encode a list of categorical values as integer codes.
+
+        Args:
+            values: List of values, one per card
+            codes: Dictionary to fill with the value -> code mapping
+
+        Returns:
+            NumPy integer array
+        """
+        for value in values:
+            codes.setdefault(value, len(codes))
+        return np.array([codes[value] for value in values], dtype=np.int64)
+
+    def codes_for(self, codes, values):
+        """
+        Look up the integer codes of the given values, ignoring unknown values.
+
+        Args:
+            codes: Value -> code mapping
+            values: Iterable of values
+
+        Returns:
+            List of integer codes
+        """
+        return [codes[value] for value in values if value in codes]
+
+    def category_layers(self, categories):
+        """
+        Build the bitmasks of a list of canonical categories that may repeat.
+
+        Layer i holds the categories listed more than i times, so the number of
+        listed categories a card covers is the sum of the popcounts of each layer
+        ANDed with the card's bitmask.
+
+        Args:
+            categories: Sequence of canonical category names
+
+        Returns:
+            Tuple of integer bitmasks, empty if no category is known
+        """
+        layers = []
+        for category in categories:
+            if category not in self.category_codes:
+                continue
+            bit = 1 << self.category_codes[category]
+            for layer, bits in enumerate(layers):
+                if not bits & bit:
+                    layers[layer] |= bit
+                    break
+            else:
+                layers.append(bit)
+        return tuple(layers)
+
+    def to_words(self, masks):
+        """
+        Split category bitmasks into 64-bit words.
+
+        Args:
+            masks: Sequence of integer bitmasks
+
+        Returns:
+            NumPy uint64 array of shape (len(masks), words per mask)
+        """
+        word_count = max(1, (len(self.category_codes) + 63) // 64)
+        return np.array([[(mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(word_count)]
+                         for mask in masks], dtype=np.uint64).reshape(len(masks), word_count)
@@ -0,0 +1,88 @@
+"""
+Read-only card views for the Credit Card Recommendation Engine.
+This file defines a frozen view over a shared catalog card with an optional
+per-request overlay, so request-specific fields never touch the catalog.
+"""
+
+import copy
+from collections.abc import Mapping
+from types import MappingProxyType
+
+
+def _read_only(value):
+    """
+    Get a read-only version of a card field.
+
+    Args:
+        value: Field value, possibly a nested list or dictionary
+
+    Returns:
+        The value, with lists turned into tuples and dictionaries into read-only mappings
+    """
+    if isinstance(value, list):
+        return tuple(_read_only(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _read_only(item) for key, item in value.items()})
+    return value
+
+
+class CardView(Mapping):
+    """
+    Immutable mapping that reads overlay fields first and catalog card fields second.
+
+    The underlying card dictionary is shared, never copied and never modified.
+    Adding fields creates a new view (copy-on-write of the small overlay only).
+    Nested card fields such as reward_categories or features are read as
+    tuples and read-only mappings, so they cannot be modified through the view
+    either.
+    """
+    __slots__ = ("_card", "_overlay")
+
+    def __init__(self, card, **overlay):
+        """
+        Create a view of a card.
+
+        Args:
+            card: Catalog card dictionary
+            **overlay: Request-specific fields shown on top of the card
+        """
+        self._card = card
+        self._overlay = overlay
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        return _read_only(self._card[key])
+
+    def __iter__(self):
+        yield from self._card
+        for key in self._overlay:
+            if key not in self._card:
+                yield key
+
+    def __len__(self):
+        return len(self._card) + sum(1 for key in self._overlay if key not in self._card)
+
+    def __repr__(self):
+        return f"CardView({self._card.get('card_id')!r}, overlay={self._overlay!r})"
+
+    def with_overlay(self, **fields):
+        """
+        Create a new view with additional overlay fields.
+
+        Args:
+            **fields: Fields to add or replace
+
+        Returns:
+            New CardView sharing the same catalog card
+        """
+        return CardView(self._card, **dict(self._overlay, **fields))
+
+    def to_dict(self):
+        """
+        Build a plain dictionary for serialization.
+
+        Returns:
+            Dictionary with copies of the card fields and the overlay fields
+        """
+        return dict(copy.deepcopy(self._card), **self._overlay)
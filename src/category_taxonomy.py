@@ -0,0 +1,166 @@
+"""
+Spending category taxonomy for the Credit Card Recommendation Engine.
+This file defines the hierarchy of reward categories and their aliases, with the
+transitive closure of the hierarchy precomputed into bitsets.
+"""
+
+import json
+
+
+# Default taxonomy: every category lists its aliases and its broader categories.
+# A category may have several parents (e.g. food delivery is both dining and online).
+DEFAULT_TAXONOMY = {
+    "partial_match_weight": 0.5,
+    "categories": {
+        "groceries": {"aliases": ["grocery", "supermarket", "supermarkets"]},
+        "dining": {"aliases": ["restaurant", "restaurants", "food"]},
+        "shopping": {"aliases": ["retail", "online shopping"]},
+        "online": {"parents": ["shopping"], "aliases": ["online spends", "e-commerce", "ecommerce"]},
+        "amazon": {"parents": ["online"]},
+        "flipkart": {"parents": ["online"]},
+        "food delivery": {"parents": ["dining", "online"]},
+        "travel": {},
+        "airlines": {"parents": ["travel"], "aliases": ["airline", "flights"]},
+        "hotels": {"parents": ["travel"], "aliases": ["hotel"]},
+        "fuel": {"aliases": ["petrol", "gas", "diesel"]},
+        "entertainment": {"aliases": ["movie", "movies", "theatre"]},
+        "bills": {"aliases": ["bill", "bill payments", "utility", "utilities"]},
+        "telecom": {"parents": ["bills"], "aliases": ["mobile recharge"]},
+        "insurance": {"parents": ["bills"]}
+    }
+}
+
+
+class CategoryTaxonomy:
+    """
+    Directed acyclic graph of spending categories with aliases.
+
+    Each category gets a bit position. For every category the bitsets of its
+    ancestors and descendants (both including the category itself) are computed
+    once, so hierarchical matching is a bitwise AND.
+    """
+    def __init__(self, definition=None):
+        """
+        Build the taxonomy and its closure.
+
+        Args:
+            definition: Dictionary with "categories" (name -> {"parents", "aliases"})
+                and an optional "partial_match_weight" (defaults to DEFAULT_TAXONOMY)
+
+        Raises:
+            ValueError: If a parent is unknown, an alias is ambiguous or the hierarchy has a cycle
+        """
+        definition = definition or DEFAULT_TAXONOMY
+        self.partial_match_weight = definition.get("partial_match_weight", 0.5)
+
+        categories = {name.lower(): details for name, details in definition["categories"].items()}
+        self.codes = {name: code for code, name in enumerate(categories)}
+        self.parents = {name: tuple(parent.lower() for parent in details.get("parents", []))
+                        for name, details in categories.items()}
+
+        self._aliases = {}
+        for name, details in categories.items():
+            for alias in [name] + [alias.lower() for alias in details.get("aliases", [])]:
+                if self._aliases.setdefault(alias, name) != name:
+                    raise ValueError(f"Alias '{alias}' is used by both '{self._aliases[alias]}' and '{name}'")
+        for name, parents in self.parents.items():
+            for parent in parents:
+                if parent not in self.codes:
+                    raise ValueError(f"Unknown parent category '{parent}' of '{name}'")
+
+        self._ancestor_bits = {}
+        for name in self.codes:
+            self._closure(name, ())
+        self._descendant_bits = {name: 0 for name in self.codes}
+        for name, ancestors in self._ancestor_bits.items():
+            for ancestor in self.codes:
+                if (ancestors >> self.codes[ancestor]) & 1:
+                    self._descendant_bits[ancestor] |= 1 << self.codes[name]
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Load a taxonomy from a JSON file in the DEFAULT_TAXONOMY format.
+
+        Args:
+            file_path: Path to the taxonomy file
+
+        Returns:
+            CategoryTaxonomy
+        """
+        with open(file_path, 'r') as f:
+            return cls(json.load(f))
+
+    def _closure(self, name, path):
+        """
+        Compute the ancestor bitset of a category, memoized.
+
+        Args:
+            name: Category name
+            path: Categories on the current walk, used to detect cycles
+
+        Returns:
+            Integer bitset of the category and all its ancestors
+        """
+        if name in self._ancestor_bits:
+            return self._ancestor_bits[name]
+        if name in path:
+            raise ValueError(f"Category hierarchy has a cycle through '{name}'")
+        bits = 1 << self.codes[name]
+        for parent in self.parents[name]:
+            bits |= self._closure(parent, path + (name,))
+        self._ancestor_bits[name] = bits
+        return bits
+
+    def canonical(self, category):
+        """
+        Get the canonical name of a category or alias.
+
+        Args:
+            category: Category name as written on a card or in an answer
+
+        Returns:
+            Canonical category name, or the lowercased name if it is not in the taxonomy
+        """
+        category = category.lower()
+        return self._aliases.get(category, category)
+
+    def ancestor_bits(self, category):
+        """
+        Get the bitset of a category and every broader category.
+
+        Args:
+            category: Category name or alias
+
+        Returns:
+            Integer bitset, 0 if the category is not in the taxonomy
+        """
+        return self._ancestor_bits.get(self.canonical(category), 0)
+
+    def descendant_bits(self, category):
+        """
+        Get the bitset of a category and every narrower category.
+
+        Args:
+            category: Category name or alias
+
+        Returns:
+            Integer bitset, 0 if the category is not in the taxonomy
+        """
+        return self._descendant_bits.get(self.canonical(category), 0)
+
+    def ancestors(self, category):
+        """
+        Get the canonical names of a category and every broader category.
+
+        Args:
+            category: Category name or alias
+
+        Returns:
+            List of canonical category names, just the category itself if it is not in the taxonomy
+        """
+        name = self.canonical(category)
+        bits = self._ancestor_bits.get(name)
+        if bits is None:
+            return [name]
+        return [ancestor for ancestor, code in self.codes.items() if (bits >> code) & 1]
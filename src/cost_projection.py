@@ -0,0 +1,106 @@
+"""
+Cost projection for the Credit Card Recommendation Engine.
+This file projects the total cost of owning every card over several years
+(fees, interest, late payment fees and cash advance charges) for one or many
+payment behaviour scenarios at once.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+# How a user pays: monthly card spend in rupees, share of each statement left
+# unpaid (0 to 1), late payments per year and cash withdrawn per year in rupees
+PaymentBehaviour = namedtuple("PaymentBehaviour",
+                              ["monthly_spend", "revolving_share", "late_payments_per_year", "cash_advance_per_year"])
+
+
+def parse_behaviour(values, monthly_spend=0.0):
+    """
+    Build a payment behaviour from a dictionary of answers.
+
+    Args:
+        values: Dictionary with optional monthly_spend, revolving_share,
+            late_payments_per_year and cash_advance_per_year
+        monthly_spend: Monthly spend used when values does not give one
+
+    Returns:
+        PaymentBehaviour, with the revolving share clipped to [0, 1] and negative amounts to 0
+    """
+    return PaymentBehaviour(
+        monthly_spend=max(float(values.get("monthly_spend", monthly_spend) or 0), 0.0),
+        revolving_share=min(max(float(values.get("revolving_share", 0) or 0), 0.0), 1.0),
+        late_payments_per_year=max(float(values.get("late_payments_per_year", 0) or 0), 0.0),
+        cash_advance_per_year=max(float(values.get("cash_advance_per_year", 0) or 0), 0.0))
+
+
+class CostProjector:
+    """
+    Multi-year cost model over a card catalog.
+
+    Costs are computed as scenario x card arrays from the catalog's fee and
+    interest columns:
+
+    - fees: the joining fee, then the renewal fee every later year unless the
+      yearly spend reaches the card's fee waiver threshold
+    - interest: the monthly interest on the revolving balance, plus, while
+      revolving, the interest-free period lost on new purchases (on average
+      half of it), plus a month of interest on the statement for every late
+      payment
+    - late fees: the late payment fee for every late payment
+    - cash advances: the cash advance fee percentage and a month of interest
+      on the cash withdrawn
+    """
+    def __init__(self, catalog):
+        """
+        Prepare the cost columns.
+
+        Args:
+            catalog: CardCatalog to project
+        """
+        self.catalog = catalog
+        self.monthly_rate = catalog.interest_rate / 100 / 12
+        self.daily_rate = catalog.interest_rate / 100 / 365
+
+    def project(self, behaviours, rows, years=3):
+        """
+        Project the cost of the given catalog rows for several payment behaviours.
+
+        Args:
+            behaviours: List of PaymentBehaviour
+            rows: Array of catalog row indices to project
+            years: Number of years of ownership (at least 1), or one number per behaviour
+
+        Returns:
+            Dictionary of "fees", "interest", "late_fees", "cash_advance" and
+            "total" NumPy arrays in rupees, each with shape (behaviours, rows)
+        """
+        catalog = self.catalog
+        years = np.maximum(np.floor(np.asarray(years, dtype=float)), 1).reshape(-1, 1)
+        columns = np.array(behaviours, dtype=float).reshape(len(behaviours), len(PaymentBehaviour._fields))
+        spend, revolving_share, late_payments, cash_advance = (columns[:, [field]]
+                                                              for field in range(len(PaymentBehaviour._fields)))
+        monthly_rate = self.monthly_rate[rows][None, :]
+
+        waived = spend * 12 >= catalog.fee_waiver_threshold[rows][None, :]
+        fees = catalog.joining_fee[rows][None, :] + (years - 1) * np.where(
+            waived, 0.0, catalog.renewal_fee[rows][None, :])
+
+        lost_free_days = np.where(revolving_share > 0, catalog.interest_free_period[rows][None, :] / 2, 0.0)
+        yearly_interest = (12 * revolving_share * spend * monthly_rate
+                           + 12 * spend * self.daily_rate[rows][None, :] * lost_free_days
+                           + late_payments * spend * monthly_rate)
+        yearly_late_fees = late_payments * catalog.late_payment_fee[rows][None, :]
+        yearly_cash_advance = cash_advance * (catalog.cash_advance_fee[rows][None, :] / 100 + monthly_rate)
+
+        interest = years * yearly_interest
+        late_fees = years * yearly_late_fees
+        cash_advance_cost = years * yearly_cash_advance
+        return {
+            "fees": fees,
+            "interest": interest,
+            "late_fees": late_fees,
+            "cash_advance": cash_advance_cost,
+            "total": fees + interest + late_fees + cash_advance_cost
+        }
@@ -3,22 +3,43 @@ Credit card database for the recommendation engine.
 This file contains actual credit card data from major Indian banks.
 """
 
+import bisect
+import heapq
 import json
 import os
 
+import numpy as np
+
+from src.category_taxonomy import CategoryTaxonomy
+
 class CreditCardDatabase:
     """
     Class to manage the credit card database.
     """
-    def __init__(self, db_file=None):
+    # Fields that can be filtered with query()
+    EQUALITY_FIELDS = ("issuer", "card_tier", "card_type", "card_network")
+    RANGE_FIELDS = ("joining_fee", "annual_fee", "renewal_fee", "interest_rate", "forex_markup", "min_income")
+    BOOLEAN_FIELDS = ("lounge_access", "fuel_surcharge_waiver", "movie_benefits", "dining_benefits",
+                      "travel_benefits", "shopping_benefits", "insurance_coverage", "co_branded",
+                      "contactless", "virtual_card")
+    # Cost of testing one candidate row against one predicate in query(),
+    # relative to marking one row in a NumPy row mask
+    ROW_TEST_COST = 40
+    
+    def __init__(self, db_file=None, category_taxonomy=None):
         """
         Initialize the credit card database.
         
         Args:
             db_file: Path to the database file (optional)
+            category_taxonomy: CategoryTaxonomy used to index reward categories (optional)
         """
         self.db_file = db_file
+        self.category_taxonomy = category_taxonomy or CategoryTaxonomy()
         self.cards = self._initialize_cards()
+        self.version = 0
+        self._change_listeners = []
+        self._build_indexes()
     
     def _initialize_cards(self):
         """
@@ -786,6 +807,160 @@ class CreditCardDatabase:
             print(f"Error saving database: {e}")
             return False
     
+    def _build_indexes(self):
+        """
+        Build the lookup indexes over the current list of cards.
+        
+        Besides the card_id index, rows of the card list are indexed by issuer,
+        type, tier and network (hash buckets), by boolean feature and by reward
+        category and every broader category in the taxonomy (sorted row lists)
+        and by numeric field (sorted values for range lookups).
+        """
+        self._card_index = {}
+        self._bucket_index = {field: {} for field in self.EQUALITY_FIELDS}
+        self._feature_rows = {feature: [] for feature in ("no_annual_fee", "cashback", "rewards") + self.BOOLEAN_FIELDS}
+        self._category_rows = {}
+        self._row_categories = []
+        for row, card in enumerate(self.cards):
+            self._index_card(row, card)
+        
+        self._range_index = {}
+        for field in self.RANGE_FIELDS:
+            entries = sorted((card[field], row) for row, card in enumerate(self.cards) if card.get(field) is not None)
+            self._range_index[field] = ([value for value, _ in entries], [row for _, row in entries])
+    
+    def _index_card(self, row, card):
+        """
+        Add a single card to the hash, feature and category indexes.
+        
+        Rows are added in increasing order, so every row list stays sorted.
+        Every field is read before any index changes, so a card missing a
+        required field raises without leaving the indexes half updated.
+        
+        Args:
+            row: Position of the card in self.cards, after every indexed row
+            card: Credit card dictionary
+            
+        Raises:
+            KeyError: If the card lacks card_id, annual_fee, cashback_rate,
+                reward_rate or reward_categories
+        """
+        features = {
+            "no_annual_fee": card["annual_fee"] == 0,
+            "cashback": card["cashback_rate"] > 0,
+            "rewards": card["reward_rate"] > 0
+        }
+        for field in self.BOOLEAN_FIELDS:
+            features[field] = card.get(field, False)
+        names = {name for category in card["reward_categories"] for name in self.category_taxonomy.ancestors(category)}
+        
+        self._card_index[card["card_id"]] = card
+        for field, buckets in self._bucket_index.items():
+            buckets.setdefault(card.get(field), []).append(row)
+        for feature, present in features.items():
+            if present:
+                self._feature_rows[feature].append(row)
+        for name in names:
+            self._category_rows.setdefault(name, []).append(row)
+        self._row_categories.append(names)
+    
+    def _cards_from_rows(self, rows):
+        """
+        Get the cards at the given rows.
+        
+        Args:
+            rows: List of row positions
+            
+        Returns:
+            List of credit cards
+        """
+        return [self.cards[row] for row in rows]
+    
+    def add_change_listener(self, listener):
+        """
+        Register a function to call whenever the catalog changes.
+        
+        Args:
+            listener: Function taking the database as its only argument
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self):
+        """
+        Bump the catalog version and notify the change listeners.
+        """
+        self.version += 1
+        for listener in self._change_listeners:
+            listener(self)
+    
+    def add_card(self, card):
+        """
+        Add a credit card to the database.
+        
+        Args:
+            card: Credit card dictionary with a unique card_id
+            
+        Returns:
+            True if the card was added, False if the card_id already exists
+            
+        Raises:
+            KeyError: If a required field is missing (the database is left unchanged)
+            TypeError: If a numeric field cannot be compared with the other cards' values
+        """
+        if card["card_id"] in self._card_index:
+            return False
+        row = len(self.cards)
+        positions = {field: bisect.bisect_right(self._range_index[field][0], card[field])
+                     for field in self.RANGE_FIELDS if card.get(field) is not None}
+        self._index_card(row, card)
+        self.cards.append(card)
+        for field, position in positions.items():
+            values, rows = self._range_index[field]
+            values.insert(position, card[field])
+            rows.insert(position, row)
+        self._notify_change()
+        return True
+    
+    def update_card(self, card_id, updates):
+        """
+        Update the fields of an existing credit card.
+        
+        Args:
+            card_id: ID of the card to update
+            updates: Dictionary of fields to change
+            
+        Returns:
+            True if the card was updated, False if it was not found or the new card_id is taken
+        """
+        card = self._card_index.get(card_id)
+        if card is None:
+            return False
+        new_card_id = updates.get("card_id", card_id)
+        if new_card_id != card_id and new_card_id in self._card_index:
+            return False
+        card.update(updates)
+        self._build_indexes()
+        self._notify_change()
+        return True
+    
+    def remove_card(self, card_id):
+        """
+        Remove a credit card from the database.
+        
+        Args:
+            card_id: ID of the card to remove
+            
+        Returns:
+            True if the card was removed, False if it was not found
+        """
+        card = self._card_index.get(card_id)
+        if card is None:
+            return False
+        self.cards.remove(card)
+        self._build_indexes()
+        self._notify_change()
+        return True
+    
     def get_all_cards(self):
         """
         Get all credit cards in the database.
@@ -805,10 +980,19 @@ class CreditCardDatabase:
         Returns:
             Credit card dictionary or None if not found
         """
-        for card in self.cards:
-            if card["card_id"] == card_id:
-                return card
-        return None
+        return self._card_index.get(card_id)
+    
+    def get_cards_by_ids(self, card_ids):
+        """
+        Get several credit cards by their IDs in a single pass.
+        
+        Args:
+            card_ids: IDs of the cards to retrieve
+            
+        Returns:
+            List of credit card dictionaries in the order of card_ids, skipping unknown IDs
+        """
+        return [self._card_index[card_id] for card_id in card_ids if card_id in self._card_index]
     
     def get_cards_by_issuer(self, issuer):
         """
@@ -820,7 +1004,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards from the issuer
         """
-        return [card for card in self.cards if card["issuer"] == issuer]
+        return self._cards_from_rows(self._bucket_index["issuer"].get(issuer, []))
     
     def get_cards_by_type(self, card_type):
         """
@@ -832,7 +1016,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards of the specified type
         """
-        return [card for card in self.cards if card["card_type"] == card_type]
+        return self._cards_from_rows(self._bucket_index["card_type"].get(card_type, []))
     
     def get_cards_by_tier(self, tier):
         """
@@ -844,7 +1028,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards of the specified tier
         """
-        return [card for card in self.cards if card["card_tier"] == tier]
+        return self._cards_from_rows(self._bucket_index["card_tier"].get(tier, []))
     
     def get_cards_by_annual_income(self, income):
         """
@@ -865,7 +1049,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards with lounge access
         """
-        return [card for card in self.cards if card["lounge_access"]]
+        return self._cards_from_rows(self._feature_rows["lounge_access"])
     
     def get_cards_with_no_annual_fee(self):
         """
@@ -874,7 +1058,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards with no annual fee
         """
-        return [card for card in self.cards if card["annual_fee"] == 0]
+        return self._cards_from_rows(self._feature_rows["no_annual_fee"])
     
     def get_cards_with_cashback(self):
         """
@@ -883,7 +1067,7 @@ class CreditCardDatabase:
         Returns:
             List of credit cards with cashback
         """
-        return [card for card in self.cards if card["cashback_rate"] > 0]
+        return self._cards_from_rows(self._feature_rows["cashback"])
     
     def get_cards_with_rewards(self):
         """
@@ -892,19 +1076,185 @@ class CreditCardDatabase:
         Returns:
             List of credit cards with rewards
         """
-        return [card for card in self.cards if card["reward_rate"] > 0]
+        return self._cards_from_rows(self._feature_rows["rewards"])
     
     def get_cards_for_category(self, category):
         """
         Get all credit cards with rewards for a specific category.
         
+        Aliases resolve through the category taxonomy, and cards rewarding a
+        narrower category (e.g. airlines for travel) are included.
+        
         Args:
             category: Spending category
             
         Returns:
             List of credit cards with rewards for the category
         """
-        return [card for card in self.cards if category.lower() in [cat.lower() for cat in card["reward_categories"]]]
+        return self._cards_from_rows(self._category_rows.get(self.category_taxonomy.canonical(category), []))
+    
+    def query(self, **predicates):
+        """
+        Find the credit cards matching all of the given predicates.
+        
+        Supported predicates:
+            issuer, card_tier, card_type, card_network: a value or a list of accepted values
+            joining_fee, annual_fee, renewal_fee, interest_rate, forex_markup, min_income:
+                an inclusive (low, high) range where either bound may be None
+            lounge_access, fuel_surcharge_waiver, movie_benefits, dining_benefits, travel_benefits,
+            shopping_benefits, insurance_coverage, co_branded, contactless, virtual_card: True or False
+            categories: a reward category or a list of categories that must all be offered
+        
+        The most selective indexed predicate drives the scan and the remaining
+        predicates are checked against each candidate, most selective first.
+        When testing every candidate would cost more than marking the matching
+        rows of each predicate, the predicates' row masks are intersected
+        instead.
+        
+        Example:
+            db.query(issuer="HDFC Bank", lounge_access=True, annual_fee=(None, 999), categories="dining")
+        
+        Args:
+            **predicates: Field predicates as described above
+            
+        Returns:
+            Generator of matching credit cards in database order
+        """
+        plans = []
+        for field, value in predicates.items():
+            if field in self.EQUALITY_FIELDS:
+                plans.append(self._plan_equality(field, value))
+            elif field in self.RANGE_FIELDS:
+                plans.append(self._plan_range(field, value))
+            elif field in self.BOOLEAN_FIELDS:
+                plans.append(self._plan_boolean(field, value))
+            elif field == "categories":
+                categories = [value] if isinstance(value, str) else value
+                plans.extend(self._plan_category(category) for category in categories)
+            else:
+                raise ValueError(f"Unsupported query predicate: {field}")
+        
+        return self._execute_plans(sorted(plans, key=lambda plan: plan[0]))
+    
+    def _plan_equality(self, field, value):
+        """
+        Plan an equality predicate on a hash-bucket index.
+        
+        Args:
+            field: Indexed field name
+            value: Accepted value or list of accepted values
+            
+        Returns:
+            Tuple of (estimated matches, row iterator factory, row test, row mask factory)
+        """
+        values = set(value) if isinstance(value, (list, tuple, set)) else {value}
+        buckets = [self._bucket_index[field].get(accepted, []) for accepted in values]
+        return (sum(len(bucket) for bucket in buckets),
+                lambda: heapq.merge(*buckets),
+                lambda row: self.cards[row].get(field) in values,
+                lambda: self._row_mask(*buckets))
+    
+    def _plan_range(self, field, bounds):
+        """
+        Plan an inclusive range predicate on a sorted numeric index.
+        
+        Args:
+            field: Indexed field name
+            bounds: Tuple of (low, high), either of which may be None
+            
+        Returns:
+            Tuple of (estimated matches, row iterator factory, row test, row mask factory)
+        """
+        low, high = bounds
+        values, rows = self._range_index[field]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        
+        def matches(row):
+            value = self.cards[row].get(field)
+            return value is not None and (low is None or value >= low) and (high is None or value <= high)
+        
+        return (max(end - start, 0), lambda: iter(sorted(rows[start:end])), matches,
+                lambda: self._row_mask(rows[start:end]))
+    
+    def _plan_boolean(self, field, expected):
+        """
+        Plan a boolean predicate on a feature row list.
+        
+        Args:
+            field: Indexed field name
+            expected: Required truth value
+            
+        Returns:
+            Tuple of (estimated matches, row iterator factory, row test, row mask factory)
+        """
+        rows = self._feature_rows[field]
+        expected = bool(expected)
+        
+        def matches(row):
+            return bool(self.cards[row].get(field, False)) == expected
+        
+        if expected:
+            return len(rows), lambda: iter(rows), matches, lambda: self._row_mask(rows)
+        return (len(self.cards) - len(rows), lambda: filter(matches, range(len(self.cards))), matches,
+                lambda: ~self._row_mask(rows))
+    
+    def _plan_category(self, category):
+        """
+        Plan a reward category predicate on the category row lists.
+        
+        Args:
+            category: Reward category
+            
+        Returns:
+            Tuple of (estimated matches, row iterator factory, row test, row mask factory)
+        """
+        name = self.category_taxonomy.canonical(category)
+        rows = self._category_rows.get(name, [])
+        return (len(rows), lambda: iter(rows), lambda row: name in self._row_categories[row],
+                lambda: self._row_mask(rows))
+    
+    def _row_mask(self, *row_lists):
+        """
+        Mark the given rows in a NumPy boolean mask over the catalog.
+        
+        Args:
+            *row_lists: Lists of row positions
+            
+        Returns:
+            NumPy boolean array with one entry per card
+        """
+        mask = np.zeros(len(self.cards), dtype=bool)
+        for rows in row_lists:
+            mask[np.fromiter(rows, dtype=np.intp, count=len(rows))] = True
+        return mask
+    
+    def _execute_plans(self, plans):
+        """
+        Stream the cards matching every planned predicate.
+        
+        Args:
+            plans: Predicate plans sorted by estimated matches
+            
+        Yields:
+            Matching credit cards
+        """
+        if not plans:
+            yield from self.cards
+            return
+        
+        if plans[0][0] * (len(plans) - 1) * self.ROW_TEST_COST > sum(plan[0] for plan in plans):
+            mask = plans[0][3]()
+            for _, _, _, row_mask in plans[1:]:
+                mask &= row_mask()
+            yield from self._cards_from_rows(np.flatnonzero(mask).tolist())
+            return
+        
+        _, driver_rows, _, _ = plans[0]
+        tests = [test for _, _, test, _ in plans[1:]]
+        for row in driver_rows():
+            if all(test(row) for test in tests):
+                yield self.cards[row]
 
 
 # Example of how to use the CreditCardDatabase class
@@ -0,0 +1,156 @@
+"""
+Eligibility index for the Credit Card Recommendation Engine.
+This file precompiles the eligibility criteria of every card so that the set of
+cards a user qualifies for can be found with a few binary searches and bitmap ANDs.
+"""
+
+import numpy as np
+
+
+class EligibilityIndex:
+    """
+    Index over the eligibility criteria of a list of credit cards.
+
+    Income, age and credit score requirements are kept as sorted arrays, and
+    employment types as one bitmap per type. Rows refer to positions in the
+    original card list.
+    """
+    def __init__(self, cards):
+        """
+        Build the index.
+
+        Args:
+            cards: List of credit card dictionaries
+        """
+        self.size = len(cards)
+
+        self._income_order, self._income_sorted = self._sorted_column(
+            [card.get("min_income", 0) for card in cards])
+        self._credit_score_order, self._credit_score_sorted = self._sorted_column(
+            [card.get("credit_score_required", 0) for card in cards])
+        self._min_age_order, self._min_age_sorted = self._sorted_column(
+            [card.get("min_age", 0) for card in cards])
+        # A non-positive maximum age means the card has no upper age limit
+        self._max_age_order, self._max_age_sorted = self._sorted_column(
+            [card.get("max_age", 100) if card.get("max_age", 100) > 0 else np.inf for card in cards])
+
+        # Cards that do not list employment types accept every applicant
+        self._open_employment = np.array([not card.get("employment_type") for card in cards], dtype=bool)
+        self._employment_bitmaps = {}
+        for row, card in enumerate(cards):
+            for employment_type in card.get("employment_type") or []:
+                if employment_type not in self._employment_bitmaps:
+                    self._employment_bitmaps[employment_type] = self._open_employment.copy()
+                self._employment_bitmaps[employment_type][row] = True
+
+    def _sorted_column(self, values):
+        """
+        Sort a numeric column, keeping track of the original rows.
+
+        Args:
+            values: List of values, one per card
+
+        Returns:
+            Tuple of (row order, sorted values)
+        """
+        values = np.array(values, dtype=float)
+        order = np.argsort(values, kind="stable")
+        return order, values[order]
+
+    def _rows_to_mask(self, rows):
+        """
+        Convert an array of rows into a bitmap over all cards.
+
+        Args:
+            rows: Array of row indices
+
+        Returns:
+            NumPy boolean array
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def eligible_mask(self, annual_income, age, credit_score_floor=None, employment_type=""):
+        """
+        Compute the bitmap of cards a user is eligible for.
+
+        Income and age may be None while they are not known yet, in which case
+        they do not restrict the result.
+
+        Args:
+            annual_income: User's annual income, or None if unknown
+            age: User's age, or None if unknown
+            credit_score_floor: Lower bound of the user's credit score, or None if unknown
+            employment_type: User's employment type (optional)
+
+        Returns:
+            NumPy boolean array with one entry per card
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        # Cards whose minimum income is at most the user's income
+        if annual_income is not None:
+            count = np.searchsorted(self._income_sorted, annual_income, side="right")
+            mask &= self._rows_to_mask(self._income_order[:count])
+
+        # Cards whose age interval contains the user's age
+        if age is not None:
+            count = np.searchsorted(self._min_age_sorted, age, side="right")
+            mask &= self._rows_to_mask(self._min_age_order[:count])
+            count = np.searchsorted(self._max_age_sorted, age, side="left")
+            mask &= self._rows_to_mask(self._max_age_order[count:])
+
+        # Cards whose required credit score is at most the user's score
+        if credit_score_floor is not None:
+            count = np.searchsorted(self._credit_score_sorted, credit_score_floor, side="right")
+            mask &= self._rows_to_mask(self._credit_score_order[:count])
+
+        if employment_type:
+            mask &= self._employment_bitmaps.get(employment_type, self._open_employment)
+
+        return mask
+
+    def eligible_rows(self, annual_income, age, credit_score_floor=None, employment_type=""):
+        """
+        Compute the rows of the cards a user is eligible for, in catalog order.
+
+        Args:
+            annual_income: User's annual income, or None if unknown
+            age: User's age, or None if unknown
+            credit_score_floor: Lower bound of the user's credit score, or None if unknown
+            employment_type: User's employment type (optional)
+
+        Returns:
+            NumPy array of row indices
+        """
+        return np.flatnonzero(self.eligible_mask(annual_income, age, credit_score_floor, employment_type))
+
+    def income_bucket(self, annual_income):
+        """
+        Get the bucket of an income between consecutive minimum income requirements.
+
+        Two incomes in the same bucket qualify for the same cards on income.
+
+        Args:
+            annual_income: User's annual income
+
+        Returns:
+            Number of cards whose minimum income is at most annual_income
+        """
+        return int(np.searchsorted(self._income_sorted, annual_income, side="right"))
+
+    def age_bucket(self, age):
+        """
+        Get the bucket of an age between consecutive age limits.
+
+        Two ages in the same bucket qualify for the same cards on age.
+
+        Args:
+            age: User's age
+
+        Returns:
+            Tuple of counts of minimum age limits reached and maximum age limits passed
+        """
+        return (int(np.searchsorted(self._min_age_sorted, age, side="right")),
+                int(np.searchsorted(self._max_age_sorted, age, side="left")))
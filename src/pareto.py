@@ -0,0 +1,61 @@
+"""
+Pareto front computation for the Credit Card Recommendation Engine.
+This file finds the cards that no other card beats on every criterion at once
+(the skyline), with a sort-based filter over the catalog's column arrays
+instead of comparing every pair of cards.
+"""
+
+import numpy as np
+
+
+def pareto_front(values, block_size=256):
+    """
+    Find the rows of a value matrix that no other row dominates.
+
+    A row dominates another when it is at least as large in every column and
+    larger in one, so columns to minimize must be negated first. Rows are
+    sorted in descending lexicographic order, where a row can only be
+    dominated by rows before it, and then filtered block by block: each block
+    is compared with the front found so far and within itself, so the work
+    grows with the number of rows times the size of the front.
+
+    Args:
+        values: NumPy array of shape (rows, criteria), larger is better
+        block_size: Number of rows filtered together
+
+    Returns:
+        Sorted array of the indices of the non-dominated rows; equal rows are all kept
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort(-values.T[::-1])
+    front = np.zeros((0, values.shape[1]))
+    kept = []
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        candidates = values[block]
+        survivors = ~_dominated_by(front, candidates)
+        block, candidates = block[survivors], candidates[survivors]
+        survivors = ~_dominated_by(candidates, candidates)
+        kept.append(block[survivors])
+        front = np.concatenate([front, candidates[survivors]])
+    return np.sort(np.concatenate(kept))
+
+
+def _dominated_by(front, candidates):
+    """
+    Check which candidates some row of the front dominates.
+
+    Args:
+        front: NumPy array of shape (front rows, criteria)
+        candidates: NumPy array of shape (candidates, criteria)
+
+    Returns:
+        NumPy boolean array with one entry per candidate
+    """
+    if len(front) == 0:
+        return np.zeros(len(candidates), dtype=bool)
+    at_least = np.all(front[None, :, :] >= candidates[:, None, :], axis=2)
+    better = np.any(front[None, :, :] > candidates[:, None, :], axis=2)
+    return np.any(at_least & better, axis=1)
@@ -0,0 +1,341 @@
+"""
+Card portfolio optimization for the Credit Card Recommendation Engine.
+This file searches for the best combination of two or three cards for a user,
+for example one card for fuel and one for online shopping, with a branch and
+bound search instead of enumerating every combination.
+"""
+
+import heapq
+
+import numpy as np
+
+
+class PortfolioOptimizer:
+    """
+    Branch and bound search over combinations of eligible cards.
+
+    Two objectives are supported:
+
+    - coverage: the number of the user's spending categories that some card of
+      the portfolio fully covers (bitset union of the card category masks),
+      then the sum of the cards' match scores
+    - reward_value: the estimated net annual value in rupees when each
+      category's spend goes to the portfolio card with the best rate for it and
+      international spend to the card with the lowest forex markup, minus the
+      annual fees, each waived when the spend a card receives reaches its
+      waiver threshold
+
+    Candidates are searched best first. Before a card is added, the best value
+    any portfolio extending the current one with later candidates could reach
+    is bounded, and as the bound only shrinks for later candidates, the rest of
+    the branch is cut as soon as it falls below the limit-th best portfolio.
+    Branches are bounded separately for each number of cards they may still
+    add, and a branch whose bound only ties the limit-th best is cut too when
+    none of its portfolios can win the tie, which matters for catalogs with
+    many equivalent cards. Equal values prefer fewer cards, then the cards
+    that come first in the search order.
+    """
+    OBJECTIVES = ("coverage", "reward_value")
+
+    # Margin added to bounds so that rounding never prunes a portfolio that ties the limit-th best
+    BOUND_SLACK = 1e-9
+
+    def __init__(self, engine):
+        """
+        Initialize the optimizer.
+
+        Args:
+            engine: RecommendationEngine providing the catalog, eligibility and scores
+        """
+        self.engine = engine
+        self.nodes_visited = 0
+
+    def optimize(self, profile, size=3, objective="coverage", fee_budget=None, limit=3):
+        """
+        Find the best portfolios of up to size eligible cards.
+
+        Args:
+            profile: Compiled user preferences
+            size: Maximum number of cards in a portfolio
+            objective: One of OBJECTIVES
+            fee_budget: Maximum combined annual fee of a portfolio in rupees (optional)
+            limit: Number of portfolios to return
+
+        Returns:
+            List of portfolio dictionaries, best first, each with the "cards"
+            (card IDs), the objective "value", the summed "match_score", the
+            combined "annual_fee" and the "covered_categories" of the user
+
+        Raises:
+            ValueError: If the objective is unknown or size is below 1
+        """
+        if objective not in self.OBJECTIVES:
+            raise ValueError(f"Unknown portfolio objective '{objective}', expected one of {', '.join(self.OBJECTIVES)}")
+        if size < 1:
+            raise ValueError("A portfolio needs at least one card")
+
+        engine = self.engine
+        catalog = engine.catalog
+        rows = engine._eligible_rows(profile)
+        if fee_budget is not None:
+            rows = rows[catalog.annual_fee[rows] <= fee_budget]
+        scores = engine._score_matrix([profile], rows)[0] if len(rows) else np.zeros(0)
+        wanted = profile.category_layers[0] if profile.category_layers else 0
+
+        if objective == "coverage":
+            search = _CoverageSearch(catalog, rows, scores, wanted)
+        else:
+            search = _RewardValueSearch(engine.compile_reward_values(), profile, rows)
+        self.nodes_visited = 0
+        best = self._branch_and_bound(search, catalog.annual_fee[rows[search.order]], size, fee_budget, limit)
+
+        portfolios = []
+        for (value, _), positions in sorted(best, reverse=True):
+            members = search.order[list(positions)]
+            union = 0
+            for row in rows[members]:
+                union |= catalog.category_bits[row]
+            portfolios.append({
+                "cards": [catalog.card_ids[row] for row in rows[members]],
+                "value": float(value[0]),
+                "match_score": float(scores[members].sum()),
+                "annual_fee": float(catalog.annual_fee[rows[members]].sum()),
+                "covered_categories": [category for category in dict.fromkeys(profile.normalized_categories)
+                                       if category in catalog.category_codes
+                                       and union >> catalog.category_codes[category] & 1]
+            })
+        return portfolios
+
+    def _branch_and_bound(self, search, fees, size, fee_budget, limit):
+        """
+        Run the depth-first branch and bound search.
+
+        Args:
+            search: Objective-specific search state (_CoverageSearch or _RewardValueSearch)
+            fees: Annual fees of the candidates, in search order
+            size: Maximum number of cards in a portfolio
+            fee_budget: Maximum combined annual fee, or None
+            limit: Number of portfolios to keep
+
+        Returns:
+            List of ((value, tie key), candidate positions) of the best portfolios
+        """
+        best = []
+        if limit <= 0:
+            return best
+
+        def visit(state, positions, fee_total, start):
+            slots = size - len(positions)
+            fee_limit = fee_budget - fee_total if fee_budget is not None else None
+            for position in range(start, len(fees)):
+                # Cut the branch when no number of cards it may still add beats the limit-th best
+                if len(best) == limit and all(
+                        self._cannot_reach(search.bound(state, position, extra, fee_limit), len(positions) + extra,
+                                           best[0][0])
+                        for extra in range(slots, 0, -1)):
+                    break
+                if fee_budget is not None and fee_total + fees[position] > fee_budget:
+                    continue
+                self.nodes_visited += 1
+                child = search.extend(state, position)
+                chosen = positions + (position,)
+                # Equal values prefer fewer cards, then the portfolio found first,
+                # whose cards come first in the search order
+                entry = (search.value(child), (-len(chosen), tuple(-chosen_position for chosen_position in chosen)))
+                if len(best) < limit:
+                    heapq.heappush(best, (entry, chosen))
+                elif entry > best[0][0]:
+                    heapq.heapreplace(best, (entry, chosen))
+                if slots > 1:
+                    visit(child, chosen, fee_total + fees[position], position + 1)
+
+        visit(search.root(), (), 0.0, 0)
+        return best
+
+    def _cannot_reach(self, bound, cards, entry):
+        """
+        Check whether a bound proves that no portfolio of a branch can beat the limit-th best.
+
+        Values are compared as tuples, with BOUND_SLACK on the last element.
+        The search visits portfolios in tie-break order, so when the bound only
+        ties the value, the branch's portfolios lose unless they have fewer cards.
+
+        Args:
+            bound: Upper bound tuple of the values of the branch portfolios
+            cards: Number of cards of the branch portfolios
+            entry: (value tuple, tie key) of the limit-th best portfolio
+
+        Returns:
+            True if the branch can be cut
+        """
+        value, key = entry
+        *bound_head, bound_last = bound
+        *value_head, value_last = value
+        if bound_head != value_head:
+            return bound_head < value_head
+        slack = self.BOUND_SLACK * max(1.0, abs(value_last))
+        if bound_last + slack < value_last:
+            return True
+        return bound_last <= value_last + slack and cards >= -key[0]
+
+
+class _CoverageSearch:
+    """
+    Search state for the coverage objective.
+
+    A state is the bitset union of the chosen cards and their summed score.
+    Candidates are ordered by score, and k more cards add at most the k
+    largest positive scores among the later candidates. The coverage k more cards
+    can add is at most the sum of the k largest numbers of new categories a
+    single later card adds, and at most what the union of every later card adds.
+    Portfolios that add coverage must include a later card that adds some on
+    its own, so their score is bounded with the best such card and the best
+    k - 1 others; portfolios that do not add any rank below them anyway.
+    Only the later cards within the remaining fee budget are counted.
+    """
+    def __init__(self, catalog, rows, scores, wanted):
+        """
+        Order the candidates and precompute their category words and suffix unions.
+
+        Args:
+            catalog: CardCatalog
+            rows: Array of candidate catalog rows
+            scores: Match scores aligned with rows
+            wanted: Bitmask of the user's spending categories
+        """
+        self.rows = rows
+        self.wanted = wanted
+        self.order = np.lexsort((catalog.id_rank[rows], -scores))
+        self.bits = [catalog.category_bits[row] & wanted for row in rows[self.order]]
+        self.scores = scores[self.order]
+        self.fees = catalog.annual_fee[rows[self.order]]
+        self.suffix_bits = [0] * (len(self.bits) + 1)
+        for position in range(len(self.bits) - 1, -1, -1):
+            self.suffix_bits[position] = self.suffix_bits[position + 1] | self.bits[position]
+        self.catalog = catalog
+        self.words = catalog.to_words(self.bits)
+        self._gains = {}
+
+    def root(self):
+        return 0, 0.0
+
+    def extend(self, state, position):
+        bits, score = state
+        return bits | self.bits[position], score + self.scores[position]
+
+    def value(self, state):
+        bits, score = state
+        return bin(bits).count("1"), float(score)
+
+    def bound(self, state, start, slots, fee_limit=None):
+        bits, score = state
+        key = (bits, fee_limit)
+        if key not in self._gains:
+            affordable = self.fees <= fee_limit if fee_limit is not None else np.ones(len(self.fees), dtype=bool)
+            gains = np.where(affordable, np.bitwise_count(self.words & ~self.catalog.to_words([bits])).sum(axis=1), 0)
+            self._gains[key] = gains, np.flatnonzero(gains), np.where(affordable, np.maximum(self.scores, 0.0), 0.0)
+        gains, gainers, scores = self._gains[key]
+        coverage = bin(bits).count("1")
+        coverage_bound = min(bin(bits | self.suffix_bits[start]).count("1"),
+                             coverage + int(_largest_sum(gains[start:], slots)))
+        if coverage_bound == coverage:
+            return coverage, float(score + _largest_sum(scores[start:], slots))
+        # The first later card adding coverage has the best score among those that do
+        gainer = gainers[np.searchsorted(gainers, start)]
+        return coverage_bound, float(score + scores[gainer] + _largest_sum(scores[start:], slots - 1))
+
+
+class _RewardValueSearch:
+    """
+    Search state for the reward value objective.
+
+    A state holds the chosen candidates, the best rate per category among
+    them, the lowest forex cost and the annual fees after waivers. Adding a
+    card only takes spend away from the cards already chosen, so their fees
+    never fall, and the gain of adding several cards is at most the sum of
+    their gains added one at a time (a category's spend goes to one card, the
+    international spend to one card). A later candidate's own gain is its
+    extra rewards and forex saving over the state, minus its annual fee unless
+    the user's whole spend could reach its waiver threshold, so the bound adds
+    the best slots positive gains among the later candidates within the
+    remaining fee budget. It is also never above the value with the best rate
+    and forex cost of all later candidates, which is the tighter of the two
+    when later cards gain in the same categories.
+    """
+    def __init__(self, reward_values, profile, rows):
+        """
+        Order the candidates and precompute their rates, forex costs and lowest possible fees.
+
+        Args:
+            reward_values: RewardValueModel of the catalog
+            profile: Compiled user preferences
+            rows: Array of candidate catalog rows
+        """
+        catalog = reward_values.catalog
+        self.rows = rows
+        self.annual_spend = reward_values.spend_matrix([profile])[0] * 12
+        values = reward_values.annual_values([profile], rows)[0] if len(rows) else np.zeros(0)
+        self.order = np.lexsort((catalog.id_rank[rows], -values))
+        ordered = rows[self.order]
+        self.rates = reward_values.rates[ordered]
+        self.forex_cost = profile.international_spend * 12 * catalog.forex_markup[ordered] / 100
+        self.annual_fee = catalog.annual_fee[ordered]
+        self.waiver_threshold = catalog.fee_waiver_threshold[ordered]
+        self.lowest_fee = np.where(self.annual_spend.sum() >= self.waiver_threshold, 0.0, self.annual_fee)
+        self.suffix_rates = np.zeros((len(ordered) + 1, len(self.annual_spend)))
+        self.suffix_forex = np.full(len(ordered) + 1, np.inf)
+        if len(ordered):
+            self.suffix_rates[:-1] = np.maximum.accumulate(self.rates[::-1], axis=0)[::-1]
+            self.suffix_forex[:-1] = np.minimum.accumulate(self.forex_cost[::-1])[::-1]
+        self._gains = {}
+
+    def root(self):
+        # Before any card is chosen, the forex cost is taken as the highest one,
+        # which every portfolio lowers to its own cheapest card
+        highest_forex = float(self.forex_cost.max()) if len(self.forex_cost) else 0.0
+        return (), np.zeros(len(self.annual_spend)), highest_forex, 0.0
+
+    def extend(self, state, position):
+        positions = state[0] + (position,)
+        rates = self.rates[list(positions)]
+        # Each category goes to the first chosen card with the best rate for it
+        owners = np.argmax(rates, axis=0)
+        routed = np.bincount(owners, weights=self.annual_spend, minlength=len(positions))
+        fees = float(np.where(routed >= self.waiver_threshold[list(positions)], 0.0,
+                              self.annual_fee[list(positions)]).sum())
+        return positions, rates.max(axis=0), min(state[2], self.forex_cost[position]), fees
+
+    def value(self, state):
+        _, best_rates, forex_cost, fees = state
+        return (float(np.dot(self.annual_spend, best_rates) - forex_cost - fees),)
+
+    def bound(self, state, start, slots, fee_limit=None):
+        positions, best_rates, forex_cost, fees = state
+        gains = self._gains.get(positions)
+        if gains is None:
+            gains = (np.maximum(self.rates - best_rates, 0.0) @ self.annual_spend
+                     + np.maximum(forex_cost - self.forex_cost, 0.0) - self.lowest_fee)
+            if fee_limit is not None:
+                gains[self.annual_fee > fee_limit] = 0.0
+            gains = self._gains[positions] = np.maximum(gains, 0.0)
+        rewards = np.dot(self.annual_spend, np.maximum(best_rates, self.suffix_rates[start]))
+        best_rate_bound = float(rewards - min(forex_cost, self.suffix_forex[start]) - fees)
+        return (min(self.value(state)[0] + _largest_sum(gains[start:], slots), best_rate_bound),)
+
+
+def _largest_sum(values, count):
+    """
+    Sum the largest values of an array.
+
+    Args:
+        values: NumPy array of non-negative values
+        count: Number of values to add
+
+    Returns:
+        Sum of the count largest values (all of them if there are fewer)
+    """
+    if count <= 0:
+        return 0
+    if count < len(values):
+        values = np.partition(values, len(values) - count)[len(values) - count:]
+    return values.sum()
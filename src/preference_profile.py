@@ -0,0 +1,151 @@
+"""
+Compiled user preference profile for the Credit Card Recommendation Engine.
+This file defines the typed form of a recommendation request that the engine
+scores against, so raw answers are parsed and normalized only once per request.
+"""
+
+import hashlib
+import json
+from enum import IntEnum
+
+
+class FeePreference(IntEnum):
+    """Answer to the annual fee question."""
+    OTHER = 0
+    NO_ANNUAL_FEE = 1
+    LOW_ANNUAL_FEE = 2
+    PREMIUM = 3
+
+
+class RewardPreference(IntEnum):
+    """Answer to the reward type question."""
+    OTHER = 0
+    CASHBACK = 1
+    REWARD_POINTS = 2
+    AIR_MILES = 3
+    DISCOUNTS = 4
+    NO_PREFERENCE = 5
+
+
+class TravelFrequency(IntEnum):
+    """Answer to the travel frequency question."""
+    OTHER = 0
+    FREQUENTLY = 1
+    OCCASIONALLY = 2
+    RARELY = 3
+
+
+class LoungeImportance(IntEnum):
+    """Answer to the lounge access question."""
+    OTHER = 0
+    VERY_IMPORTANT = 1
+    SOMEWHAT_IMPORTANT = 2
+    NOT_IMPORTANT = 3
+
+
+# Questionnaire answers for each select question, mapped to their enum members
+SELECT_ANSWERS = {
+    "fee_preference": {
+        "No annual fee": FeePreference.NO_ANNUAL_FEE,
+        "Low annual fee with better benefits": FeePreference.LOW_ANNUAL_FEE,
+        "Don't mind higher fees for premium benefits": FeePreference.PREMIUM
+    },
+    "reward_preference": {
+        "Cashback": RewardPreference.CASHBACK,
+        "Reward Points": RewardPreference.REWARD_POINTS,
+        "Air Miles": RewardPreference.AIR_MILES,
+        "Discounts": RewardPreference.DISCOUNTS,
+        "No preference": RewardPreference.NO_PREFERENCE
+    },
+    "travel_frequency": {
+        "Frequently": TravelFrequency.FREQUENTLY,
+        "Occasionally": TravelFrequency.OCCASIONALLY,
+        "Rarely": TravelFrequency.RARELY
+    },
+    "lounge_access_importance": {
+        "Very important": LoungeImportance.VERY_IMPORTANT,
+        "Somewhat important": LoungeImportance.SOMEWHAT_IMPORTANT,
+        "Not important": LoungeImportance.NOT_IMPORTANT
+    }
+}
+
+SELECT_ENUMS = {
+    "fee_preference": FeePreference,
+    "reward_preference": RewardPreference,
+    "travel_frequency": TravelFrequency,
+    "lounge_access_importance": LoungeImportance
+}
+
+
+def parse_select_answer(field, answer):
+    """
+    Convert a select answer to its enum member.
+
+    Args:
+        field: Question ID
+        answer: Raw answer
+
+    Returns:
+        Enum member, OTHER for missing or unrecognised answers
+    """
+    try:
+        return SELECT_ANSWERS[field].get(answer, SELECT_ENUMS[field].OTHER)
+    except TypeError:
+        return SELECT_ENUMS[field].OTHER
+
+
+class PreferenceProfile:
+    """
+    Parsed, normalized form of a user's answers.
+
+    Profiles are built by RecommendationEngine.compile_preferences and are
+    treated as read-only afterwards.
+    """
+    __slots__ = (
+        "preferences",
+        "annual_income", "age", "credit_score_floor", "employment_type", "eligibility_key",
+        "monthly_spend", "annual_spend", "international_transactions", "existing_cards",
+        "fee_preference", "reward_preference", "travel_frequency", "lounge_access_importance",
+        "preferred_card_tier", "preferred_tier",
+        "spending_categories", "normalized_categories", "category_count", "category_layers",
+        "category_spend", "international_spend", "payment_behaviour", "projection_years",
+        "preferred_banks", "existing_relationship",
+        "fingerprint"
+    )
+
+    def __init__(self, **fields):
+        """
+        Initialize the profile.
+
+        Args:
+            **fields: Value for every slot except fingerprint
+        """
+        for name in self.__slots__[:-1]:
+            setattr(self, name, fields[name])
+        self.fingerprint = self._compute_fingerprint()
+
+    def _compute_fingerprint(self):
+        """
+        Compute a stable 64-bit fingerprint of everything that affects recommendations.
+
+        Income and age enter through eligibility_key, so users who qualify for the
+        same cards and answered the rest identically share a fingerprint.
+
+        Returns:
+            Unsigned 64-bit integer
+        """
+        canonical = [
+            self.eligibility_key, self.credit_score_floor, self.employment_type,
+            self.monthly_spend, self.international_transactions, self.existing_cards,
+            int(self.fee_preference), int(self.reward_preference),
+            int(self.travel_frequency), int(self.lounge_access_importance),
+            self.preferred_card_tier, self.preferred_tier,
+            sorted(self.spending_categories), sorted(self.normalized_categories), self.category_count,
+            self.category_spend, self.international_spend, self.payment_behaviour, self.projection_years,
+            sorted(self.preferred_banks), sorted(self.existing_relationship)
+        ]
+        encoded = json.dumps(canonical, default=str).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "big")
+
+    def __repr__(self):
+        return f"PreferenceProfile(fingerprint={self.fingerprint:016x})"
@@ -0,0 +1,72 @@
+"""
+Ranking constraints for the Credit Card Recommendation Engine.
+This file defines the diversity constraints a recommendation list can be
+ranked under: caps on cards per issuer and per tier, a required mix of card
+networks and a mode that keeps only the best card of each issuer.
+"""
+
+from collections import namedtuple
+
+
+# Maximum cards per issuer and per normalized tier (None for no cap), minimum
+# cards per card network as sorted (network, count) pairs, and whether only
+# the best card of each issuer is considered
+RankingConstraints = namedtuple("RankingConstraints",
+                                ["max_per_issuer", "max_per_tier", "network_mix", "best_per_issuer"],
+                                defaults=(None, None, (), False))
+
+NO_CONSTRAINTS = RankingConstraints()
+
+
+def parse_constraints(values):
+    """
+    Build ranking constraints from a dictionary of options.
+
+    Args:
+        values: RankingConstraints, or a dictionary (or request arguments) with
+            optional max_per_issuer, max_per_tier, network_mix and
+            best_per_issuer. network_mix is a network -> minimum count
+            dictionary, a list of networks (one card each) or a string such
+            as "Visa:2,Mastercard"
+
+    Returns:
+        RankingConstraints
+
+    Raises:
+        ValueError: If a cap or a network count is below 1
+    """
+    if values is None:
+        return NO_CONSTRAINTS
+    if isinstance(values, RankingConstraints):
+        return values
+
+    caps = {}
+    for field in ("max_per_issuer", "max_per_tier"):
+        cap = values.get(field)
+        if cap is not None and cap != "":
+            cap = int(cap)
+            if cap < 1:
+                raise ValueError(f"{field} must be at least 1")
+            caps[field] = cap
+
+    network_mix = values.get("network_mix") or {}
+    if isinstance(network_mix, str):
+        network_mix = [entry.strip() for entry in network_mix.split(",") if entry.strip()]
+    if not isinstance(network_mix, dict):
+        entries = [entry.rsplit(":", 1) if ":" in entry else (entry, 1) for entry in network_mix]
+        network_mix = {}
+        for network, count in entries:
+            network_mix[network.strip()] = network_mix.get(network.strip(), 0) + int(count)
+    for network, count in network_mix.items():
+        if int(count) < 1:
+            raise ValueError(f"The network mix needs at least one {network} card")
+
+    best_per_issuer = values.get("best_per_issuer", False)
+    if isinstance(best_per_issuer, str):
+        best_per_issuer = best_per_issuer.lower() in ("true", "1", "yes")
+
+    return RankingConstraints(
+        max_per_issuer=caps.get("max_per_issuer"),
+        max_per_tier=caps.get("max_per_tier"),
+        network_mix=tuple(sorted((network, int(count)) for network, count in network_mix.items())),
+        best_per_issuer=bool(best_per_issuer))
@@ -0,0 +1,106 @@
+"""
+Recommendation cache for the Credit Card Recommendation Engine.
+This file provides a small thread-safe LRU cache with expiry for recommendation results.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecommendationCache:
+    """
+    Least-recently-used cache whose entries expire after a fixed time to live.
+    """
+    def __init__(self, max_size=1024, ttl=300):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries to keep
+            ttl: Number of seconds an entry stays valid (None for no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if the key is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Get a cached value, computing and storing it on a miss.
+
+        Args:
+            key: Cache key
+            compute: Function without arguments that produces the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """
+        Remove all entries, e.g. after the card catalog changed.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache hit/miss counters.
+
+        Returns:
+            Dictionary with hits, misses, hit rate and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl
+            }
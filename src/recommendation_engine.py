@@ -3,19 +3,116 @@ Recommendation algorithm for the Credit Card Recommendation Engine.
 This file defines the logic for matching user preferences with suitable credit cards.
 """
 
+import heapq
+import itertools
+import json
+
+import numpy as np
+
+from src.card_catalog import CardCatalog
+from src.category_taxonomy import CategoryTaxonomy
+from src.cost_projection import CostProjector, parse_behaviour
+from src.eligibility_index import EligibilityIndex
+from src.pareto import pareto_front
+from src.portfolio import PortfolioOptimizer
+from src.ranking_constraints import NO_CONSTRAINTS, parse_constraints
+from src.preference_profile import (PreferenceProfile, FeePreference, RewardPreference, TravelFrequency,
+                                    LoungeImportance, parse_select_answer)
+from src.recommendation_session import RecommendationSession, QuestionnaireSession
+from src.reward_value import RewardValueModel
+from src.scoring_tables import ScoringTables
+
+
 class RecommendationEngine:
     """
     Class to handle the recommendation algorithm for credit cards.
     """
-    def __init__(self, card_database=None):
+    # Match reason codes recorded during scoring and their display text
+    REASON_TEMPLATES = {
+        "no_annual_fee": "No annual fee",
+        "low_annual_fee": "Low annual fee",
+        "premium_fee": "Premium card with higher fee",
+        "fee_waiver": "Likely eligible for fee waiver based on spending",
+        "cashback": "Offers cashback at {0}%",
+        "reward_points": "Offers reward points at {0} points per ₹100",
+        "air_miles": "Offers air miles or travel rewards",
+        "discounts": "Offers discounts on shopping, dining, or entertainment",
+        "categories_excellent": "Excellent match for your spending categories",
+        "categories_good": "Good match for your spending categories",
+        "categories_some": "Matches some of your spending categories",
+        "travel_frequent": "Excellent travel benefits for frequent travelers",
+        "travel_occasional": "Good travel benefits for occasional travelers",
+        "lounge_visits": "Offers {0} complimentary lounge visits per year",
+        "lounge_access": "Offers airport lounge access",
+        "low_forex": "Low forex markup at {0}%",
+        "reasonable_forex": "Reasonable forex markup",
+        "fuel_benefits": "Offers fuel surcharge waiver",
+        "dining_benefits": "Offers dining benefits or discounts",
+        "shopping_benefits": "Offers shopping benefits or discounts",
+        "entertainment_benefits": "Offers movie or entertainment benefits",
+        "preferred_bank": "Card from your preferred bank: {0}",
+        "existing_relationship": "You have an existing relationship with {0}",
+        "card_tier": "Matches your preferred card tier: {0}",
+        "popular": "Highly popular card with excellent user ratings",
+        "well_rated": "Well-rated card with good user feedback",
+        "starter_card": "Good starter card for first-time users",
+        "reward_value": "Estimated net annual value of ₹{0:,.0f}",
+        "total_cost": "Projected cost of ownership of ₹{0:,.0f}"
+    }
+    
+    # Ways of ranking cards: by match score, by estimated net annual value in rupees
+    # or by projected total cost in rupees, with 1 when higher values rank first
+    # and -1 when lower values do
+    RANKING_MODES = {"score": 1, "reward_value": 1, "total_cost": -1}
+    
+    # Criteria of the Pareto front of cards, with 1 when higher values are
+    # better and -1 when lower values are: the annual fee after the user's
+    # waiver, the estimated yearly rewards in rupees, the forex markup and the
+    # complimentary lounge visits per year
+    PARETO_CRITERIA = {"annual_fee": -1, "reward_value": 1, "forex_markup": -1, "lounge_visits": 1}
+    
+    # Margin added to score bounds so that rounding never prunes a card that ties the k-th best score
+    BOUND_SLACK = 1e-9
+    # Fewest eligible cards for which pruning by score bounds is faster than scoring every eligible card
+    PRUNING_MIN_ROWS = 15000
+    
+    def __init__(self, card_database=None, vectorized=False, category_taxonomy=None, cluster_size=256):
         """
         Initialize the recommendation engine.
         
         Args:
             card_database: Database of credit cards (optional)
+            vectorized: Score all cards at once using column arrays (optional)
+            category_taxonomy: CategoryTaxonomy used to match spending categories (optional)
+            cluster_size: Number of cards per cluster when pruning by score bounds (optional)
         """
-        self.card_database = card_database
         self.weight_factors = self._define_weight_factors()
+        self.vectorized = vectorized
+        self.cluster_size = cluster_size
+        self.category_taxonomy = category_taxonomy or CategoryTaxonomy()
+        self.catalog_generation = 0
+        self.set_card_database(card_database)
+    
+    def set_card_database(self, card_database):
+        """
+        Set the database of credit cards and rebuild the derived indexes.
+        
+        Call this again whenever the card catalog changes. Each call starts a new
+        catalog generation, which is part of every cache key.
+        
+        Args:
+            card_database: Database of credit cards
+        """
+        self.catalog_generation += 1
+        self.card_database = card_database
+        self.catalog = None
+        self.eligibility_index = None
+        self._scoring_tables = None
+        self._reward_values = None
+        self._cost_projector = None
+        if card_database:
+            self.catalog = CardCatalog(card_database, self.category_taxonomy, self._normalize_tier)
+            self.eligibility_index = EligibilityIndex(card_database)
         
     def _define_weight_factors(self):
         """
@@ -61,277 +158,840 @@ class RecommendationEngine:
             "complementary_to_existing_cards": 3.0
         }
     
-    def recommend_cards(self, user_preferences, limit=5):
+    def recommend_cards(self, user_preferences, limit=5, explain=True, ranking="score", constraints=None):
         """
         Recommend credit cards based on user preferences.
         
         Args:
-            user_preferences: Dictionary containing user preferences
+            user_preferences: Dictionary containing user preferences, or a compiled PreferenceProfile
             limit: Maximum number of recommendations to return
+            explain: Whether to include human-readable match reasons
+            ranking: One of RANKING_MODES; with "reward_value" the match scores
+                are the estimated net annual values in rupees, with "total_cost"
+                the projected costs in rupees (cheapest first)
+            constraints: RankingConstraints or a dictionary of them (see
+                parse_constraints) capping cards per issuer or tier, requiring a
+                network mix or keeping the best card per issuer (optional)
             
         Returns:
             Dictionary containing recommended cards, match scores, and match reasons
+            (match reasons are left out when explain is False)
+            
+        Raises:
+            ValueError: If the ranking mode or a constraint is invalid
         """
+        self._check_ranking(ranking)
+        constraints = parse_constraints(constraints)
         if not self.card_database:
             return {"error": "Card database not initialized"}
         
-        # Filter cards based on eligibility criteria
-        eligible_cards = self._filter_eligible_cards(user_preferences)
+        profile = self.compile_preferences(user_preferences)
+        
+        if ranking != "score" or constraints != NO_CONSTRAINTS:
+            rows = self._eligible_rows(profile)
+            if ranking == "score":
+                values = self._score_matrix([profile], rows)[0]
+            else:
+                values = self._ranking_values([profile], rows, ranking)[0]
+            order = self._select(values * self.RANKING_MODES[ranking], rows, limit, constraints)
+            return self._format_vectorized_results(rows, values, order, profile, explain, ranking)
+        
+        if self.vectorized:
+            return self._recommend_vectorized(self._eligible_rows(profile), profile, limit, explain)
         
-        # Score each eligible card
-        scored_cards = self._score_cards(eligible_cards, user_preferences)
+        # Filter cards based on eligibility criteria
+        eligible_cards = self._filter_eligible_cards(profile)
         
-        # Sort cards by score in descending order
-        sorted_cards = sorted(scored_cards, key=lambda x: x["total_score"], reverse=True)
+        # Score each eligible card, recording match reason codes
+        scored_cards = self._score_cards(eligible_cards, profile)
         
-        # Limit the number of recommendations
-        top_cards = sorted_cards[:limit]
+        # Select the highest scoring cards with a heap, breaking ties on card_id
+        top_cards = heapq.nsmallest(limit, scored_cards, key=lambda x: (-x["total_score"], x["card_id"]))
         
-        # Format the results
+        # Format the results, rendering match reasons only for the selected cards
         results = {
             "recommended_cards": [card["card_id"] for card in top_cards],
-            "match_scores": {card["card_id"]: card["total_score"] for card in top_cards},
-            "match_reasons": {card["card_id"]: card["match_reasons"] for card in top_cards}
+            "match_scores": {card["card_id"]: card["total_score"] for card in top_cards}
         }
+        if explain:
+            results["match_reasons"] = {card["card_id"]: self._render_reasons(card["match_reasons"])
+                                        for card in top_cards}
         
         return results
     
-    def _filter_eligible_cards(self, user_preferences):
+    def compile_preferences(self, user_preferences):
+        """
+        Compile raw user preferences into a PreferenceProfile.
+        
+        Every answer is parsed and normalized once here, so scoring never
+        re-reads the raw dictionary.
+        
+        Args:
+            user_preferences: Dictionary containing user preferences, or an already compiled profile
+            
+        Returns:
+            PreferenceProfile
+        """
+        if isinstance(user_preferences, PreferenceProfile):
+            return user_preferences
+        
+        annual_income = user_preferences.get("annual_income", 0)
+        age = user_preferences.get("age", 0)
+        if self.eligibility_index:
+            eligibility_key = (self.eligibility_index.income_bucket(annual_income),
+                               self.eligibility_index.age_bucket(age))
+        else:
+            eligibility_key = (annual_income, age)
+        
+        monthly_spend = self._parse_monthly_spend(user_preferences.get("monthly_card_spend", ""))
+        preferred_card_tier = user_preferences.get("preferred_card_tier", "") or ""
+        spending_categories = user_preferences.get("primary_spending_categories", []) or []
+        normalized_categories = tuple(self._normalize_category(category) for category in spending_categories)
+        
+        category_layers = self.catalog.category_layers(normalized_categories) if self.catalog else ()
+        category_spend = self._parse_category_spend(
+            user_preferences.get("monthly_category_spend"), normalized_categories, monthly_spend)
+        
+        return PreferenceProfile(
+            preferences=user_preferences,
+            annual_income=annual_income,
+            age=age,
+            credit_score_floor=self._parse_credit_score(user_preferences.get("credit_score", "Don't Know")),
+            employment_type=user_preferences.get("employment_type", ""),
+            eligibility_key=eligibility_key,
+            monthly_spend=monthly_spend,
+            annual_spend=monthly_spend * 12,
+            international_transactions=bool(user_preferences.get("international_transactions", False)),
+            existing_cards=bool(user_preferences.get("existing_cards", False)),
+            fee_preference=parse_select_answer("fee_preference", user_preferences.get("fee_preference", "")),
+            reward_preference=parse_select_answer("reward_preference", user_preferences.get("reward_preference", "")),
+            travel_frequency=parse_select_answer("travel_frequency", user_preferences.get("travel_frequency", "")),
+            lounge_access_importance=parse_select_answer(
+                "lounge_access_importance", user_preferences.get("lounge_access_importance", "")),
+            preferred_card_tier=preferred_card_tier,
+            preferred_tier=self._normalize_tier(preferred_card_tier) if preferred_card_tier else "",
+            spending_categories=frozenset(spending_categories),
+            normalized_categories=normalized_categories,
+            category_count=len(spending_categories),
+            category_layers=category_layers,
+            category_spend=category_spend,
+            international_spend=float(user_preferences.get("monthly_international_spend", 0) or 0),
+            payment_behaviour=parse_behaviour(
+                user_preferences, sum(amount for _, amount in category_spend) or monthly_spend),
+            projection_years=max(int(user_preferences.get("projection_years", 3) or 3), 1),
+            preferred_banks=frozenset(user_preferences.get("preferred_banks", []) or []),
+            existing_relationship=frozenset(user_preferences.get("existing_relationship", []) or [])
+        )
+    
+    def preference_cache_key(self, user_preferences, limit=5, explain=True, ranking="score", constraints=None):
+        """
+        Build a canonical cache key for a recommendation request.
+        
+        The key is the profile fingerprint, in which multi-select answers are
+        order-independent and income and age are replaced by the eligibility
+        bucket they fall into, so requests that must produce the same
+        recommendations share a key. It also holds the catalog generation, so a
+        result computed on a catalog that has since changed is never hit, even
+        if it is stored after the cache was cleared.
+        
+        Args:
+            user_preferences: Dictionary containing user preferences, or a compiled PreferenceProfile
+            limit: Maximum number of recommendations to return
+            explain: Whether match reasons are requested
+            ranking: Ranking mode of the request
+            constraints: Ranking constraints of the request (optional)
+            
+        Returns:
+            String identifying the request
+        """
+        profile = self.compile_preferences(user_preferences)
+        key = f"{self.catalog_generation}:{profile.fingerprint:016x}:{limit}:{int(bool(explain))}:{ranking}"
+        constraints = parse_constraints(constraints)
+        if constraints != NO_CONSTRAINTS:
+            key += ":" + json.dumps(constraints)
+        return key
+    
+    def _filter_eligible_cards(self, profile):
         """
         Filter cards based on eligibility criteria.
         
         Args:
-            user_preferences: Dictionary containing user preferences
+            profile: Compiled user preferences
             
         Returns:
             List of eligible cards
         """
-        eligible_cards = []
+        return [self.card_database[row] for row in self._eligible_rows(profile)]
+    
+    def _eligible_rows(self, profile):
+        """
+        Look up the catalog rows of the cards the user is eligible for.
         
-        for card in self.card_database:
-            # Check income eligibility
-            if user_preferences.get("annual_income", 0) < card.get("min_income", 0):
-                continue
+        Args:
+            profile: Compiled user preferences
             
-            # Check age eligibility
-            user_age = user_preferences.get("age", 0)
-            if user_age < card.get("min_age", 0) or (card.get("max_age", 100) > 0 and user_age > card.get("max_age", 100)):
-                continue
+        Returns:
+            Array of row indices in catalog order
+        """
+        return self.eligibility_index.eligible_rows(*self._eligibility_criteria(profile))
+    
+    def _eligibility_criteria(self, profile):
+        """
+        Extract the eligibility index lookup arguments from a profile.
+        
+        Args:
+            profile: Compiled user preferences
             
-            # Check credit score eligibility if provided
-            user_credit_score = user_preferences.get("credit_score", "Don't Know")
-            if user_credit_score != "Don't Know":
-                # Extract the minimum value from the credit score range
-                if user_credit_score == "Below 650":
-                    min_credit_score = 600
-                elif user_credit_score == "650-700":
-                    min_credit_score = 650
-                elif user_credit_score == "700-750":
-                    min_credit_score = 700
-                elif user_credit_score == "750-800":
-                    min_credit_score = 750
-                elif user_credit_score == "Above 800":
-                    min_credit_score = 800
-                else:
-                    min_credit_score = 0
-                
-                if min_credit_score < card.get("credit_score_required", 0):
-                    continue
+        Returns:
+            Tuple of (annual income, age, credit score floor, employment type)
+        """
+        return profile.annual_income, profile.age, profile.credit_score_floor, profile.employment_type
+    
+    def _score_cards(self, eligible_cards, profile):
+        """
+        Score each eligible card based on user preferences.
+        
+        Args:
+            eligible_cards: List of eligible cards
+            profile: Compiled user preferences
             
-            # Check employment type eligibility
-            user_employment = user_preferences.get("employment_type", "")
-            if user_employment and card.get("employment_type") and user_employment not in card.get("employment_type", []):
-                continue
+        Returns:
+            List of cards with scores and match reason codes
+        """
+        return [self._score_card(card, profile) for card in eligible_cards]
+    
+    def _score_card(self, card, profile):
+        """
+        Score a single card based on user preferences.
+        
+        Args:
+            card: Card to score
+            profile: Compiled user preferences
             
-            # Add card to eligible list
-            eligible_cards.append(card)
+        Returns:
+            Dictionary with the card's scores, match reason codes and total score
+        """
+        score_details = {
+            "card_id": card["card_id"],
+            "card_name": card["card_name"],
+            "scores": {},
+            "match_reasons": [],
+            "total_score": 0.0
+        }
         
-        return eligible_cards
+        # Score based on fee preferences
+        self._score_fee_preferences(score_details, card, profile)
+        
+        # Score based on reward preferences
+        self._score_reward_preferences(score_details, card, profile)
+        
+        # Score based on travel preferences
+        self._score_travel_preferences(score_details, card, profile)
+        
+        # Score based on lifestyle preferences
+        self._score_lifestyle_preferences(score_details, card, profile)
+        
+        # Score based on bank preferences
+        self._score_bank_preferences(score_details, card, profile)
+        
+        # Score based on card tier preferences
+        self._score_card_tier_preferences(score_details, card, profile)
+        
+        # Score based on additional factors
+        self._score_additional_factors(score_details, card, profile)
+        
+        # Calculate total score
+        score_details["total_score"] = sum(score_details["scores"].values())
+        
+        return score_details
     
-    def _score_cards(self, eligible_cards, user_preferences):
+    def recommend_portfolio(self, user_preferences, size=3, objective="coverage", fee_budget=None, limit=3):
         """
-        Score each eligible card based on user preferences.
+        Recommend combinations of cards that work best together.
         
         Args:
-            eligible_cards: List of eligible cards
-            user_preferences: Dictionary containing user preferences
+            user_preferences: Dictionary containing user preferences, or a compiled PreferenceProfile
+            size: Maximum number of cards in a portfolio
+            objective: One of PortfolioOptimizer.OBJECTIVES; "coverage" maximizes
+                the spending categories covered, "reward_value" the combined
+                estimated net annual value in rupees
+            fee_budget: Maximum combined annual fee in rupees (optional)
+            limit: Number of portfolios to return
             
         Returns:
-            List of cards with scores and match reasons
+            Dictionary containing the recommended portfolios, best first
+            
+        Raises:
+            ValueError: If the objective is unknown or size is below 1
         """
-        scored_cards = []
+        if not self.card_database:
+            return {"error": "Card database not initialized"}
         
-        for card in eligible_cards:
-            score_details = {
-                "card_id": card["card_id"],
-                "card_name": card["card_name"],
-                "scores": {},
-                "match_reasons": [],
-                "total_score": 0.0
-            }
+        profile = self.compile_preferences(user_preferences)
+        optimizer = PortfolioOptimizer(self)
+        return {"portfolios": optimizer.optimize(profile, size, objective, fee_budget, limit)}
+    
+    def pareto_cards(self, user_preferences):
+        """
+        Find the eligible cards that no other eligible card beats on every PARETO_CRITERIA criterion.
+        
+        Args:
+            user_preferences: Dictionary containing user preferences, or a compiled PreferenceProfile
+            
+        Returns:
+            Dictionary containing the non-dominated card IDs, ordered by
+            reward value (highest first), and their criteria values by card ID
+        """
+        if not self.card_database:
+            return {"error": "Card database not initialized"}
+        
+        profile = self.compile_preferences(user_preferences)
+        rows = self._eligible_rows(profile)
+        breakdown = self.compile_reward_values().value_breakdown([profile], rows)
+        criteria = {
+            "annual_fee": breakdown["annual_fee"][0],
+            "reward_value": breakdown["rewards"][0],
+            "forex_markup": self.catalog.forex_markup[rows],
+            "lounge_visits": self.catalog.lounge_visits[rows]
+        }
+        values = np.column_stack([criteria[name] * direction for name, direction in self.PARETO_CRITERIA.items()])
+        front = pareto_front(values)
+        front = front[np.lexsort((self.catalog.id_rank[rows[front]], -criteria["reward_value"][front]))]
+        
+        card_ids = [self.catalog.card_ids[row] for row in rows[front]]
+        return {
+            "pareto_cards": card_ids,
+            "criteria": {card_id: {name: float(criteria[name][position]) for name in self.PARETO_CRITERIA}
+                         for card_id, position in zip(card_ids, front)}
+        }
+    
+    def start_session(self):
+        """
+        Start a what-if session that re-scores only the components affected by changed answers.
+        
+        Returns:
+            RecommendationSession
+        """
+        return RecommendationSession(self)
+    
+    def start_questionnaire(self):
+        """
+        Start a questionnaire session that narrows and scores the candidate cards step by step.
+        
+        Returns:
+            QuestionnaireSession
+        """
+        return QuestionnaireSession(self)
+    
+    def recommend_batch(self, preferences_iterable, limit=5, chunk_size=1024, explain=True, ranking="score",
+                        constraints=None):
+        """
+        Recommend credit cards for many users at once.
+        
+        Users are scored in chunks as a user x card score matrix. Each result is
+        identical to what recommend_cards returns for the same preferences.
+        
+        Args:
+            preferences_iterable: Iterable of user preference dictionaries or compiled profiles
+            limit: Maximum number of recommendations per user
+            chunk_size: Number of users scored together
+            explain: Whether to include human-readable match reasons
+            ranking: One of RANKING_MODES
+            constraints: Ranking constraints applied to every user (optional)
+            
+        Yields:
+            One recommendation dictionary per user, in input order
+            
+        Raises:
+            ValueError: If the ranking mode or a constraint is invalid
+        """
+        self._check_ranking(ranking)
+        constraints = parse_constraints(constraints)
+        preferences_iterator = iter(preferences_iterable)
+        while True:
+            chunk = list(itertools.islice(preferences_iterator, chunk_size))
+            if not chunk:
+                return
+            if not self.card_database:
+                for _ in chunk:
+                    yield {"error": "Card database not initialized"}
+                continue
             
-            # Score based on fee preferences
-            self._score_fee_preferences(score_details, card, user_preferences)
+            profiles = [self.compile_preferences(user_preferences) for user_preferences in chunk]
+            all_rows = np.arange(self.catalog.size)
+            eligible = np.array([
+                self.eligibility_index.eligible_mask(*self._eligibility_criteria(profile))
+                for profile in profiles
+            ])
+            if ranking == "score":
+                total_scores = self._score_matrix(profiles, all_rows)
+            else:
+                total_scores = self._ranking_values(profiles, all_rows, ranking)
             
-            # Score based on reward preferences
-            self._score_reward_preferences(score_details, card, user_preferences)
+            for user, profile in enumerate(profiles):
+                rows = np.flatnonzero(eligible[user])
+                user_scores = total_scores[user, rows]
+                order = self._select(user_scores * self.RANKING_MODES[ranking], rows, limit, constraints)
+                yield self._format_vectorized_results(rows, user_scores, order, profile, explain, ranking)
+    
+    def _recommend_vectorized(self, rows, profile, limit, explain=True):
+        """
+        Rank eligible cards using column arrays instead of per-card scoring.
+        
+        Clusters of cards are ranked by their score bound for the user. The
+        best clusters are scored until they hold enough eligible cards to give
+        a k-th best score. The cards of the clusters whose bound still reaches
+        it then get a bound of their own for this user, the cards with the
+        highest bounds are scored to raise the k-th best score, and the others
+        are only scored if their bound can still reach it, so the result is the
+        same as a full scan. Below PRUNING_MIN_ROWS eligible cards the bounds
+        cost more than they save and every eligible card is scored.
+        
+        Args:
+            rows: Array of catalog rows of the eligible cards
+            profile: Compiled user preferences
+            limit: Maximum number of recommendations to return
+            explain: Whether to include human-readable match reasons
             
-            # Score based on travel preferences
-            self._score_travel_preferences(score_details, card, user_preferences)
+        Returns:
+            Dictionary containing recommended cards, match scores, and match reasons
+        """
+        tables = self.compile_scoring_tables()
+        if not 0 < limit < len(rows) or len(rows) < self.PRUNING_MIN_ROWS or len(tables.cluster_members) <= 1:
+            total_scores = self._score_matrix([profile], rows)[0]
+            order = self._top_k(total_scores, rows, limit)
+            return self._format_vectorized_results(rows, total_scores, order, profile, explain)
+        
+        eligible = np.zeros(self.catalog.size, dtype=bool)
+        eligible[rows] = True
+        cluster_bounds = tables.cluster_bounds(profile)
+        
+        # Score the best clusters until they hold at least limit eligible cards
+        seeds = []
+        seed_count = 0
+        for cluster in np.argsort(-cluster_bounds, kind="stable"):
+            members = tables.cluster_members[cluster]
+            seeds.append(members[eligible[members]])
+            seed_count += len(seeds[-1])
+            if seed_count >= limit:
+                break
+        best_rows = np.concatenate(seeds)
+        best_scores = self._score_matrix([profile], best_rows)[0]
+        kth_score = -np.partition(-best_scores, limit - 1)[limit - 1] - self.BOUND_SLACK
+        
+        # Bound the other eligible cards of the clusters that can reach the k-th best
+        # score, in row order so that the table gathers stay cheap
+        candidates = eligible & (cluster_bounds >= kth_score)[tables.cluster_of]
+        candidates[best_rows] = False
+        members = np.flatnonzero(candidates)
+        bounds = tables.profile_card_bounds(profile, members)
+        
+        # Score the cards with the highest bounds first, then the others that can still reach the k-th best score
+        if len(members) > limit:
+            first = np.zeros(len(members), dtype=bool)
+            first[np.argpartition(-bounds, limit - 1)[:limit]] = True
+            best_rows = np.concatenate([best_rows, members[first]])
+            best_scores = np.concatenate([best_scores, self._score_matrix([profile], members[first])[0]])
+            kth_score = -np.partition(-best_scores, limit - 1)[limit - 1] - self.BOUND_SLACK
+            members = members[~first & (bounds >= kth_score)]
+        else:
+            members = members[bounds >= kth_score]
+        best_rows = np.concatenate([best_rows, members])
+        best_scores = np.concatenate([best_scores, self._score_matrix([profile], members)[0]])
+        
+        order = self._top_k(best_scores, best_rows, limit)
+        return self._format_vectorized_results(best_rows, best_scores, order, profile, explain)
+    
+    def _top_k(self, total_scores, rows, limit):
+        """
+        Select the positions of the highest scores without sorting every card.
+        
+        Ties are broken on card_id, matching the heap selection of the per-card path.
+        
+        Args:
+            total_scores: Array of total scores aligned with rows
+            rows: Array of scored catalog rows
+            limit: Maximum number of positions to return
             
-            # Score based on lifestyle preferences
-            self._score_lifestyle_preferences(score_details, card, user_preferences)
+        Returns:
+            Array of positions into rows, best first
+        """
+        if limit <= 0 or len(total_scores) == 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.arange(len(total_scores))
+        if limit < len(total_scores):
+            # Keep every card scoring at least the k-th best score, including ties
+            kth_score = -np.partition(-total_scores, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(total_scores >= kth_score)
+        order = np.lexsort((self.catalog.id_rank[rows[candidates]], -total_scores[candidates]))
+        return candidates[order[:limit]]
+    
+    def _select(self, total_scores, rows, limit, constraints=NO_CONSTRAINTS):
+        """
+        Select the positions of the best cards, under ranking constraints if any.
+        
+        Args:
+            total_scores: Array of total scores aligned with rows, higher is better
+            rows: Array of scored catalog rows
+            limit: Maximum number of positions to return
+            constraints: RankingConstraints
             
-            # Score based on bank preferences
-            self._score_bank_preferences(score_details, card, user_preferences)
+        Returns:
+            Array of positions into rows, best first
+        """
+        if constraints == NO_CONSTRAINTS:
+            return self._top_k(total_scores, rows, limit)
+        return self._constrained_top_k(total_scores, rows, limit, constraints)
+    
+    def _constrained_top_k(self, total_scores, rows, limit, constraints):
+        """
+        Select the best cards under per-issuer and per-tier caps and a required network mix.
+        
+        With best_per_issuer, a segmented max first keeps the best card of each
+        issuer. Cards are then taken in score order, skipping those over a cap
+        and keeping enough places for the networks still missing from the mix;
+        places the mix cannot fill go to the best skipped cards. Candidates are
+        drawn from a growing partial top-k instead of a full sort, so only as
+        many cards are ranked as the constraints skip.
+        
+        Args:
+            total_scores: Array of total scores aligned with rows, higher is better
+            rows: Array of scored catalog rows
+            limit: Maximum number of positions to return
+            constraints: RankingConstraints
             
-            # Score based on card tier preferences
-            self._score_card_tier_preferences(score_details, card, user_preferences)
+        Returns:
+            Array of positions into rows, best first
+        """
+        catalog = self.catalog
+        positions = np.arange(len(rows))
+        if constraints.best_per_issuer and len(rows):
+            # Segmented max: sort by issuer, then score, and keep the first card of each issuer
+            issuers = catalog.issuer_code[rows]
+            order = np.lexsort((catalog.id_rank[rows], -total_scores, issuers))
+            starts = np.flatnonzero(np.concatenate([[True], issuers[order][1:] != issuers[order][:-1]]))
+            positions = np.sort(order[starts])
+        scores = total_scores[positions]
+        candidate_rows = rows[positions]
+        
+        caps = [(catalog.issuer_code, np.zeros(len(catalog.issuer_codes), dtype=np.int64), constraints.max_per_issuer),
+                (catalog.tier_code, np.zeros(len(catalog.tier_codes), dtype=np.int64), constraints.max_per_tier)]
+        caps = [(codes, counts, cap) for codes, counts, cap in caps if cap is not None]
+        # Networks no card has keep their places until the skipped cards fill them
+        required = {catalog.network_codes.get(network, -1 - index): count
+                    for index, (network, count) in enumerate(constraints.network_mix)}
+        network_counts = dict.fromkeys(required, 0)
+        
+        def fits(row):
+            return all(counts[codes[row]] < cap for codes, counts, cap in caps)
+        
+        def take(position):
+            row = candidate_rows[position]
+            for codes, counts, _ in caps:
+                counts[codes[row]] += 1
+            network = catalog.network_code[row]
+            if network in network_counts:
+                network_counts[network] += 1
+            selected.append(position)
+        
+        selected = []
+        skipped = []
+        considered = 0
+        fetched = min(len(positions), 2 * limit)
+        while len(selected) < limit and considered < len(positions):
+            ranked = self._top_k(scores, candidate_rows, fetched)
+            for position in ranked[considered:]:
+                row = candidate_rows[position]
+                if not fits(row):
+                    continue
+                network = catalog.network_code[row]
+                missing = sum(max(count - network_counts[code], 0) for code, count in required.items())
+                if network_counts.get(network, 0) < required.get(network, 0) or len(selected) + missing < limit:
+                    take(position)
+                    if len(selected) == limit:
+                        break
+                else:
+                    skipped.append(position)
+            considered = len(ranked)
+            fetched = min(len(positions), 4 * fetched)
+        
+        # Fill the places kept for networks the eligible cards cannot supply
+        for position in skipped:
+            if len(selected) == limit:
+                break
+            if fits(candidate_rows[position]):
+                take(position)
+        
+        selected = np.array(selected, dtype=np.int64)
+        order = np.lexsort((catalog.id_rank[candidate_rows[selected]], -scores[selected]))
+        return positions[selected[order]]
+    
+    def _format_vectorized_results(self, rows, total_scores, order, profile, explain=True, ranking="score"):
+        """
+        Format ranked catalog rows as a recommendation dictionary.
+        
+        Args:
+            rows: Array of scored catalog rows
+            total_scores: Array of total scores (or ranking values) aligned with rows
+            order: Positions into rows of the recommended cards, best first
+            profile: Compiled user preferences
+            explain: Whether to include human-readable match reasons
+            ranking: Ranking mode; other modes than "score" lead the reasons with the ranking value
             
-            # Score based on additional factors
-            self._score_additional_factors(score_details, card, user_preferences)
+        Returns:
+            Dictionary containing recommended cards, match scores, and match reasons
+        """
+        results = {"recommended_cards": [], "match_scores": {}}
+        if explain:
+            results["match_reasons"] = {}
+        for position in order:
+            card = self.card_database[rows[position]]
+            card_id = card["card_id"]
+            results["recommended_cards"].append(card_id)
+            results["match_scores"][card_id] = float(total_scores[position])
+            if explain:
+                reason_codes = self._score_card(card, profile)["match_reasons"]
+                if ranking != "score":
+                    reason_codes = [(ranking, (float(total_scores[position]),))] + reason_codes
+                results["match_reasons"][card_id] = self._render_reasons(reason_codes)
+        
+        return results
+    
+    def compile_scoring_tables(self):
+        """
+        Get the component score tables of the current catalog and weight factors.
+        
+        The tables are compiled on first use and recompiled whenever the catalog
+        is replaced or weight_factors no longer match the weights they were
+        compiled with (including in-place changes).
+        
+        Returns:
+            ScoringTables
+        """
+        if self._scoring_tables is None or self._scoring_tables.weight_factors != self.weight_factors:
+            self._scoring_tables = ScoringTables(self.catalog, self.weight_factors, self.cluster_size)
+        return self._scoring_tables
+    
+    def compile_reward_values(self):
+        """
+        Get the reward value model of the current catalog, built on first use.
+        
+        Returns:
+            RewardValueModel
+        """
+        if self._reward_values is None:
+            self._reward_values = RewardValueModel(self.catalog)
+        return self._reward_values
+    
+    def compile_cost_projector(self):
+        """
+        Get the cost projector of the current catalog, built on first use.
+        
+        Returns:
+            CostProjector
+        """
+        if self._cost_projector is None:
+            self._cost_projector = CostProjector(self.catalog)
+        return self._cost_projector
+    
+    def _check_ranking(self, ranking):
+        """
+        Check that a ranking mode is known.
+        
+        Args:
+            ranking: Ranking mode
             
-            # Calculate total score
-            total_score = sum(score_details["scores"].values())
-            score_details["total_score"] = total_score
+        Raises:
+            ValueError: If the ranking mode is not one of RANKING_MODES
+        """
+        if ranking not in self.RANKING_MODES:
+            raise ValueError(f"Unknown ranking mode '{ranking}', expected one of {', '.join(self.RANKING_MODES)}")
+    
+    def _ranking_values(self, profiles, rows, ranking):
+        """
+        Compute the values cards are ranked by in a ranking mode other than "score".
+        
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to rank
+            ranking: Ranking mode
             
-            scored_cards.append(score_details)
+        Returns:
+            Array of values with shape (users, rows), ordered following RANKING_MODES
+        """
+        if ranking == "total_cost":
+            return self.compile_cost_projector().project(
+                [profile.payment_behaviour for profile in profiles], rows,
+                [profile.projection_years for profile in profiles])["total"]
+        return self.compile_reward_values().annual_values(profiles, rows)
+    
+    def _score_matrix(self, profiles, rows):
+        """
+        Score the given catalog rows for several users at once.
         
-        return scored_cards
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to score
+            
+        Returns:
+            Array of total scores with shape (users, rows)
+        """
+        return self.compile_scoring_tables().score(profiles, rows)
     
-    def _score_fee_preferences(self, score_details, card, user_preferences):
+    def _add_reason(self, score_details, code, *params):
+        """
+        Record a match reason code with its parameters.
+        
+        The text is only rendered by _render_reasons for the cards that are returned.
+        
+        Args:
+            score_details: Dictionary to store score details
+            code: Key of REASON_TEMPLATES
+            *params: Values substituted into the reason template
+        """
+        score_details["match_reasons"].append((code, params))
+    
+    def _render_reasons(self, reason_codes):
+        """
+        Render recorded match reason codes as human-readable text.
+        
+        Args:
+            reason_codes: List of (code, params) tuples
+            
+        Returns:
+            List of match reason strings
+        """
+        return [self.REASON_TEMPLATES[code].format(*params) for code, params in reason_codes]
+    
+    def _score_fee_preferences(self, score_details, card, profile):
         """
         Score card based on fee preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        fee_preference = user_preferences.get("fee_preference", "")
+        fee_preference = profile.fee_preference
         
         # Score based on annual fee
         annual_fee_score = 0.0
-        if fee_preference == "No annual fee" and card.get("annual_fee", 0) == 0:
+        if fee_preference == FeePreference.NO_ANNUAL_FEE and card.get("annual_fee", 0) == 0:
             annual_fee_score = self.weight_factors["annual_fee_match"]
-            score_details["match_reasons"].append("No annual fee")
-        elif fee_preference == "Low annual fee with better benefits" and 0 < card.get("annual_fee", 0) <= 1000:
+            self._add_reason(score_details, "no_annual_fee")
+        elif fee_preference == FeePreference.LOW_ANNUAL_FEE and 0 < card.get("annual_fee", 0) <= 1000:
             annual_fee_score = self.weight_factors["annual_fee_match"] * 0.8
-            score_details["match_reasons"].append("Low annual fee")
-        elif fee_preference == "Don't mind higher fees for premium benefits" and card.get("annual_fee", 0) > 1000:
+            self._add_reason(score_details, "low_annual_fee")
+        elif fee_preference == FeePreference.PREMIUM and card.get("annual_fee", 0) > 1000:
             annual_fee_score = self.weight_factors["annual_fee_match"] * 0.9
-            score_details["match_reasons"].append("Premium card with higher fee")
+            self._add_reason(score_details, "premium_fee")
         
         score_details["scores"]["annual_fee"] = annual_fee_score
         
-        # Score based on fee waiver
-        if card.get("fee_waiver_condition", ""):
-            monthly_spend = self._parse_monthly_spend(user_preferences.get("monthly_card_spend", ""))
-            annual_spend = monthly_spend * 12
-            
-            # Simple check if annual spend might meet waiver condition
-            # In a real implementation, this would be more sophisticated
-            if annual_spend >= 100000:  # Assuming ₹1 lakh is a common threshold
-                score_details["scores"]["fee_waiver"] = self.weight_factors["fee_waiver_match"]
-                score_details["match_reasons"].append("Likely eligible for fee waiver based on spending")
+        # Score based on fee waiver, against the threshold parsed when the catalog was built
+        # (NaN for cards without a waiver, so the comparison fails)
+        if profile.annual_spend >= self.catalog.fee_waiver_threshold[self.catalog.row_of[card["card_id"]]]:
+            score_details["scores"]["fee_waiver"] = self.weight_factors["fee_waiver_match"]
+            self._add_reason(score_details, "fee_waiver")
     
-    def _score_reward_preferences(self, score_details, card, user_preferences):
+    def _score_reward_preferences(self, score_details, card, profile):
         """
         Score card based on reward preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        reward_preference = user_preferences.get("reward_preference", "")
+        reward_preference = profile.reward_preference
         
         # Score based on reward type
         reward_type_score = 0.0
-        if reward_preference == "Cashback" and card.get("cashback_rate", 0) > 0:
+        if reward_preference == RewardPreference.CASHBACK and card.get("cashback_rate", 0) > 0:
             reward_type_score = self.weight_factors["reward_type_match"]
-            score_details["match_reasons"].append(f"Offers cashback at {card.get('cashback_rate')}%")
-        elif reward_preference == "Reward Points" and card.get("reward_rate", 0) > 0:
+            self._add_reason(score_details, "cashback", card.get('cashback_rate'))
+        elif reward_preference == RewardPreference.REWARD_POINTS and card.get("reward_rate", 0) > 0:
             reward_type_score = self.weight_factors["reward_type_match"]
-            score_details["match_reasons"].append(f"Offers reward points at {card.get('reward_rate')} points per ₹100")
-        elif reward_preference == "Air Miles" and "travel" in card.get("reward_categories", []):
+            self._add_reason(score_details, "reward_points", card.get('reward_rate'))
+        elif reward_preference == RewardPreference.AIR_MILES and "travel" in card.get("reward_categories", []):
             reward_type_score = self.weight_factors["reward_type_match"]
-            score_details["match_reasons"].append("Offers air miles or travel rewards")
-        elif reward_preference == "Discounts" and any(cat in ["shopping", "dining", "entertainment"] for cat in card.get("reward_categories", [])):
+            self._add_reason(score_details, "air_miles")
+        elif reward_preference == RewardPreference.DISCOUNTS and any(cat in ["shopping", "dining", "entertainment"] for cat in card.get("reward_categories", [])):
             reward_type_score = self.weight_factors["reward_type_match"]
-            score_details["match_reasons"].append("Offers discounts on shopping, dining, or entertainment")
-        elif reward_preference == "No preference":
+            self._add_reason(score_details, "discounts")
+        elif reward_preference == RewardPreference.NO_PREFERENCE:
             reward_type_score = self.weight_factors["reward_type_match"] * 0.5
         
         score_details["scores"]["reward_type"] = reward_type_score
         
         # Score based on spending categories
         spending_category_score = 0.0
-        user_categories = user_preferences.get("primary_spending_categories", [])
-        card_categories = card.get("reward_categories", [])
+        row = self.catalog.row_of[card["card_id"]]
+        card_bits = self.catalog.category_bits[row]
+        partial_bits = self.catalog.partial_category_bits[row]
         
         # Calculate overlap between user categories and card categories
-        if user_categories and card_categories:
-            # Normalize category names for comparison
-            normalized_user_categories = [self._normalize_category(cat) for cat in user_categories]
-            normalized_card_categories = [self._normalize_category(cat) for cat in card_categories]
-            
-            # Count matches
-            matches = sum(1 for cat in normalized_user_categories if cat in normalized_card_categories)
+        if profile.category_count and (card_bits or partial_bits):
+            # Count matches as the popcount of each category layer ANDed with the card
+            # bitmasks, with categories the card only covers through a narrower one
+            # counting partly
+            full_matches = sum((layer & card_bits).bit_count() for layer in profile.category_layers)
+            partial_matches = sum((layer & partial_bits).bit_count() for layer in profile.category_layers)
+            matches = full_matches + self.category_taxonomy.partial_match_weight * partial_matches
             
             if matches > 0:
                 # Score based on percentage of user categories matched
-                match_percentage = matches / len(normalized_user_categories)
+                match_percentage = matches / profile.category_count
                 spending_category_score = self.weight_factors["spending_category_match"] * match_percentage
                 
                 if match_percentage >= 0.7:
-                    score_details["match_reasons"].append("Excellent match for your spending categories")
+                    self._add_reason(score_details, "categories_excellent")
                 elif match_percentage >= 0.4:
-                    score_details["match_reasons"].append("Good match for your spending categories")
+                    self._add_reason(score_details, "categories_good")
                 else:
-                    score_details["match_reasons"].append("Matches some of your spending categories")
+                    self._add_reason(score_details, "categories_some")
         
         score_details["scores"]["spending_category"] = spending_category_score
     
-    def _score_travel_preferences(self, score_details, card, user_preferences):
+    def _score_travel_preferences(self, score_details, card, profile):
         """
         Score card based on travel preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        travel_frequency = user_preferences.get("travel_frequency", "")
-        lounge_importance = user_preferences.get("lounge_access_importance", "")
-        international_transactions = user_preferences.get("international_transactions", False)
+        travel_frequency = profile.travel_frequency
+        lounge_importance = profile.lounge_access_importance
+        international_transactions = profile.international_transactions
         
         # Score based on travel benefits
         travel_score = 0.0
-        if travel_frequency == "Frequently" and card.get("travel_benefits", False):
+        if travel_frequency == TravelFrequency.FREQUENTLY and card.get("travel_benefits", False):
             travel_score = self.weight_factors["travel_benefits_match"]
-            score_details["match_reasons"].append("Excellent travel benefits for frequent travelers")
-        elif travel_frequency == "Occasionally" and card.get("travel_benefits", False):
+            self._add_reason(score_details, "travel_frequent")
+        elif travel_frequency == TravelFrequency.OCCASIONALLY and card.get("travel_benefits", False):
             travel_score = self.weight_factors["travel_benefits_match"] * 0.7
-            score_details["match_reasons"].append("Good travel benefits for occasional travelers")
-        elif travel_frequency == "Rarely" and card.get("travel_benefits", False):
+            self._add_reason(score_details, "travel_occasional")
+        elif travel_frequency == TravelFrequency.RARELY and card.get("travel_benefits", False):
             travel_score = self.weight_factors["travel_benefits_match"] * 0.3
         
         score_details["scores"]["travel_benefits"] = travel_score
         
         # Score based on lounge access
         lounge_score = 0.0
-        if lounge_importance == "Very important" and card.get("lounge_access", False):
+        if lounge_importance == LoungeImportance.VERY_IMPORTANT and card.get("lounge_access", False):
             lounge_score = self.weight_factors["lounge_access_match"]
             visits = card.get("lounge_access_count", 0)
             if visits > 0:
-                score_details["match_reasons"].append(f"Offers {visits} complimentary lounge visits per year")
+                self._add_reason(score_details, "lounge_visits", visits)
             else:
-                score_details["match_reasons"].append("Offers airport lounge access")
-        elif lounge_importance == "Somewhat important" and card.get("lounge_access", False):
+                self._add_reason(score_details, "lounge_access")
+        elif lounge_importance == LoungeImportance.SOMEWHAT_IMPORTANT and card.get("lounge_access", False):
             lounge_score = self.weight_factors["lounge_access_match"] * 0.7
-            score_details["match_reasons"].append("Offers airport lounge access")
-        elif lounge_importance == "Not important":
+            self._add_reason(score_details, "lounge_access")
+        elif lounge_importance == LoungeImportance.NOT_IMPORTANT:
             lounge_score = 0.0
         
         score_details["scores"]["lounge_access"] = lounge_score
@@ -340,108 +1000,130 @@ class RecommendationEngine:
         forex_score = 0.0
         if international_transactions and card.get("forex_markup", 0) <= 2.0:
             forex_score = self.weight_factors["forex_markup_value"]
-            score_details["match_reasons"].append(f"Low forex markup at {card.get('forex_markup')}%")
+            self._add_reason(score_details, "low_forex", card.get('forex_markup'))
         elif international_transactions and card.get("forex_markup", 0) <= 3.5:
             forex_score = self.weight_factors["forex_markup_value"] * 0.5
-            score_details["match_reasons"].append("Reasonable forex markup")
+            self._add_reason(score_details, "reasonable_forex")
         
         score_details["scores"]["forex_markup"] = forex_score
     
-    def _score_lifestyle_preferences(self, score_details, card, user_preferences):
+    def _score_lifestyle_preferences(self, score_details, card, profile):
         """
         Score card based on lifestyle preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        user_categories = user_preferences.get("primary_spending_categories", [])
+        user_categories = profile.spending_categories
         
         # Score based on fuel benefits
         if "Fuel" in user_categories and card.get("fuel_surcharge_waiver", False):
             score_details["scores"]["fuel_benefits"] = self.weight_factors["fuel_benefits_match"]
-            score_details["match_reasons"].append("Offers fuel surcharge waiver")
+            self._add_reason(score_details, "fuel_benefits")
         
         # Score based on dining benefits
         if "Dining" in user_categories and card.get("dining_benefits", False):
             score_details["scores"]["dining_benefits"] = self.weight_factors["dining_benefits_match"]
-            score_details["match_reasons"].append("Offers dining benefits or discounts")
+            self._add_reason(score_details, "dining_benefits")
         
         # Score based on shopping benefits
         if "Shopping" in user_categories and card.get("shopping_benefits", False):
             score_details["scores"]["shopping_benefits"] = self.weight_factors["shopping_benefits_match"]
-            score_details["match_reasons"].append("Offers shopping benefits or discounts")
+            self._add_reason(score_details, "shopping_benefits")
         
         # Score based on entertainment benefits
         if "Entertainment" in user_categories and card.get("movie_benefits", False):
             score_details["scores"]["entertainment_benefits"] = self.weight_factors["entertainment_benefits_match"]
-            score_details["match_reasons"].append("Offers movie or entertainment benefits")
+            self._add_reason(score_details, "entertainment_benefits")
     
-    def _score_bank_preferences(self, score_details, card, user_preferences):
+    def _score_bank_preferences(self, score_details, card, profile):
         """
         Score card based on bank preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        preferred_banks = user_preferences.get("preferred_banks", [])
-        existing_relationships = user_preferences.get("existing_relationship", [])
+        preferred_banks = profile.preferred_banks
+        existing_relationships = profile.existing_relationship
         
         # Score based on preferred banks
         if preferred_banks and card.get("issuer", "") in preferred_banks:
             score_details["scores"]["preferred_bank"] = self.weight_factors["preferred_bank_match"]
-            score_details["match_reasons"].append(f"Card from your preferred bank: {card.get('issuer')}")
+            self._add_reason(score_details, "preferred_bank", card.get('issuer'))
         
         # Score based on existing relationships
         if existing_relationships and card.get("issuer", "") in existing_relationships:
             score_details["scores"]["existing_relationship"] = self.weight_factors["existing_relationship_match"]
-            score_details["match_reasons"].append(f"You have an existing relationship with {card.get('issuer')}")
+            self._add_reason(score_details, "existing_relationship", card.get('issuer'))
     
-    def _score_card_tier_preferences(self, score_details, card, user_preferences):
+    def _score_card_tier_preferences(self, score_details, card, profile):
         """
         Score card based on card tier preferences.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
-        preferred_tier = user_preferences.get("preferred_card_tier", "")
-        
-        if preferred_tier and self._normalize_tier(card.get("card_tier", "")) == self._normalize_tier(preferred_tier):
+        if profile.preferred_tier and self._normalize_tier(card.get("card_tier", "")) == profile.preferred_tier:
             score_details["scores"]["card_tier"] = self.weight_factors["card_tier_match"]
-            score_details["match_reasons"].append(f"Matches your preferred card tier: {preferred_tier}")
+            self._add_reason(score_details, "card_tier", profile.preferred_card_tier)
     
-    def _score_additional_factors(self, score_details, card, user_preferences):
+    def _score_additional_factors(self, score_details, card, profile):
         """
         Score card based on additional factors.
         
         Args:
             score_details: Dictionary to store score details
             card: Card to score
-            user_preferences: User preferences
+            profile: Compiled user preferences
         """
         # Score based on popularity
         popularity = card.get("popularity_score", 0)
         if popularity > 7:
             score_details["scores"]["popularity"] = self.weight_factors["popularity_score"]
-            score_details["match_reasons"].append("Highly popular card with excellent user ratings")
+            self._add_reason(score_details, "popular")
         elif popularity > 5:
             score_details["scores"]["popularity"] = self.weight_factors["popularity_score"] * 0.7
-            score_details["match_reasons"].append("Well-rated card with good user feedback")
+            self._add_reason(score_details, "well_rated")
         
         # Score based on complementary to existing cards
         # This would require knowledge of user's existing cards and their features
         # Simplified implementation for now
-        existing_cards = user_preferences.get("existing_cards", False)
-        if not existing_cards:
+        if not profile.existing_cards:
             # If user has no existing cards, give slight boost to entry-level cards
             if self._normalize_tier(card.get("card_tier", "")) == "basic":
                 score_details["scores"]["complementary"] = self.weight_factors["complementary_to_existing_cards"]
-                score_details["match_reasons"].append("Good starter card for first-time users")
+                self._add_reason(score_details, "starter_card")
+    
+    def _parse_credit_score(self, credit_score):
+        """
+        Parse a credit score range to the lowest score it contains.
+        
+        Args:
+            credit_score: String representing the credit score range
+            
+        Returns:
+            Minimum credit score, or None if the user does not know their score
+        """
+        if credit_score == "Don't Know":
+            return None
+        elif credit_score == "Below 650":
+            return 600
+        elif credit_score == "650-700":
+            return 650
+        elif credit_score == "700-750":
+            return 700
+        elif credit_score == "750-800":
+            return 750
+        elif credit_score == "Above 800":
+            return 800
+        else:
+            return 0
     
     def _parse_monthly_spend(self, spend_range):
         """
@@ -466,6 +1148,31 @@ class RecommendationEngine:
         else:
             return 0
     
+    def _parse_category_spend(self, category_spend, normalized_categories, monthly_spend):
+        """
+        Parse the monthly spend per category.
+        
+        Without an explicit breakdown, the monthly card spend is split evenly
+        over the chosen spending categories (or counted as other spend).
+        
+        Args:
+            category_spend: Dictionary of category -> monthly amount in rupees, or None
+            normalized_categories: Canonical names of the chosen spending categories
+            monthly_spend: Parsed monthly card spend
+            
+        Returns:
+            Sorted tuple of (canonical category, monthly amount) pairs
+        """
+        amounts = {}
+        if category_spend:
+            for category, amount in category_spend.items():
+                name = self._normalize_category(category)
+                amounts[name] = amounts.get(name, 0.0) + float(amount)
+        elif monthly_spend:
+            categories = sorted(set(normalized_categories)) or [RewardValueModel.OTHER_CATEGORY]
+            amounts = {category: monthly_spend / len(categories) for category in categories}
+        return tuple(sorted((category, amount) for category, amount in amounts.items() if amount > 0))
+    
     def _normalize_category(self, category):
         """
         Normalize category name for comparison.
@@ -474,27 +1181,9 @@ class RecommendationEngine:
             category: Category name
             
         Returns:
-            Normalized category name
-        """
-        category = category.lower()
-        
-        # Map similar categories
-        if category in ["grocery", "groceries"]:
-            return "groceries"
-        elif category in ["dining", "restaurant", "restaurants", "food"]:
-            return "dining"
-        elif category in ["shopping", "retail", "online shopping"]:
-            return "shopping"
-        elif category in ["travel", "airline", "airlines", "hotel", "hotels"]:
-            return "travel"
-        elif category in ["fuel", "petrol", "gas", "diesel"]:
-            return "fuel"
-        elif category in ["entertainment", "movie", "movies", "theatre"]:
-            return "entertainment"
-        elif category in ["bill", "bills", "bill payments", "utility", "utilities"]:
-            return "bills"
-        else:
-            return category
+            Canonical category name from the category taxonomy
+        """
+        return self.category_taxonomy.canonical(category)
     
     def _normalize_tier(self, tier):
         """
@@ -0,0 +1,368 @@
+"""
+Recommendation sessions for the Credit Card Recommendation Engine.
+This file keeps the per-card component scores of a user's answers on the server,
+so that changing one answer only re-scores the components that depend on it and
+answers collected step by step are scored as they arrive.
+"""
+
+import numpy as np
+
+
+class RecommendationSession:
+    """
+    Recommendations for one user whose answers change a little at a time.
+
+    The session stores the score of every score component for every card and
+    the eligible card rows of the previous request. A new request recomputes
+    only the components whose inputs changed, and the eligibility set only if
+    income, age, credit score or employment changed. Results are identical to
+    RecommendationEngine.recommend_cards.
+    """
+    def __init__(self, engine):
+        """
+        Start an empty session.
+
+        Args:
+            engine: RecommendationEngine providing the catalog and scoring tables
+        """
+        self.engine = engine
+        self.preferences = {}
+        self.profile = None
+        self.recomputed = ()
+        self._tables = None
+        self._scored_rows = None
+        self._keys = {}
+        self._components = {}
+        self._eligibility = None
+        self._eligible_rows = None
+
+    def _rows_to_score(self):
+        """
+        Get the catalog rows whose component scores the session keeps.
+
+        Every card is kept, so that eligibility changes never require re-scoring.
+
+        Returns:
+            Sorted array of catalog rows
+        """
+        return np.arange(self.engine.catalog.size)
+
+    def _eligible(self, profile):
+        """
+        Get the rows of the cards the user is eligible for, reusing the previous result.
+
+        Args:
+            profile: Compiled user preferences
+
+        Returns:
+            Sorted array of catalog rows
+        """
+        # The index is part of the key so that a catalog change is noticed
+        eligibility = (self.engine.eligibility_index, self.engine._eligibility_criteria(profile))
+        if eligibility != self._eligibility:
+            self._eligibility = eligibility
+            self._eligible_rows = self.engine.eligibility_index.eligible_rows(*eligibility[1])
+        return self._eligible_rows
+
+    def _refresh_components(self, profile, names=None):
+        """
+        Recompute the component scores whose inputs differ from the stored ones.
+
+        Everything is recomputed after the catalog, the weights or the scored rows changed.
+
+        Args:
+            profile: Compiled user preferences
+            names: Components to bring up to date (defaults to all)
+
+        Returns:
+            Tuple of the names of the recomputed components
+        """
+        tables = self.engine.compile_scoring_tables()
+        rows = self._rows_to_score()
+        if tables is not self._tables or not np.array_equal(rows, self._scored_rows):
+            self._tables = tables
+            self._scored_rows = rows
+            self._keys = {}
+            self._components = {}
+
+        keys = tables.answer_keys(profile)
+        changed = tuple(name for name in tables.COMPONENTS
+                        if (names is None or name in names)
+                        and (name not in self._components or self._keys[name] != keys[name]))
+        for name, scores in tables.component_scores([profile], rows, changed):
+            self._components[name] = scores[0]
+            self._keys[name] = keys[name]
+        return changed
+
+    def recommend(self, user_preferences, limit=5, explain=True):
+        """
+        Recommend cards for a full set of answers, reusing unchanged component scores.
+
+        Args:
+            user_preferences: Dictionary containing user preferences, or a compiled PreferenceProfile
+            limit: Maximum number of recommendations to return
+            explain: Whether to include human-readable match reasons
+
+        Returns:
+            Dictionary containing recommended cards, match scores, and match reasons
+        """
+        engine = self.engine
+        if not engine.card_database:
+            return {"error": "Card database not initialized"}
+
+        profile = engine.compile_preferences(user_preferences)
+        rows = self._eligible(profile)
+        self.recomputed = self._refresh_components(profile)
+        self.preferences = dict(profile.preferences)
+        self.profile = profile
+
+        # Sum the components in scoring order so totals match a full re-score exactly
+        total = np.zeros(len(self._scored_rows))
+        for name in self._tables.COMPONENTS:
+            total += self._components[name]
+
+        scores = total[np.searchsorted(self._scored_rows, rows)]
+        order = engine._top_k(scores, rows, limit)
+        return engine._format_vectorized_results(rows, scores, order, profile, explain)
+
+    def update(self, changes, limit=5, explain=True):
+        """
+        Change some answers of the previous request and recommend again.
+
+        Args:
+            changes: Dictionary of the answers that changed
+            limit: Maximum number of recommendations to return
+            explain: Whether to include human-readable match reasons
+
+        Returns:
+            Dictionary containing recommended cards, match scores, and match reasons
+        """
+        return self.recommend(dict(self.preferences, **changes), limit, explain)
+
+
+class QuestionnaireSession(RecommendationSession):
+    """
+    Server-side state of a questionnaire answered one step at a time.
+
+    Until income and age are known, the candidate set is provisional (unknown
+    criteria do not exclude any card). Once they are known, only the cards the
+    user is eligible for are kept, and each later step scores the components
+    it answers on that reduced set, so the final recommendation only sums the
+    stored components.
+    """
+    # Answers that must be known to fix the candidate set
+    REQUIRED_ELIGIBILITY_FIELDS = ("annual_income", "age")
+    # Every answer that can remove cards from the candidate set
+    ELIGIBILITY_FIELDS = ("annual_income", "age", "credit_score", "employment_type")
+
+    def _eligibility_answers(self):
+        """
+        Get the eligibility index lookup arguments from the answers given so far.
+
+        Returns:
+            Tuple of (annual income, age, credit score floor, employment type), None where unknown
+        """
+        preferences = self.preferences
+        return (preferences.get("annual_income"),
+                preferences.get("age"),
+                self.engine._parse_credit_score(preferences.get("credit_score", "Don't Know")),
+                preferences.get("employment_type", ""))
+
+    def _eligible(self, profile=None):
+        """
+        Get the rows of the candidate cards for the answers given so far.
+
+        Args:
+            profile: Unused, eligibility comes from the raw answers so that unknown criteria are skipped
+
+        Returns:
+            Sorted array of catalog rows
+        """
+        eligibility = (self.engine.eligibility_index, self._eligibility_answers())
+        if eligibility != self._eligibility:
+            self._eligibility = eligibility
+            self._eligible_rows = self.engine.eligibility_index.eligible_rows(*eligibility[1])
+        return self._eligible_rows
+
+    def _rows_to_score(self):
+        """
+        Get the catalog rows whose component scores the session keeps: the candidate cards.
+
+        Returns:
+            Sorted array of catalog rows
+        """
+        return self._eligible()
+
+    @property
+    def eligibility_known(self):
+        """Whether the answers needed to fix the candidate set have been given."""
+        return all(self.preferences.get(field) is not None for field in self.REQUIRED_ELIGIBILITY_FIELDS)
+
+    def submit(self, answers):
+        """
+        Record the answers of one questionnaire step.
+
+        Once eligibility is known, the components answered so far are scored on
+        the candidate cards.
+
+        Args:
+            answers: Dictionary of answers given in this step
+
+        Returns:
+            Dictionary describing the progress (see status)
+        """
+        self.preferences = dict(self.preferences, **answers)
+        self.recomputed = ()
+        if self.engine.card_database and self.eligibility_known:
+            self._score_answered()
+        return self.status()
+
+    def _score_answered(self):
+        """
+        Bring the scores of the components whose questions have all been answered up to date.
+
+        Returns:
+            List of the names of the answered components, in scoring order
+        """
+        tables = self.engine.compile_scoring_tables()
+        answered = [name for name in tables.COMPONENTS
+                    if all(field in self.preferences for field in tables.COMPONENT_FIELDS[name])]
+        self.recomputed = self._refresh_components(self.engine.compile_preferences(self.preferences), answered)
+        return answered
+
+    def _answered_total(self, answered):
+        """
+        Sum the stored scores of the answered components for every candidate card.
+
+        Args:
+            answered: Names of the answered components
+
+        Returns:
+            NumPy array of partial totals aligned with the candidate rows
+        """
+        total = np.zeros(len(self._scored_rows))
+        for name in answered:
+            total += self._components[name]
+        return total
+
+    def top_k_stable(self, limit=5):
+        """
+        Check whether the remaining answers can still change which cards are recommended.
+
+        The provisional top-k cards are compared with every other candidate:
+        for each unanswered component, the lowest score difference over all its
+        answers is added to the difference of the answered components. The
+        top-k set is stable when every such worst case is still positive; the
+        order within the top-k may still change. The top-k is never stable
+        while an answer that can remove candidate cards (ELIGIBILITY_FIELDS)
+        is missing.
+
+        Args:
+            limit: Number of recommendations
+
+        Returns:
+            True if no combination of remaining answers changes the top-k cards
+        """
+        if not self.engine.card_database or not self.eligibility_known:
+            return False
+        if any(field not in self.preferences for field in self.ELIGIBILITY_FIELDS):
+            return False
+        answered = self._score_answered()
+        rows = self._scored_rows
+        if limit <= 0 or len(rows) <= limit:
+            return True
+
+        tables = self._tables
+        unanswered = [name for name in tables.COMPONENTS if name not in answered]
+        total = self._answered_total(answered)
+        provisional = total.copy()
+        for name in unanswered:
+            lowest, highest = tables.component_range(name)
+            provisional += (lowest[rows] + highest[rows]) / 2
+
+        top = self.engine._top_k(provisional, rows, limit)
+        others = np.ones(len(rows), dtype=bool)
+        others[top] = False
+        gaps = total[top][:, None] - total[others][None, :]
+        for name in unanswered:
+            gaps += tables.component_gap(name, rows[top], rows[others])
+        return bool(gaps.min() > self.engine.BOUND_SLACK)
+
+    def split_entropy(self, field, values, limit=5):
+        """
+        Measure how well a question splits the provisional top-k of the candidates.
+
+        For every possible answer, the components that depend on the question
+        are scored and added to the answered components, and the resulting
+        top-k set is kept as a bitset of catalog rows. Answers leading to the
+        same bitset are indistinguishable for the recommendation.
+
+        Args:
+            field: Question ID
+            values: Possible answers, each taken as equally likely
+            limit: Number of recommendations
+
+        Returns:
+            Entropy in bits of the top-k set over the answers (0 if no answer changes it)
+        """
+        if not self.engine.card_database or not self.eligibility_known or not values:
+            return 0.0
+        answered = self._score_answered()
+        tables = self._tables
+        rows = self._scored_rows
+        names = [name for name in tables.COMPONENTS
+                 if name not in answered and field in tables.COMPONENT_FIELDS[name]]
+        if not names:
+            return 0.0
+
+        base = self._answered_total(answered)
+        profiles = [self.engine.compile_preferences(dict(self.preferences, **{field: value})) for value in values]
+        totals = np.repeat(base[None, :], len(profiles), axis=0)
+        for _, scores in tables.component_scores(profiles, rows, names):
+            totals += scores
+
+        outcomes = {}
+        for scores in totals:
+            top_bits = 0
+            for row in rows[self.engine._top_k(scores, rows, limit)]:
+                top_bits |= 1 << int(row)
+            outcomes[top_bits] = outcomes.get(top_bits, 0) + 1
+        if len(outcomes) == 1:
+            return 0.0
+        shares = np.array(list(outcomes.values())) / len(profiles)
+        return float(-(shares * np.log2(shares)).sum())
+
+    def status(self):
+        """
+        Describe the progress of the questionnaire.
+
+        Returns:
+            Dictionary with the answered questions, whether eligibility is known,
+            the (provisional until then) number of candidate cards and the score
+            components computed so far
+        """
+        if not self.engine.card_database:
+            return {"error": "Card database not initialized"}
+        return {
+            "answered": sorted(self.preferences),
+            "eligibility_known": self.eligibility_known,
+            "candidate_count": int(len(self._eligible())),
+            "scored_components": list(self._components) if self.eligibility_known else []
+        }
+
+    def recommend(self, user_preferences=None, limit=5, explain=True):
+        """
+        Recommend cards for the answers given so far, plus optional final answers.
+
+        Args:
+            user_preferences: Dictionary of answers given in the final step (optional)
+            limit: Maximum number of recommendations to return
+            explain: Whether to include human-readable match reasons
+
+        Returns:
+            Dictionary containing recommended cards, match scores, and match reasons
+        """
+        self.preferences = dict(self.preferences, **(user_preferences or {}))
+        if not self.eligibility_known:
+            return {"error": "Annual income and age are required before recommending cards"}
+        return super().recommend(self.preferences, limit, explain)
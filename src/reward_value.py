@@ -0,0 +1,120 @@
+"""
+Reward value model for the Credit Card Recommendation Engine.
+This file estimates the rupee value of every card for a user's monthly spend
+per category, as a card x category matrix of effective reward rates, so that
+the net annual value of all cards is one spend x rate matrix product.
+"""
+
+import numpy as np
+
+
+class RewardValueModel:
+    """
+    Effective reward rates of a card catalog, per spending category.
+
+    A card earns its headline rate (cashback percentage, or reward points per
+    ₹100 valued at POINT_VALUE) on its reward categories and everything
+    narrower, and BASE_RATE_SHARE of it on other spend. Broader categories it
+    only partly covers earn in between, following the taxonomy's partial match
+    weight. Cards without reward categories earn the headline rate everywhere.
+    """
+    # Rupee value of one reward point
+    POINT_VALUE = 0.25
+    # Share of the headline rate earned outside a card's reward categories
+    BASE_RATE_SHARE = 0.2
+    # Column for spend in categories the catalog does not know
+    OTHER_CATEGORY = "other"
+
+    def __init__(self, catalog):
+        """
+        Build the card x category rate matrix.
+
+        Args:
+            catalog: CardCatalog to value
+        """
+        self.catalog = catalog
+        self.categories = list(catalog.category_codes)
+        if self.OTHER_CATEGORY not in catalog.category_codes:
+            self.categories.append(self.OTHER_CATEGORY)
+        self.column_of = {category: column for column, category in enumerate(self.categories)}
+
+        headline = np.where(catalog.cashback_rate > 0, catalog.cashback_rate / 100,
+                            catalog.reward_rate / 100 * self.POINT_VALUE)
+        has_categories = np.array([bool(bits) for bits in catalog.category_bits], dtype=bool)
+        base = np.where(has_categories, headline * self.BASE_RATE_SHARE, headline)
+        partial = base + catalog.category_taxonomy.partial_match_weight * (headline - base)
+
+        self.rates = np.repeat(base[:, None], len(self.categories), axis=1)
+        for category, code in catalog.category_codes.items():
+            word, bit = divmod(code, 64)
+            full_match = (catalog.category_words[:, word] >> np.uint64(bit)) & np.uint64(1)
+            partial_match = (catalog.partial_category_words[:, word] >> np.uint64(bit)) & np.uint64(1)
+            column = self.column_of[category]
+            self.rates[:, column] = np.where(full_match.astype(bool), headline,
+                                             np.where(partial_match.astype(bool), partial, base))
+
+    def spend_matrix(self, profiles):
+        """
+        Arrange the monthly spend per category of several users as a matrix.
+
+        Args:
+            profiles: List of compiled user preferences
+
+        Returns:
+            NumPy array of monthly spend with shape (users, categories)
+        """
+        spend = np.zeros((len(profiles), len(self.categories)))
+        other = self.column_of[self.OTHER_CATEGORY]
+        for user, profile in enumerate(profiles):
+            for category, amount in profile.category_spend:
+                spend[user, self.column_of.get(category, other)] += amount
+        return spend
+
+    def value_breakdown(self, profiles, rows):
+        """
+        Estimate the yearly rewards, forex cost and annual fee of the given catalog rows for several users.
+
+        Forex cost is the card's markup on the international part of the spend.
+        The annual fee is waived when the yearly spend reaches the card's parsed
+        fee waiver threshold.
+
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to value
+
+        Returns:
+            Dictionary of "rewards", "forex_cost" and "annual_fee" NumPy arrays
+            in rupees, each with shape (users, rows)
+        """
+        annual_spend = self.spend_matrix(profiles) * 12
+        # The spend x rate product is accumulated one category at a time rather
+        # than with a BLAS matmul, whose rounding depends on the matrix shapes,
+        # so that a user gets the same values alone and in a batch
+        rates = self.rates[rows]
+        rewards = np.zeros((len(profiles), len(rates)))
+        for column in range(len(self.categories)):
+            rewards += annual_spend[:, column, None] * rates[None, :, column]
+        international_spend = np.array([profile.international_spend for profile in profiles]) * 12
+        waived = annual_spend.sum(axis=1)[:, None] >= self.catalog.fee_waiver_threshold[rows][None, :]
+        return {
+            "rewards": rewards,
+            "forex_cost": international_spend[:, None] * self.catalog.forex_markup[rows][None, :] / 100,
+            "annual_fee": np.where(waived, 0.0, self.catalog.annual_fee[rows][None, :])
+        }
+
+    def annual_values(self, profiles, rows):
+        """
+        Estimate the net annual value of the given catalog rows for several users.
+
+        The value is the yearly rewards minus the forex cost and the annual fee
+        (see value_breakdown).
+
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to value
+
+        Returns:
+            NumPy array of net annual values in rupees with shape (users, rows)
+        """
+        breakdown = self.value_breakdown(profiles, rows)
+        return breakdown["rewards"] - breakdown["forex_cost"] - breakdown["annual_fee"]
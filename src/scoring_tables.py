@@ -0,0 +1,412 @@
+"""
+Compiled scoring tables for the Credit Card Recommendation Engine.
+This file precomputes, for every card, the score of each component for every
+possible answer, so that scoring a request is a gather of one row per answer.
+It also derives upper bounds on card scores used to skip cards that cannot
+reach the top recommendations.
+"""
+
+import numpy as np
+
+
+class ScoringTables:
+    """
+    Component score tables over a card catalog for a fixed set of weight factors.
+
+    Each table has one row per answer value and one column per catalog row, so
+    that the score of a component for a user is the row selected by the user's
+    answer. Rows of the select-answer tables follow the values of the enums in
+    preference_profile. Spending categories are matched with the catalog's
+    category bitmasks instead, as their score depends on how many were chosen.
+
+    Cards are also grouped into clusters of similar cards (same tier and issuer
+    where possible), with the column-wise maximum of every table per cluster,
+    which bounds the score of every card of a cluster for a given profile.
+    """
+    # Lifestyle components: table name, raw category answer, catalog benefit column and weight factor
+    LIFESTYLE_BENEFITS = (
+        ("fuel", "Fuel", "fuel_surcharge_waiver", "fuel_benefits_match"),
+        ("dining", "Dining", "dining_benefits", "dining_benefits_match"),
+        ("shopping", "Shopping", "shopping_benefits", "shopping_benefits_match"),
+        ("entertainment", "Entertainment", "movie_benefits", "entertainment_benefits_match")
+    )
+    # Components whose row is chosen by a list of issuers, with the profile field holding them
+    BANK_FIELDS = {"preferred_bank": "preferred_banks", "existing_relationship": "existing_relationship"}
+    # Questionnaire answers each score component depends on
+    COMPONENT_FIELDS = {
+        "fee": ("fee_preference",),
+        "fee_waiver": ("monthly_card_spend",),
+        "reward": ("reward_preference",),
+        "spending_category": ("primary_spending_categories",),
+        "travel": ("travel_frequency",),
+        "lounge": ("lounge_access_importance",),
+        "forex": ("international_transactions",),
+        "fuel": ("primary_spending_categories",),
+        "dining": ("primary_spending_categories",),
+        "shopping": ("primary_spending_categories",),
+        "entertainment": ("primary_spending_categories",),
+        "preferred_bank": ("preferred_banks",),
+        "existing_relationship": ("existing_relationship",),
+        "card_tier": ("preferred_card_tier",),
+        "popularity": (),
+        "complementary": ("existing_cards",)
+    }
+    # Score components, in the order the per-card scoring methods of the engine add them
+    COMPONENTS = (("fee", "fee_waiver", "reward", "spending_category", "travel", "lounge", "forex")
+                  + tuple(name for name, _, _, _ in LIFESTYLE_BENEFITS)
+                  + ("preferred_bank", "existing_relationship", "card_tier", "popularity", "complementary"))
+
+    def __init__(self, catalog, weight_factors, cluster_size=256):
+        """
+        Compile the tables and the cluster bounds.
+
+        Args:
+            catalog: CardCatalog to score
+            weight_factors: Dictionary of weight factors, copied so later changes can be detected
+            cluster_size: Maximum number of cards per cluster
+        """
+        self.catalog = catalog
+        self.weight_factors = dict(weight_factors)
+        self.cluster_size = cluster_size
+        weights = self.weight_factors
+        zeros = np.zeros(catalog.size)
+
+        def flag_table(column, score):
+            return np.array([zeros, np.where(column, score, 0.0)])
+
+        tables = {}
+
+        # Fee preferences, rows following FeePreference
+        annual_fee = catalog.annual_fee
+        tables["fee"] = np.array([
+            zeros,
+            np.where(annual_fee == 0, weights["annual_fee_match"], 0.0),
+            np.where((annual_fee > 0) & (annual_fee <= 1000), weights["annual_fee_match"] * 0.8, 0.0),
+            np.where(annual_fee > 1000, weights["annual_fee_match"] * 0.9, 0.0)
+        ])
+        # Row j: annual spend reaching the j lowest distinct fee waiver thresholds
+        # (cards without a waiver have a NaN threshold and never match)
+        self.fee_waiver_thresholds = np.unique(catalog.fee_waiver_threshold[~np.isnan(catalog.fee_waiver_threshold)])
+        tables["fee_waiver"] = np.array([zeros] + [
+            np.where(catalog.fee_waiver_threshold <= threshold, weights["fee_waiver_match"], 0.0)
+            for threshold in self.fee_waiver_thresholds
+        ])
+
+        # Reward preferences, rows following RewardPreference
+        tables["reward"] = np.array([
+            zeros,
+            np.where(catalog.cashback_rate > 0, weights["reward_type_match"], 0.0),
+            np.where(catalog.reward_rate > 0, weights["reward_type_match"], 0.0),
+            np.where(catalog.has_travel_category, weights["reward_type_match"], 0.0),
+            np.where(catalog.has_discount_category, weights["reward_type_match"], 0.0),
+            zeros + weights["reward_type_match"] * 0.5
+        ])
+
+        # Travel preferences, rows following TravelFrequency and LoungeImportance
+        tables["travel"] = np.array([zeros] + [
+            np.where(catalog.travel_benefits, weights["travel_benefits_match"] * multiplier, 0.0)
+            for multiplier in (1.0, 0.7, 0.3)
+        ])
+        tables["lounge"] = np.array([
+            zeros,
+            np.where(catalog.lounge_access, weights["lounge_access_match"], 0.0),
+            np.where(catalog.lounge_access, weights["lounge_access_match"] * 0.7, 0.0),
+            zeros
+        ])
+        # Rows: no international transactions / international transactions
+        tables["forex"] = flag_table(True, np.where(
+            catalog.forex_markup <= 2.0,
+            weights["forex_markup_value"],
+            np.where(catalog.forex_markup <= 3.5, weights["forex_markup_value"] * 0.5, 0.0)))
+
+        # Lifestyle preferences, rows: category not chosen / chosen
+        for name, _, column, weight in self.LIFESTYLE_BENEFITS:
+            tables[name] = flag_table(getattr(catalog, column), weights[weight])
+
+        # Bank preferences, one row per issuer code and a last row of zeros for
+        # padding; a card has a single issuer, so summing the rows of all chosen
+        # banks gives the weight at most once
+        issuer_rows = np.arange(len(catalog.issuer_codes) + 1)[:, None] == catalog.issuer_code[None, :]
+        tables["preferred_bank"] = np.where(issuer_rows, weights["preferred_bank_match"], 0.0)
+        tables["existing_relationship"] = np.where(issuer_rows, weights["existing_relationship_match"], 0.0)
+
+        # Card tier preferences, one row per tier code and a last row of zeros for no preference
+        tier_rows = np.arange(len(catalog.tier_codes) + 1)[:, None] == catalog.tier_code[None, :]
+        tables["card_tier"] = np.where(tier_rows, weights["card_tier_match"], 0.0)
+
+        # Additional factors: popularity does not depend on the answers (single row),
+        # and the rows of the complementary table are: has cards / first card
+        popularity = catalog.popularity_score
+        tables["popularity"] = np.array([np.where(
+            popularity > 7,
+            weights["popularity_score"],
+            np.where(popularity > 5, weights["popularity_score"] * 0.7, 0.0))])
+        tables["complementary"] = flag_table(catalog.tier_code == catalog.tier_codes.get("basic", -1),
+                                             weights["complementary_to_existing_cards"])
+        self.tables = tables
+
+        # Spending categories score at most the full weight, and only for cards with categories
+        self.category_bound = np.where(
+            np.array([bool(full | partial) for full, partial in
+                      zip(catalog.category_bits, catalog.partial_category_bits)], dtype=bool),
+            weights["spending_category_match"], 0.0)
+
+        # Categories each card rewards fully or through a broader category, as 64-bit words
+        self.offered_category_words = catalog.category_words | catalog.partial_category_words
+
+        # Optimistic bound of every card over all possible answers
+        self.card_bounds = self.category_bound + sum(table.max(axis=0) for table in tables.values())
+
+        self._build_clusters()
+
+    def _build_clusters(self):
+        """
+        Group the cards into clusters and compute the per-cluster maximum of every table.
+
+        Cards are ordered by tier, issuer and decreasing bound before being cut
+        into clusters of at most cluster_size cards, so that clusters hold
+        similar cards and their bounds stay tight.
+        """
+        catalog = self.catalog
+        order = np.lexsort((catalog.id_rank, -self.card_bounds, catalog.issuer_code, catalog.tier_code))
+        starts = np.arange(0, catalog.size, self.cluster_size)
+        self.cluster_members = np.split(order, starts[1:]) if catalog.size else []
+        self.cluster_of = np.empty(catalog.size, dtype=np.int64)
+        for cluster, members in enumerate(self.cluster_members):
+            self.cluster_of[members] = cluster
+        self.cluster_tables = {
+            name: np.maximum.reduceat(table[:, order], starts, axis=1) if catalog.size else table
+            for name, table in self.tables.items()
+        }
+        self.cluster_category_bound = (np.maximum.reduceat(self.category_bound[order], starts)
+                                       if catalog.size else self.category_bound)
+        self.cluster_category_bits = [0] * len(self.cluster_members)
+        for cluster, members in enumerate(self.cluster_members):
+            for row in members:
+                self.cluster_category_bits[cluster] |= (catalog.category_bits[row]
+                                                        | catalog.partial_category_bits[row])
+
+    def _answer_rows(self, profiles):
+        """
+        Get the table row selected by each user for the single-row components.
+
+        Args:
+            profiles: List of compiled user preferences
+
+        Returns:
+            Dictionary of table name -> NumPy integer array with one row index per user
+        """
+        no_preference = len(self.catalog.tier_codes)
+        rows = {
+            "fee": [profile.fee_preference for profile in profiles],
+            "fee_waiver": np.searchsorted(self.fee_waiver_thresholds,
+                                          [profile.annual_spend for profile in profiles], side="right"),
+            "reward": [profile.reward_preference for profile in profiles],
+            "travel": [profile.travel_frequency for profile in profiles],
+            "lounge": [profile.lounge_access_importance for profile in profiles],
+            "forex": [profile.international_transactions for profile in profiles],
+            "card_tier": [
+                self.catalog.tier_codes.get(profile.preferred_tier, no_preference)
+                if profile.preferred_tier else no_preference
+                for profile in profiles
+            ],
+            "popularity": [0] * len(profiles),
+            "complementary": [not profile.existing_cards for profile in profiles]
+        }
+        for name, category, _, _ in self.LIFESTYLE_BENEFITS:
+            rows[name] = [category in profile.spending_categories for profile in profiles]
+        return {name: np.array(values, dtype=np.int64) for name, values in rows.items()}
+
+    def _issuer_codes(self, profiles, field):
+        """
+        Gather the issuer codes chosen for a bank question, padded with the zero row.
+
+        Args:
+            profiles: List of compiled user preferences
+            field: Profile field holding the chosen banks
+
+        Returns:
+            NumPy integer array of shape (users, most banks chosen)
+        """
+        padding = len(self.catalog.issuer_codes)
+        chosen = [self.catalog.codes_for(self.catalog.issuer_codes, getattr(profile, field)) for profile in profiles]
+        width = max([len(codes) for codes in chosen] + [1])
+        return np.array([codes + [padding] * (width - len(codes)) for codes in chosen], dtype=np.int64)
+
+    def answer_keys(self, profile):
+        """
+        Get, for every component, the part of a profile its scores depend on.
+
+        Two profiles with the same key for a component get the same scores for it.
+
+        Args:
+            profile: Compiled user preferences
+
+        Returns:
+            Dictionary of component name -> hashable key
+        """
+        keys = {name: int(row[0]) for name, row in self._answer_rows([profile]).items()}
+        keys["spending_category"] = (profile.category_layers, profile.category_count)
+        for name, field in self.BANK_FIELDS.items():
+            keys[name] = getattr(profile, field)
+        return keys
+
+    def component_scores(self, profiles, rows, names=None):
+        """
+        Score the given catalog rows for several users, one component at a time.
+
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to score
+            names: Components to score (defaults to all of COMPONENTS)
+
+        Yields:
+            Tuples of (component name, array of scores with shape (users, rows)), in COMPONENTS order
+        """
+        catalog = self.catalog
+        tables = self.tables
+        answer_rows = self._answer_rows(profiles)
+        columns = np.asarray(rows)[None, :]
+        names = set(self.COMPONENTS if names is None else names)
+
+        for name in self.COMPONENTS:
+            if name not in names:
+                continue
+            if name == "spending_category":
+                layer_count = max([len(profile.category_layers) for profile in profiles] + [1])
+                user_layers = np.stack([
+                    catalog.to_words(profile.category_layers + (0,) * (layer_count - len(profile.category_layers)))
+                    for profile in profiles
+                ])
+                full_matches = np.bitwise_count(
+                    user_layers[:, :, None, :] & catalog.category_words[rows][None, None, :, :]
+                ).sum(axis=(1, 3))
+                partial_matches = np.bitwise_count(
+                    user_layers[:, :, None, :] & catalog.partial_category_words[rows][None, None, :, :]
+                ).sum(axis=(1, 3))
+                matches = full_matches + catalog.category_taxonomy.partial_match_weight * partial_matches
+                category_totals = np.array([max(profile.category_count, 1) for profile in profiles])[:, None]
+                yield name, np.where(
+                    matches > 0,
+                    self.weight_factors["spending_category_match"] * (matches / category_totals),
+                    0.0)
+            elif name in self.BANK_FIELDS:
+                codes = self._issuer_codes(profiles, self.BANK_FIELDS[name])
+                yield name, tables[name][codes[:, :, None], columns[:, None, :]].sum(axis=1)
+            else:
+                yield name, tables[name][answer_rows[name][:, None], columns]
+
+    def component_range(self, name):
+        """
+        Get the lowest and highest score of every card for one component over all possible answers.
+
+        Args:
+            name: Component name
+
+        Returns:
+            Tuple of (lowest, highest) NumPy arrays with one score per catalog row
+        """
+        if name == "spending_category":
+            return np.zeros(self.catalog.size), self.category_bound
+        # Bank and tier tables include a row of zeros, and several chosen banks
+        # still score a card at most once, so the table extremes bound every answer
+        table = self.tables[name]
+        return table.min(axis=0), table.max(axis=0)
+
+    def component_gap(self, name, rows, other_rows):
+        """
+        Bound how far one component can put cards behind other cards over all possible answers.
+
+        For single-answer components both cards are scored for the same answer,
+        so the bound is exact; for the multi-select components the other card
+        may score its highest while the card scores nothing.
+
+        Args:
+            name: Component name
+            rows: Array of catalog rows
+            other_rows: Array of catalog rows to compare with
+
+        Returns:
+            NumPy array of the lowest score differences, with shape (rows, other rows)
+        """
+        if name == "spending_category":
+            return -self.category_bound[other_rows][None, :] + np.zeros((len(rows), 1))
+        if name in self.BANK_FIELDS:
+            # Cards of the same issuer always get the same bank score
+            issuer_code = self.catalog.issuer_code
+            same_issuer = issuer_code[rows][:, None] == issuer_code[other_rows][None, :]
+            return np.where(same_issuer, 0.0, -self.tables[name].max(axis=0)[other_rows][None, :])
+        table = self.tables[name]
+        return (table[:, rows][:, :, None] - table[:, other_rows][:, None, :]).min(axis=0)
+
+    def score(self, profiles, rows):
+        """
+        Score the given catalog rows for several users at once.
+
+        Components are added in the same order as the per-card scoring methods
+        of the engine so that the totals are bit-for-bit identical.
+
+        Args:
+            profiles: List of compiled user preferences
+            rows: Array of catalog row indices to score
+
+        Returns:
+            Array of total scores with shape (users, rows)
+        """
+        total = np.zeros((len(profiles), len(rows)))
+        for _, scores in self.component_scores(profiles, rows):
+            total += scores
+        return total
+
+    def cluster_bounds(self, profile):
+        """
+        Bound the score of every card of each cluster for one user.
+
+        Args:
+            profile: Compiled user preferences
+
+        Returns:
+            NumPy array with one upper bound per cluster
+        """
+        answer_rows = self._answer_rows([profile])
+        bounds = np.zeros(len(self.cluster_members))
+        for name, row in answer_rows.items():
+            bounds += self.cluster_tables[name][row[0]]
+
+        chosen_bits = profile.category_layers[0] if profile.category_layers else 0
+        bounds += np.where([bool(bits & chosen_bits) for bits in self.cluster_category_bits],
+                           self.cluster_category_bound, 0.0)
+
+        for name, field in self.BANK_FIELDS.items():
+            codes = self._issuer_codes([profile], field)[0]
+            bounds += self.cluster_tables[name][codes].max(axis=0)
+        return bounds
+
+    def profile_card_bounds(self, profile, rows):
+        """
+        Bound the score of the given cards for one user.
+
+        Every component but the spending categories is scored exactly, and a
+        card gets the full spending category weight if it rewards any chosen
+        category, so the bounds are much tighter than card_bounds, which hold
+        for every possible answer.
+
+        Args:
+            profile: Compiled user preferences
+            rows: Array of catalog row indices, cheapest to gather in increasing order
+
+        Returns:
+            NumPy array with one upper bound per row
+        """
+        bounds = np.zeros(len(rows))
+        for name, row in self._answer_rows([profile]).items():
+            bounds += self.tables[name][row[0]][rows]
+
+        chosen_words = self.catalog.to_words([profile.category_layers[0] if profile.category_layers else 0])
+        offered = np.any(self.offered_category_words[rows] & chosen_words, axis=1)
+        bounds += np.where(offered, self.category_bound[rows], 0.0)
+
+        for name, field in self.BANK_FIELDS.items():
+            for code in self._issuer_codes([profile], field)[0]:
+                bounds += self.tables[name][code][rows]
+        return bounds
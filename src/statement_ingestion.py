@@ -0,0 +1,484 @@
+"""
+Statement ingestion for the Credit Card Recommendation Engine.
+This file streams a bank statement (CSV or JSONL transactions, or a JSON
+array of them), categorizes every transaction by merchant name and MCC, and
+aggregates the spend per category in bounded memory. The aggregated spend is simulated across every
+card of the catalog and can be passed straight to the reward value ranking.
+
+Usage:
+    python -m src.statement_ingestion statement.csv [--preferences answers.json] [--limit 5]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from src.category_taxonomy import CategoryTaxonomy
+from src.credit_card_database import CreditCardDatabase
+from src.recommendation_engine import RecommendationEngine
+from src.reward_value import RewardValueModel
+
+
+# Merchant category codes, as single codes or inclusive ranges, by spending category
+MCC_CATEGORIES = {
+    "groceries": [5411, 5422, 5441, 5451, 5499],
+    "dining": [5811, 5812, 5813, 5814],
+    "fuel": [5541, 5542, 5983],
+    "airlines": [(3000, 3299), 4511],
+    "hotels": [(3501, 3999), 7011],
+    "travel": [4111, 4112, 4121, 4131, 4411, 4722, 7512],
+    "telecom": [4812, 4814, 4899],
+    "bills": [4900],
+    "insurance": [5960, 6300],
+    "entertainment": [7832, 7841, 7922, 7929, 7991, 7996],
+    "shopping": [5311, 5331, 5651, 5691, 5732, 5942, 5945, 5999],
+    "online": [5964, 5965]
+}
+
+# Merchant name keywords (one or more words) by spending category
+MERCHANT_KEYWORDS = {
+    "amazon": ["amazon", "amzn"],
+    "flipkart": ["flipkart"],
+    "food delivery": ["swiggy", "zomato"],
+    "online": ["myntra", "ajio", "nykaa", "meesho"],
+    "groceries": ["bigbasket", "dmart", "blinkit", "zepto", "more retail"],
+    "fuel": ["indian oil", "iocl", "bpcl", "hpcl", "bharat petroleum", "hindustan petroleum"],
+    "airlines": ["indigo", "air india", "vistara", "akasa air", "spicejet"],
+    "travel": ["makemytrip", "irctc", "uber", "ola cabs", "cleartrip", "redbus"],
+    "hotels": ["oyo", "taj hotels", "marriott"],
+    "telecom": ["airtel", "jio", "vodafone idea"],
+    "entertainment": ["bookmyshow", "pvr", "inox", "netflix", "spotify", "hotstar"],
+    "bills": ["bescom", "tata power", "adani electricity", "mahanagar gas"],
+    "insurance": ["lic", "policybazaar"],
+    "dining": ["starbucks", "dominos", "mcdonalds", "kfc", "restaurant", "cafe"]
+}
+
+# Column names accepted for each transaction field (lowercase)
+FIELD_ALIASES = {
+    "date": ("date", "transaction date", "txn date", "posting date"),
+    "merchant": ("merchant", "description", "narration", "details", "merchant name"),
+    "amount": ("amount", "amount (inr)", "debit", "debit amount", "inr amount"),
+    "inr_amount": ("amount (inr)", "inr amount", "billed amount", "billing amount", "amount in inr"),
+    "mcc": ("mcc", "merchant category code"),
+    "currency": ("currency", "original currency"),
+    "type": ("type", "dr/cr", "transaction type")
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y", "%Y/%m/%d")
+
+# Amounts such as "1,234.50", "₹ 999", "INR 2,500.00 Dr" or "500 Cr"
+AMOUNT_PATTERN = re.compile(r"(?:₹|inr|rs\.?)?\s*(-?[\d,]*\.?\d+)\s*(cr|dr|credit|debit)?")
+
+# Marks of transactions that are not spend (payments, refunds, reversals)
+CREDIT_MARKS = ("cr", "credit")
+
+
+class TransactionCategorizer:
+    """
+    Precompiled lookup of transactions into the engine's spending categories.
+
+    Merchant keywords are compiled into a word trie, so a merchant name is
+    matched in one scan over its words (longest keyword wins), and MCC codes
+    and ranges are expanded into a hash table. Merchant names are tried
+    first, as they are more specific than codes (e.g. Amazon vs. 5999).
+    """
+    # Maximum number of merchant names whose category is cached
+    CACHE_SIZE = 65536
+
+    def __init__(self, category_taxonomy, mcc_categories=None, merchant_keywords=None):
+        """
+        Compile the lookup tables.
+
+        Args:
+            category_taxonomy: CategoryTaxonomy used to canonicalize category names
+            mcc_categories: Category -> list of MCC codes or (low, high) ranges (defaults to MCC_CATEGORIES)
+            merchant_keywords: Category -> list of keywords (defaults to MERCHANT_KEYWORDS)
+        """
+        self.category_taxonomy = category_taxonomy
+        self.mcc_lookup = {}
+        for category, codes in (mcc_categories or MCC_CATEGORIES).items():
+            name = category_taxonomy.canonical(category)
+            for code in codes:
+                low, high = code if isinstance(code, tuple) else (code, code)
+                for value in range(low, high + 1):
+                    self.mcc_lookup[value] = name
+
+        self.merchant_trie = {}
+        for category, keywords in (merchant_keywords or MERCHANT_KEYWORDS).items():
+            name = category_taxonomy.canonical(category)
+            for keyword in keywords:
+                node = self.merchant_trie
+                for word in self._words(keyword):
+                    node = node.setdefault(word, {})
+                node[None] = name
+
+        categories = sorted(set(self.mcc_lookup.values()) | set(self._trie_categories(self.merchant_trie)))
+        self.categories = categories + [RewardValueModel.OTHER_CATEGORY]
+        self.column_of = {category: column for column, category in enumerate(self.categories)}
+        self._merchant_cache = {}
+
+    @staticmethod
+    def _words(text):
+        """Split a merchant name into lowercase alphanumeric words."""
+        return "".join(char if char.isalnum() else " " for char in text.lower()).split()
+
+    def _trie_categories(self, node):
+        """Yield the categories stored in a trie."""
+        for key, child in node.items():
+            if key is None:
+                yield child
+            else:
+                yield from self._trie_categories(child)
+
+    def merchant_category(self, merchant):
+        """
+        Match a merchant name against the keyword trie.
+
+        Args:
+            merchant: Merchant name or transaction description
+
+        Returns:
+            Canonical category name, or None if no keyword matches
+        """
+        cached = self._merchant_cache.get(merchant, False)
+        if cached is not False:
+            return cached
+
+        words = self._words(merchant)
+        category = None
+        longest = 0
+        for start in range(len(words)):
+            node = self.merchant_trie
+            for end in range(start, len(words)):
+                node = node.get(words[end])
+                if node is None:
+                    break
+                if None in node and end - start + 1 > longest:
+                    category, longest = node[None], end - start + 1
+
+        if len(self._merchant_cache) >= self.CACHE_SIZE:
+            self._merchant_cache.clear()
+        self._merchant_cache[merchant] = category
+        return category
+
+    def categorize(self, merchant="", mcc=None):
+        """
+        Categorize one transaction.
+
+        Args:
+            merchant: Merchant name or transaction description
+            mcc: Merchant category code (optional)
+
+        Returns:
+            Canonical category name, the other spend category if neither the merchant nor the code is known
+        """
+        category = self.merchant_category(merchant) if merchant else None
+        if category is None and mcc not in (None, ""):
+            try:
+                category = self.mcc_lookup.get(int(mcc))
+            except (TypeError, ValueError):
+                category = None
+        return category or RewardValueModel.OTHER_CATEGORY
+
+
+def read_transactions(stream, file_format="csv"):
+    """
+    Read transactions one at a time from a text stream.
+
+    Args:
+        stream: Text stream of a CSV file with a header row, of JSON objects one per line,
+            or of a JSON array of objects
+        file_format: "csv", "jsonl" or "json"
+
+    Yields:
+        Dictionaries of transaction fields with lowercase keys
+
+    Raises:
+        ValueError: If a JSON statement is not an array of objects
+    """
+    if file_format == "json":
+        transactions = json.load(stream)
+        if not isinstance(transactions, list):
+            raise ValueError("A JSON statement must be an array of transactions")
+        for transaction in transactions:
+            if not isinstance(transaction, dict):
+                raise ValueError("Each transaction of a JSON statement must be an object")
+            yield {key.strip().lower(): value for key, value in transaction.items()}
+    elif file_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield {key.strip().lower(): value for key, value in json.loads(line).items()}
+    else:
+        for row in csv.DictReader(stream):
+            yield {(key or "").strip().lower(): value for key, value in row.items()}
+
+
+def parse_transaction_amount(value):
+    """
+    Parse a statement amount such as "1,234.50", "₹ 999" or "2,500.00 Dr".
+
+    Args:
+        value: Amount as a number or text
+
+    Returns:
+        Tuple of (amount, is credit); amount is None if the value is not a number
+    """
+    if isinstance(value, (int, float)):
+        return float(value), value < 0
+    match = AMOUNT_PATTERN.fullmatch(str(value or "").strip().lower())
+    if match is None:
+        return None, False
+    amount = float(match.group(1).replace(",", ""))
+    return amount, amount < 0 or match.group(2) in CREDIT_MARKS
+
+
+@lru_cache(maxsize=4096)
+def parse_month(value):
+    """
+    Get the (year, month) of a statement date.
+
+    Args:
+        value: Date text in one of DATE_FORMATS, optionally followed by a time
+
+    Returns:
+        Tuple of (year, month), or None if the date is not recognized
+    """
+    text = str(value or "").strip()
+    for candidate in (text, text[:10], text[:11]):
+        for date_format in DATE_FORMATS:
+            try:
+                date = datetime.strptime(candidate, date_format)
+            except ValueError:
+                continue
+            return date.year, date.month
+    return None
+
+
+class StatementAggregator:
+    """
+    Running totals of a statement's spend per category.
+
+    Transactions are categorized as they stream in and buffered in fixed-size
+    chunks of category columns and amounts, which are summed with bincount
+    when full. Memory is bounded by the chunk size, the categorizer's cache
+    and the number of distinct months, whatever the statement length.
+    """
+    def __init__(self, categorizer, chunk_size=65536):
+        """
+        Start empty totals.
+
+        Args:
+            categorizer: TransactionCategorizer
+            chunk_size: Number of transactions summed at a time
+        """
+        self.categorizer = categorizer
+        self.chunk_size = chunk_size
+        self.totals = np.zeros(len(categorizer.categories))
+        self.international_total = 0.0
+        self.transaction_count = 0
+        self.skipped_count = 0
+        self.unconverted_count = 0
+        self.months = set()
+        self._columns = np.zeros(chunk_size, dtype=np.int64)
+        self._amounts = np.zeros(chunk_size)
+        self._international = np.zeros(chunk_size, dtype=bool)
+        self._buffered = 0
+
+    def _field(self, transaction, field):
+        """Get a transaction field under any of its accepted column names."""
+        for name in FIELD_ALIASES[field]:
+            if name in transaction and transaction[name] not in (None, ""):
+                return transaction[name]
+        return None
+
+    def add(self, transaction):
+        """
+        Add one transaction; payments, refunds and unreadable amounts are skipped.
+
+        Foreign-currency transactions are summed at their billed amount in
+        rupees; those without one are counted as unconverted and skipped, as
+        their amount is not in rupees.
+
+        Args:
+            transaction: Dictionary of transaction fields with lowercase keys
+        """
+        currency = str(self._field(transaction, "currency") or "INR").strip().upper()
+        international = currency not in ("INR", "₹")
+        if international:
+            billed_amount = self._field(transaction, "inr_amount")
+            if billed_amount is None:
+                self.unconverted_count += 1
+                return
+            amount, is_credit = parse_transaction_amount(billed_amount)
+        else:
+            amount, is_credit = parse_transaction_amount(self._field(transaction, "amount"))
+        transaction_type = str(self._field(transaction, "type") or "").strip().lower()
+        if amount is None or is_credit or amount == 0 or transaction_type in CREDIT_MARKS:
+            self.skipped_count += 1
+            return
+
+        category = self.categorizer.categorize(self._field(transaction, "merchant") or "",
+                                               self._field(transaction, "mcc"))
+        month = parse_month(self._field(transaction, "date"))
+        if month is not None:
+            self.months.add(month)
+
+        position = self._buffered
+        self._columns[position] = self.categorizer.column_of[category]
+        self._amounts[position] = amount
+        self._international[position] = international
+        self._buffered += 1
+        self.transaction_count += 1
+        if self._buffered == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        """Sum the buffered transactions into the totals."""
+        count = self._buffered
+        self.totals += np.bincount(self._columns[:count], weights=self._amounts[:count],
+                                   minlength=len(self.totals))
+        self.international_total += float(self._amounts[:count][self._international[:count]].sum())
+        self._buffered = 0
+
+    def consume(self, transactions):
+        """
+        Add every transaction of an iterable.
+
+        Args:
+            transactions: Iterable of transaction dictionaries
+
+        Returns:
+            This aggregator, with all transactions summed
+        """
+        for transaction in transactions:
+            self.add(transaction)
+        self._flush()
+        return self
+
+    @property
+    def month_count(self):
+        """Number of distinct months in the statement (at least 1)."""
+        return max(len(self.months), 1)
+
+    def monthly_category_spend(self):
+        """
+        Get the average monthly spend per category.
+
+        Returns:
+            Dictionary of canonical category -> monthly amount in rupees
+        """
+        return {category: round(float(total) / self.month_count, 2)
+                for category, total in zip(self.categorizer.categories, self.totals) if total > 0}
+
+    def preferences(self):
+        """
+        Express the statement as answers for the recommendation engine.
+
+        Returns:
+            Dictionary with monthly_category_spend, monthly_international_spend
+            and international_transactions
+        """
+        return {
+            "monthly_category_spend": self.monthly_category_spend(),
+            "monthly_international_spend": round(self.international_total / self.month_count, 2),
+            "international_transactions": self.international_total > 0
+        }
+
+    def summary(self):
+        """
+        Describe the statement.
+
+        Returns:
+            Dictionary with the transaction counts, the months covered and the monthly spend;
+            "unconverted" counts foreign-currency transactions left out for lack of a rupee amount
+        """
+        return dict(self.preferences(),
+                    transactions=self.transaction_count,
+                    skipped=self.skipped_count,
+                    unconverted=self.unconverted_count,
+                    months=self.month_count)
+
+
+def simulate_cards(engine, user_preferences, rows=None):
+    """
+    Simulate the yearly rewards, forex cost and fee of catalog cards for a spend profile.
+
+    Args:
+        engine: RecommendationEngine with a card database
+        user_preferences: Answers including the statement's spend (see StatementAggregator.preferences)
+        rows: Catalog rows to simulate (defaults to every card)
+
+    Returns:
+        List of dictionaries per card, best net annual value first (ties on card_id)
+    """
+    profile = engine.compile_preferences(user_preferences)
+    rows = np.arange(engine.catalog.size) if rows is None else np.asarray(rows)
+    breakdown = engine.compile_reward_values().value_breakdown([profile], rows)
+    net_values = breakdown["rewards"][0] - breakdown["forex_cost"][0] - breakdown["annual_fee"][0]
+    order = np.lexsort((engine.catalog.id_rank[rows], -net_values))
+    return [{
+        "card_id": engine.catalog.card_ids[rows[position]],
+        "annual_rewards": round(float(breakdown["rewards"][0, position]), 2),
+        "annual_forex_cost": round(float(breakdown["forex_cost"][0, position]), 2),
+        "annual_fee": float(breakdown["annual_fee"][0, position]),
+        "net_annual_value": round(float(net_values[position]), 2)
+    } for position in order]
+
+
+def detect_format(file_name):
+    """Guess the statement format from a file name: "jsonl" for .jsonl/.ndjson, "json" for .json, else "csv"."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "json" if extension == ".json" else "csv"
+
+
+def main(argv=None):
+    """
+    Ingest a statement file and print the spend summary, card simulation and recommendations as JSON.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Simulate credit card rewards on a bank statement.")
+    parser.add_argument("statement", help="CSV, JSONL or JSON file of transactions, - for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl", "json"), help="Statement format (default: from the file name)")
+    parser.add_argument("--preferences", help="JSON file of questionnaire answers, to recommend eligible cards")
+    parser.add_argument("--limit", type=int, default=5, help="Number of cards to show")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                     "data", "credit_cards.json"),
+                        help="Card database file")
+    args = parser.parse_args(argv)
+
+    category_taxonomy = CategoryTaxonomy()
+    card_db = CreditCardDatabase(args.db, category_taxonomy)
+    engine = RecommendationEngine(card_db.get_all_cards(), vectorized=True, category_taxonomy=category_taxonomy)
+    aggregator = StatementAggregator(TransactionCategorizer(category_taxonomy))
+
+    file_format = args.format or detect_format(args.statement)
+    if args.statement == "-":
+        aggregator.consume(read_transactions(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig"), file_format))
+    else:
+        with open(args.statement, "r", encoding="utf-8-sig", newline="") as f:
+            aggregator.consume(read_transactions(f, file_format))
+
+    output = {"summary": aggregator.summary(),
+              "cards": simulate_cards(engine, aggregator.preferences())[:args.limit]}
+    if args.preferences:
+        with open(args.preferences, "r") as f:
+            preferences = dict(json.load(f), **aggregator.preferences())
+        output["recommendations"] = engine.recommend_cards(preferences, args.limit, ranking="reward_value")
+    json.dump(output, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
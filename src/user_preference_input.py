@@ -7,11 +7,13 @@ class UserPreferenceInput:
     """
     Class to handle user preference input collection and validation.
     """
-    def __init__(self):
+    def __init__(self, adaptive=False):
         # Define the questions to ask users
         self.questions = self._define_questions()
         # Define validation rules for inputs
         self.validation_rules = self._define_validation_rules()
+        # Whether next_question picks the most informative question instead of the next one
+        self.adaptive = adaptive
         
     def _define_questions(self):
         """
@@ -215,6 +217,57 @@ class UserPreferenceInput:
         """
         return self.questions.get(field_id, {})
 
+    def get_answer_values(self, field_id):
+        """
+        Get the possible answers to a question, one selected option at a time for multi-select questions.
+        Returns a list of answer values (empty for number questions).
+        """
+        details = self.questions.get(field_id, {})
+        if details.get("type") == "boolean":
+            return [True, False]
+        if details.get("type") == "multi_select":
+            return [[]] + [[option] for option in details["options"]]
+        return list(details.get("options", []))
+    
+    def next_question(self, answers, session=None, limit=5):
+        """
+        Choose the next question to ask.
+        
+        In the fixed mode, or without a questionnaire session, this is the first
+        unanswered question. In the adaptive mode, questions that only affect
+        eligibility are asked first in their fixed order; after that, the
+        unanswered question whose answers split the provisional top-k of the
+        session's candidate cards most (highest entropy) is asked, ties going
+        to the earlier question.
+        
+        Args:
+            answers: Dictionary of the answers given so far
+            session: QuestionnaireSession holding the candidate cards (optional)
+            limit: Number of recommendations
+            
+        Returns:
+            Dictionary with the next question ID (None when all questions are answered)
+            and whether the top-k cards can no longer change, so the flow may stop early
+        """
+        unanswered = [field_id for field_id in self.questions if field_id not in answers]
+        if not self.adaptive or session is None or not session.engine.card_database:
+            return {"next_question": unanswered[0] if unanswered else None, "top_k_stable": False}
+        
+        top_k_stable = session.top_k_stable(limit)
+        tables = session.engine.compile_scoring_tables()
+        scoring_fields = {field for fields in tables.COMPONENT_FIELDS.values() for field in fields}
+        eligibility_questions = [field_id for field_id in unanswered if field_id not in scoring_fields]
+        if eligibility_questions or not session.eligibility_known or not unanswered:
+            next_question = (eligibility_questions or unanswered or [None])[0]
+            return {"next_question": next_question, "top_k_stable": top_k_stable}
+        
+        best_question, best_entropy = unanswered[0], -1.0
+        for field_id in unanswered:
+            entropy = session.split_entropy(field_id, self.get_answer_values(field_id), limit)
+            if entropy > best_entropy:
+                best_question, best_entropy = field_id, entropy
+        return {"next_question": best_question, "top_k_stable": top_k_stable}
+
 
 # Example of how to use the UserPreferenceInput class
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""
+Test script for benefit condition parsing.
+This file tests amount parsing, parsed catalog thresholds and fee waiver scoring against them.
+"""
+
+import sys
+import os
+import math
+import unittest
+
+import numpy as np
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the parser, recommendation engine and database
+from src.benefit_terms import parse_amount, parse_benefit_terms
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestBenefitTerms(unittest.TestCase):
+    """
+    Test cases for benefit condition parsing.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+    
+    def test_parse_amount(self):
+        """
+        Test Indian digit grouping, lakh and crore amounts.
+        """
+        self.assertEqual(parse_amount("₹3,00,000"), 300000)
+        self.assertEqual(parse_amount("₹12,00,000 in a year"), 1200000)
+        self.assertEqual(parse_amount("Rs. 1.5 lakh"), 150000)
+        self.assertEqual(parse_amount("3.5 Lakhs"), 350000)
+        self.assertEqual(parse_amount("₹2L"), 200000)
+        self.assertEqual(parse_amount("2 crore"), 20000000)
+        self.assertEqual(parse_amount("10K"), 10000)
+        self.assertIsNone(parse_amount("on card activation"))
+    
+    def test_parse_benefit_terms(self):
+        """
+        Test that spend thresholds, periods and bonuses are extracted from condition text.
+        """
+        terms = parse_benefit_terms("10,000 reward points on spending ₹1,00,000 in the first 90 days")
+        self.assertEqual((terms.spend_threshold, terms.period_days, terms.bonus, terms.bonus_in_rupees),
+                         (100000, 90, 10000, False))
+        
+        terms = parse_benefit_terms("₹500 cashback on spending ₹5,000 in the first 30 days")
+        self.assertEqual((terms.spend_threshold, terms.bonus, terms.bonus_in_rupees), (5000, 500, True))
+        
+        terms = parse_benefit_terms("Renewal fee waived on annual spends above Rs. 2 lakh")
+        self.assertEqual((terms.spend_threshold, terms.period_days), (200000, 365))
+        self.assertTrue(math.isnan(terms.bonus))
+        
+        terms = parse_benefit_terms("2,000 reward points on card activation")
+        self.assertTrue(math.isnan(terms.spend_threshold))
+        self.assertEqual(terms.bonus, 2000)
+        self.assertTrue(all(math.isnan(value) for value in parse_benefit_terms("")[:3]))
+    
+    def test_catalog_thresholds(self):
+        """
+        Test that the catalog holds the parsed thresholds of every card.
+        """
+        catalog = self.recommendation_engine.catalog
+        for row, card in enumerate(self.card_db.get_all_cards()):
+            condition = card["fee_waiver_condition"]
+            if "Lifetime free" in condition:
+                self.assertEqual(catalog.fee_waiver_threshold[row], 0)
+            else:
+                self.assertEqual(catalog.fee_waiver_threshold[row],
+                                 parse_amount(condition.split("spending")[1]))
+            if card["milestone_benefits"]:
+                self.assertEqual(catalog.milestone_spend_threshold[row],
+                                 parse_amount(card["milestone_benefits"].split("spending")[1]))
+            else:
+                self.assertTrue(np.isnan(catalog.milestone_spend_threshold[row]))
+            if "activation" in card["welcome_benefits"]:
+                self.assertEqual(catalog.welcome_spend_threshold[row], 0)
+        
+        no_waiver = RecommendationEngine([dict(self.card_db.get_all_cards()[0], fee_waiver_condition="")])
+        self.assertTrue(np.isnan(no_waiver.catalog.fee_waiver_threshold[0]))
+        unstated = RecommendationEngine([dict(self.card_db.get_all_cards()[0], fee_waiver_condition="Waived on request")])
+        self.assertEqual(unstated.catalog.fee_waiver_threshold[0], unstated.catalog.DEFAULT_FEE_WAIVER_THRESHOLD)
+    
+    def test_fee_waiver_uses_card_threshold(self):
+        """
+        Test that the fee waiver bonus depends on each card's own threshold.
+        """
+        preferences = {"annual_income": 3000000, "age": 35, "monthly_card_spend": "₹10,000 - ₹25,000"}
+        profile = self.recommendation_engine.compile_preferences(preferences)
+        self.assertEqual(profile.annual_spend, 210000)
+        
+        for card in self.card_db.get_all_cards():
+            scores = self.recommendation_engine._score_card(card, profile)["scores"]
+            threshold = self.recommendation_engine.catalog.fee_waiver_threshold[
+                self.recommendation_engine.catalog.row_of[card["card_id"]]]
+            self.assertEqual("fee_waiver" in scores, threshold <= 210000, card["card_id"])
+        
+        vectorized_engine = RecommendationEngine(self.card_db.get_all_cards(), vectorized=True)
+        for spend in ["Less than ₹10,000", "₹25,000 - ₹50,000", "More than ₹1,00,000"]:
+            preferences = dict(preferences, monthly_card_spend=spend)
+            self.assertEqual(vectorized_engine.recommend_cards(preferences, 16),
+                             self.recommendation_engine.recommend_cards(preferences, 16))
+
+if __name__ == "__main__":
+    unittest.main()
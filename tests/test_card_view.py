@@ -0,0 +1,75 @@
+"""
+Test script for the read-only card views.
+This file tests that per-request overlays never modify the shared catalog cards.
+"""
+
+import sys
+import os
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the card view
+from src.card_view import CardView
+
+class TestCardView(unittest.TestCase):
+    """
+    Test cases for the read-only card views.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        self.card = {"card_id": "hdfc_millenia", "card_name": "HDFC Millennia Credit Card", "annual_fee": 1000}
+    
+    def test_overlay_does_not_touch_card(self):
+        """
+        Test that overlay fields are visible in the view but not in the catalog card.
+        """
+        view = CardView(self.card, match_score=12.5, match_reasons=("No annual fee",))
+        self.assertEqual(view["match_score"], 12.5)
+        self.assertEqual(view["annual_fee"], 1000)
+        self.assertEqual(len(view), 5)
+        self.assertEqual(list(view), ["card_id", "card_name", "annual_fee", "match_score", "match_reasons"])
+        self.assertNotIn("match_score", self.card)
+        self.assertEqual(view.to_dict(), dict(self.card, match_score=12.5, match_reasons=("No annual fee",)))
+    
+    def test_view_is_read_only(self):
+        """
+        Test that views cannot be modified and with_overlay copies only the overlay.
+        """
+        view = CardView(self.card, match_score=1.0)
+        with self.assertRaises(TypeError):
+            view["match_score"] = 2.0
+        with self.assertRaises(AttributeError):
+            view.extra = True
+        
+        updated = view.with_overlay(match_score=2.0, annual_fee=0)
+        self.assertEqual((updated["match_score"], updated["annual_fee"]), (2.0, 0))
+        self.assertEqual((view["match_score"], view["annual_fee"]), (1.0, 1000))
+        self.assertEqual(self.card["annual_fee"], 1000)
+    
+    def test_nested_fields_are_read_only(self):
+        """
+        Test that nested lists and dictionaries of the card cannot be modified through the view.
+        """
+        card = dict(self.card, reward_categories=["dining", "travel"],
+                    eligibility={"min_income": 300000, "employment": ["Salaried"]})
+        view = CardView(card)
+        self.assertEqual(view["reward_categories"], ("dining", "travel"))
+        with self.assertRaises(AttributeError):
+            view["reward_categories"].append("fuel")
+        with self.assertRaises(TypeError):
+            view["eligibility"]["min_income"] = 0
+        self.assertEqual(view["eligibility"]["employment"], ("Salaried",))
+        
+        serialized = view.to_dict()
+        serialized["reward_categories"].append("fuel")
+        serialized["eligibility"]["employment"].append("Student")
+        self.assertEqual(card["reward_categories"], ["dining", "travel"])
+        self.assertEqual(card["eligibility"]["employment"], ["Salaried"])
+
+if __name__ == "__main__":
+    unittest.main()
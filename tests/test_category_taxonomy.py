@@ -0,0 +1,98 @@
+"""
+Test script for the spending category taxonomy.
+This file tests alias resolution, the precomputed closure and hierarchical category matching.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the taxonomy, recommendation engine and database
+from src.category_taxonomy import CategoryTaxonomy
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestCategoryTaxonomy(unittest.TestCase):
+    """
+    Test cases for the spending category taxonomy.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.taxonomy = CategoryTaxonomy()
+    
+    def test_aliases_and_closure(self):
+        """
+        Test that aliases resolve and ancestors include every broader category.
+        """
+        self.assertEqual(self.taxonomy.canonical("Online Shopping"), "shopping")
+        self.assertEqual(self.taxonomy.canonical("Utility"), "bills")
+        self.assertEqual(self.taxonomy.canonical("Airline"), "airlines")
+        self.assertEqual(self.taxonomy.canonical("Telecom"), "telecom")
+        self.assertEqual(self.taxonomy.canonical("Pets"), "pets")
+        
+        self.assertEqual(sorted(self.taxonomy.ancestors("amazon")), ["amazon", "online", "shopping"])
+        self.assertEqual(sorted(self.taxonomy.ancestors("food delivery")),
+                         ["dining", "food delivery", "online", "shopping"])
+        self.assertEqual(self.taxonomy.ancestors("pets"), ["pets"])
+        descendants = self.taxonomy.descendant_bits("travel")
+        for category in ["travel", "airlines", "hotels"]:
+            self.assertTrue((descendants >> self.taxonomy.codes[category]) & 1)
+        self.assertFalse((descendants >> self.taxonomy.codes["fuel"]) & 1)
+    
+    def test_invalid_taxonomy(self):
+        """
+        Test that unknown parents, ambiguous aliases and cycles are rejected.
+        """
+        with self.assertRaises(ValueError):
+            CategoryTaxonomy({"categories": {"a": {"parents": ["b"]}}})
+        with self.assertRaises(ValueError):
+            CategoryTaxonomy({"categories": {"a": {"aliases": ["x"]}, "b": {"aliases": ["x"]}}})
+        with self.assertRaises(ValueError):
+            CategoryTaxonomy({"categories": {"a": {"parents": ["b"]}, "b": {"parents": ["a"]}}})
+    
+    def test_from_file(self):
+        """
+        Test loading a taxonomy from a JSON file.
+        """
+        definition = {"partial_match_weight": 0.25,
+                      "categories": {"travel": {}, "rail": {"parents": ["travel"], "aliases": ["trains"]}}}
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "taxonomy.json")
+            with open(file_path, 'w') as f:
+                json.dump(definition, f)
+            taxonomy = CategoryTaxonomy.from_file(file_path)
+        self.assertEqual(taxonomy.partial_match_weight, 0.25)
+        self.assertEqual(taxonomy.ancestors("Trains"), ["travel", "rail"])
+    
+    def test_hierarchical_matching(self):
+        """
+        Test that a card rewarding a narrower category partly matches the broader answer.
+        """
+        airline_card = dict(self.card_db.get_card_by_id("hdfc_millenia"), card_id="airline_card",
+                            reward_categories=["airlines"])
+        self.card_db.add_card(airline_card)
+        self.assertIn(airline_card, self.card_db.get_cards_for_category("Travel"))
+        self.assertNotIn(airline_card, self.card_db.get_cards_for_category("Hotels"))
+        
+        preferences = {"annual_income": 1000000, "age": 30, "primary_spending_categories": ["Travel"]}
+        engine = RecommendationEngine(self.card_db.get_all_cards())
+        score = engine._score_card(airline_card, engine.compile_preferences(preferences))
+        self.assertEqual(score["scores"]["spending_category"], engine.weight_factors["spending_category_match"] * 0.5)
+        
+        # A card rewarding the broader category fully covers a narrower answer
+        score = engine._score_card(self.card_db.get_card_by_id("hdfc_regalia"),
+                                   engine.compile_preferences({"primary_spending_categories": ["Airlines"]}))
+        self.assertEqual(score["scores"]["spending_category"], engine.weight_factors["spending_category_match"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test script for the cost projector.
+This file tests multi-year cost projections across cards and scenarios and the total cost ranking mode.
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the cost projector, recommendation engine and database
+from src.cost_projection import PaymentBehaviour, parse_behaviour
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestCostProjection(unittest.TestCase):
+    """
+    Test cases for the cost projector.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+    
+    def expected_cost(self, card, behaviour, years):
+        """
+        Project one card's cost year by year and month by month.
+        """
+        catalog = self.recommendation_engine.catalog
+        threshold = catalog.fee_waiver_threshold[catalog.row_of[card["card_id"]]]
+        apr = card["interest_rate"] / 100
+        cost = 0.0
+        for year in range(years):
+            if year == 0:
+                cost += card["joining_fee"]
+            elif behaviour.monthly_spend * 12 < threshold:
+                cost += card["renewal_fee"]
+            for _ in range(12):
+                cost += behaviour.revolving_share * behaviour.monthly_spend * apr / 12
+                if behaviour.revolving_share > 0:
+                    cost += behaviour.monthly_spend * apr / 365 * card["interest_free_period"] / 2
+            cost += behaviour.late_payments_per_year * (card["late_payment_fee"] + behaviour.monthly_spend * apr / 12)
+            cost += behaviour.cash_advance_per_year * (card["cash_advance_fee"] / 100 + apr / 12)
+        return cost
+    
+    def test_parse_behaviour(self):
+        """
+        Test that payment behaviours are read with defaults and clipped.
+        """
+        self.assertEqual(parse_behaviour({}, 20000), PaymentBehaviour(20000, 0, 0, 0))
+        self.assertEqual(parse_behaviour({"monthly_spend": 5000, "revolving_share": 1.5, "late_payments_per_year": -1}),
+                         PaymentBehaviour(5000, 1, 0, 0))
+    
+    def test_projection_matches_per_card_computation(self):
+        """
+        Test the vectorized projection of many scenarios against a per-card computation.
+        """
+        rng = random.Random(4)
+        behaviours = [PaymentBehaviour(rng.choice([0, 5000, 30000, 150000]), rng.choice([0, 0.2, 1.0]),
+                                       rng.choice([0, 1, 3]), rng.choice([0, 10000]))
+                      for _ in range(30)]
+        years = [rng.randint(1, 5) for _ in behaviours]
+        cards = self.card_db.get_all_cards()
+        costs = self.recommendation_engine.compile_cost_projector().project(behaviours, list(range(len(cards))), years)
+        
+        for scenario, behaviour in enumerate(behaviours):
+            for row, card in enumerate(cards):
+                self.assertAlmostEqual(costs["total"][scenario, row],
+                                       self.expected_cost(card, behaviour, years[scenario]), places=6)
+                self.assertAlmostEqual(costs["total"][scenario, row],
+                                       sum(costs[name][scenario, row]
+                                           for name in ("fees", "interest", "late_fees", "cash_advance")))
+        
+        single_year = self.recommendation_engine.compile_cost_projector().project(behaviours[:1], [0], 0)
+        self.assertEqual(single_year["fees"][0, 0], cards[0]["joining_fee"])
+    
+    def test_total_cost_ranking(self):
+        """
+        Test that the total cost ranking lists the cheapest eligible cards first, alone and in batches.
+        """
+        preferences = {"annual_income": 3000000, "age": 35, "monthly_card_spend": "₹25,000 - ₹50,000",
+                       "revolving_share": 0.25, "late_payments_per_year": 1, "projection_years": 4}
+        result = self.recommendation_engine.recommend_cards(preferences, 16, ranking="total_cost")
+        profile = self.recommendation_engine.compile_preferences(preferences)
+        self.assertEqual(profile.payment_behaviour, PaymentBehaviour(37500, 0.25, 1, 0))
+        
+        expected = sorted(self.recommendation_engine._filter_eligible_cards(profile),
+                          key=lambda card: (self.expected_cost(card, profile.payment_behaviour, 4), card["card_id"]))
+        self.assertEqual(result["recommended_cards"], [card["card_id"] for card in expected])
+        cheapest = expected[0]
+        self.assertAlmostEqual(result["match_scores"][cheapest["card_id"]],
+                               self.expected_cost(cheapest, profile.payment_behaviour, 4))
+        self.assertTrue(result["match_reasons"][cheapest["card_id"]][0].startswith("Projected cost of ownership"))
+        
+        batch = [dict(preferences, revolving_share=share, projection_years=years)
+                 for share, years in ((0, 1), (0.5, 2), (1.0, 5))]
+        self.assertEqual(list(self.recommendation_engine.recommend_batch(batch, ranking="total_cost")),
+                         [self.recommendation_engine.recommend_cards(user_preferences, ranking="total_cost")
+                          for user_preferences in batch])
+
+if __name__ == "__main__":
+    unittest.main()
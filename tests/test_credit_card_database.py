@@ -0,0 +1,182 @@
+"""
+Test script for the Credit Card Database.
+This file tests the lookup and mutation methods of the card database.
+"""
+
+import sys
+import os
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the database
+from src.credit_card_database import CreditCardDatabase
+
+def offers_category(card, category, taxonomy):
+    """
+    Reference check that a card rewards a category or a narrower one, walking the taxonomy.
+    """
+    target = taxonomy.canonical(category)
+    pending = [taxonomy.canonical(cat) for cat in card["reward_categories"]]
+    while pending:
+        name = pending.pop()
+        if name == target:
+            return True
+        pending.extend(taxonomy.parents.get(name, ()))
+    return False
+
+class TestCreditCardDatabase(unittest.TestCase):
+    """
+    Test cases for the Credit Card Database.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+    
+    def test_get_card_by_id(self):
+        """
+        Test looking up cards by ID.
+        """
+        for card in self.card_db.get_all_cards():
+            self.assertIs(self.card_db.get_card_by_id(card["card_id"]), card)
+        self.assertIsNone(self.card_db.get_card_by_id("unknown_card"))
+    
+    def test_get_cards_by_ids(self):
+        """
+        Test bulk lookup keeps the requested order and skips unknown IDs.
+        """
+        cards = self.card_db.get_cards_by_ids(["sbi_prime", "unknown_card", "hdfc_regalia"])
+        self.assertEqual([card["card_id"] for card in cards], ["sbi_prime", "hdfc_regalia"])
+    
+    def test_mutations_keep_index_in_sync(self):
+        """
+        Test that adding, updating and removing cards keeps lookups consistent.
+        """
+        new_card = dict(self.card_db.get_card_by_id("kotak_811"), card_id="kotak_811_variant")
+        self.assertTrue(self.card_db.add_card(new_card))
+        self.assertFalse(self.card_db.add_card(new_card))
+        self.assertIs(self.card_db.get_card_by_id("kotak_811_variant"), new_card)
+        
+        self.assertTrue(self.card_db.update_card("kotak_811_variant", {"card_id": "kotak_811_plus"}))
+        self.assertIsNone(self.card_db.get_card_by_id("kotak_811_variant"))
+        self.assertIs(self.card_db.get_card_by_id("kotak_811_plus"), new_card)
+        self.assertFalse(self.card_db.update_card("kotak_811_plus", {"card_id": "hdfc_regalia"}))
+        
+        self.assertTrue(self.card_db.remove_card("kotak_811_plus"))
+        self.assertFalse(self.card_db.remove_card("kotak_811_plus"))
+        self.assertIsNone(self.card_db.get_card_by_id("kotak_811_plus"))
+        self.assertNotIn(new_card, self.card_db.get_all_cards())
+    
+    def test_invalid_card_leaves_database_unchanged(self):
+        """
+        Test that adding a card missing a required field or with a bad fee raises and changes nothing.
+        """
+        cards = list(self.card_db.get_all_cards())
+        lounge_cards = self.card_db.get_cards_with_lounge_access()
+        base = self.card_db.get_card_by_id("hdfc_regalia")
+        missing = {key: value for key, value in base.items() if key != "reward_categories"}
+        for card in (dict(missing, card_id="broken_missing"), dict(base, card_id="broken_fee", annual_fee="high")):
+            with self.assertRaises((KeyError, TypeError)):
+                self.card_db.add_card(card)
+            self.assertIsNone(self.card_db.get_card_by_id(card["card_id"]))
+        
+        self.assertEqual(self.card_db.get_all_cards(), cards)
+        self.assertEqual(self.card_db.version, 0)
+        self.assertEqual(self.card_db.get_cards_with_lounge_access(), lounge_cards)
+        self.assertEqual(list(self.card_db.query(lounge_access=True, annual_fee=(None, 5000))),
+                         [card for card in cards if card["lounge_access"] and card["annual_fee"] <= 5000])
+    
+    def test_secondary_indexes_match_full_scan(self):
+        """
+        Test that the indexed get_cards_* methods return the same cards as a full scan.
+        """
+        self.card_db.add_card(dict(self.card_db.get_card_by_id("icici_amazon_pay"), card_id="icici_amazon_pay_2"))
+        self.card_db.update_card("sbi_prime", {"issuer": "HDFC Bank", "reward_categories": ["Fuel"]})
+        cards = self.card_db.get_all_cards()
+        
+        for issuer in ["HDFC Bank", "SBI Card", "Unknown Bank"]:
+            self.assertEqual(self.card_db.get_cards_by_issuer(issuer),
+                             [card for card in cards if card["issuer"] == issuer])
+        for card_type in ["rewards", "cashback"]:
+            self.assertEqual(self.card_db.get_cards_by_type(card_type),
+                             [card for card in cards if card["card_type"] == card_type])
+        for tier in ["Classic", "Premium"]:
+            self.assertEqual(self.card_db.get_cards_by_tier(tier),
+                             [card for card in cards if card["card_tier"] == tier])
+        self.assertEqual(self.card_db.get_cards_with_lounge_access(),
+                         [card for card in cards if card["lounge_access"]])
+        self.assertEqual(self.card_db.get_cards_with_no_annual_fee(),
+                         [card for card in cards if card["annual_fee"] == 0])
+        self.assertEqual(self.card_db.get_cards_with_cashback(),
+                         [card for card in cards if card["cashback_rate"] > 0])
+        self.assertEqual(self.card_db.get_cards_with_rewards(),
+                         [card for card in cards if card["reward_rate"] > 0])
+        taxonomy = self.card_db.category_taxonomy
+        for category in ["Dining", "online shopping", "online", "Bill Payments", "fuel", "unknown", "telecom"]:
+            self.assertEqual(self.card_db.get_cards_for_category(category),
+                             [card for card in cards if offers_category(card, category, taxonomy)])
+    
+    def test_query_matches_chained_filters(self):
+        """
+        Test that query() returns the same cards as chaining list filters.
+        """
+        self.card_db.add_card(dict(self.card_db.get_card_by_id("hdfc_millenia"), card_id="hdfc_millenia_2", annual_fee=750))
+        cards = self.card_db.get_all_cards()
+        taxonomy = self.card_db.category_taxonomy
+        
+        results = list(self.card_db.query(issuer="HDFC Bank", lounge_access=True,
+                                          annual_fee=(None, 1000), categories="dining"))
+        expected = [card for card in cards
+                    if card["issuer"] == "HDFC Bank" and card["lounge_access"]
+                    and card["annual_fee"] <= 1000 and offers_category(card, "dining", taxonomy)]
+        self.assertEqual(results, expected)
+        self.assertTrue(results)
+        
+        results = list(self.card_db.query(card_tier=["Classic", "Gold"], travel_benefits=False,
+                                          min_income=(300000, 500000), categories=["Utility", "groceries"]))
+        expected = [card for card in cards
+                    if card["card_tier"] in ["Classic", "Gold"] and not card["travel_benefits"]
+                    and 300000 <= card["min_income"] <= 500000
+                    and offers_category(card, "Utility", taxonomy) and offers_category(card, "groceries", taxonomy)]
+        self.assertEqual(results, expected)
+        
+        self.assertEqual(list(self.card_db.query()), cards)
+        self.assertEqual(list(self.card_db.query(issuer="Unknown Bank", lounge_access=True)), [])
+        with self.assertRaises(ValueError):
+            self.card_db.query(unknown_field=1)
+    
+    def test_query_streaming_and_masks_agree(self):
+        """
+        Test that streaming the driving predicate and intersecting row masks give the same cards.
+        """
+        for variant in range(40):
+            for card in self.card_db.get_all_cards()[:16]:
+                self.card_db.add_card(dict(card, card_id=f"{card['card_id']}_{variant}",
+                                           annual_fee=(variant * 137 + card["annual_fee"]) % 5000,
+                                           lounge_access=(variant + len(card["card_id"])) % 3 == 0))
+        cards = self.card_db.get_all_cards()
+        taxonomy = self.card_db.category_taxonomy
+        
+        queries = [
+            ({"lounge_access": True, "annual_fee": (None, 999)},
+             lambda card: card["lounge_access"] and card["annual_fee"] <= 999),
+            ({"lounge_access": False, "categories": "dining"},
+             lambda card: not card["lounge_access"] and offers_category(card, "dining", taxonomy)),
+            ({"issuer": ["HDFC Bank", "SBI Card"], "annual_fee": (500, 2500), "categories": ["shopping", "travel"]},
+             lambda card: card["issuer"] in ["HDFC Bank", "SBI Card"] and 500 <= card["annual_fee"] <= 2500
+             and offers_category(card, "shopping", taxonomy) and offers_category(card, "travel", taxonomy)),
+        ]
+        for row_test_cost in (0, 10 ** 9):
+            self.card_db.ROW_TEST_COST = row_test_cost
+            for predicates, matches in queries:
+                results = list(self.card_db.query(**predicates))
+                self.assertEqual(results, [card for card in cards if matches(card)])
+                self.assertTrue(results)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Test script for the Pareto front of cards.
+This file tests the sort-based skyline filter against pairwise comparison.
+"""
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the Pareto front, recommendation engine and database
+from src.pareto import pareto_front
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+def pairwise_front(values):
+    """
+    Reference Pareto front comparing every pair of rows.
+    """
+    return [row for row in range(len(values))
+            if not any(np.all(values[other] >= values[row]) and np.any(values[other] > values[row])
+                       for other in range(len(values)))]
+
+class TestPareto(unittest.TestCase):
+    """
+    Test cases for the Pareto front of cards.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+    
+    def test_front_matches_pairwise_comparison(self):
+        """
+        Test the blocked skyline filter on random values with ties and duplicate rows.
+        """
+        rng = np.random.default_rng(3)
+        for rows, criteria in ((300, 2), (300, 4), (50, 1)):
+            values = rng.integers(0, 8, size=(rows, criteria)).astype(float)
+            values[rows // 2] = values[0]
+            expected = pairwise_front(values)
+            for block_size in (7, 256):
+                self.assertEqual(pareto_front(values, block_size).tolist(), expected)
+        self.assertEqual(pareto_front(np.zeros((0, 4))).tolist(), [])
+    
+    def test_pareto_cards(self):
+        """
+        Test that the card front holds exactly the eligible cards no other eligible card dominates.
+        """
+        engine = self.recommendation_engine
+        preferences = {"annual_income": 2000000, "age": 30, "monthly_card_spend": "₹50,000 - ₹1,00,000",
+                       "monthly_category_spend": {"Travel": 20000, "Dining": 5000},
+                       "monthly_international_spend": 10000}
+        result = engine.pareto_cards(preferences)
+        
+        profile = engine.compile_preferences(preferences)
+        rows = engine._eligible_rows(profile)
+        breakdown = engine.compile_reward_values().value_breakdown([profile], rows)
+        values = np.column_stack([-breakdown["annual_fee"][0], breakdown["rewards"][0],
+                                  -engine.catalog.forex_markup[rows], engine.catalog.lounge_visits[rows]])
+        expected = {engine.catalog.card_ids[rows[position]] for position in pairwise_front(values)}
+        self.assertEqual(set(result["pareto_cards"]), expected)
+        
+        rewards = [result["criteria"][card_id]["reward_value"] for card_id in result["pareto_cards"]]
+        self.assertEqual(rewards, sorted(rewards, reverse=True))
+        for card_id in result["pareto_cards"]:
+            card = self.card_db.get_card_by_id(card_id)
+            self.assertEqual(result["criteria"][card_id]["lounge_visits"], card["lounge_access_count"])
+            self.assertEqual(result["criteria"][card_id]["forex_markup"], card["forex_markup"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Test script for the card portfolio optimizer.
+This file tests the branch and bound portfolio search against enumerating every card combination.
+"""
+
+import sys
+import os
+import random
+import itertools
+import unittest
+
+import numpy as np
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the portfolio optimizer, recommendation engine and database
+from src.portfolio import PortfolioOptimizer
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+from tests.test_recommendation_engine import generate_preferences
+
+class TestPortfolio(unittest.TestCase):
+    """
+    Test cases for the card portfolio optimizer.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment with a catalog of varied card copies.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        rng = random.Random(11)
+        cards = []
+        for variant in range(3):
+            for card in self.card_db.get_all_cards():
+                cards.append(dict(card, card_id=f"{card['card_id']}_{variant}",
+                                  annual_fee=rng.choice([0, 500, 1000, 2500]),
+                                  cashback_rate=rng.choice([0, 1, 2, 5]),
+                                  forex_markup=rng.choice([1.5, 3.5])))
+        self.recommendation_engine = RecommendationEngine(cards)
+        self.preferences = {
+            "annual_income": 2500000,
+            "age": 35,
+            "primary_spending_categories": ["Fuel", "Online Shopping", "Dining", "Travel"],
+            "monthly_card_spend": "₹25,000 - ₹50,000",
+            "monthly_category_spend": {"Fuel": 5000, "Amazon": 15000, "Dining": 6000, "Flights": 8000},
+            "monthly_international_spend": 4000
+        }
+    
+    def enumerate_portfolios(self, profile, size, objective, fee_budget):
+        """
+        Value every combination of eligible cards within the fee budget.
+        """
+        engine = self.recommendation_engine
+        catalog = engine.catalog
+        model = engine.compile_reward_values()
+        rows = engine._eligible_rows(profile)
+        scores = dict(zip(rows, engine._score_matrix([profile], rows)[0]))
+        wanted = profile.category_layers[0] if profile.category_layers else 0
+        annual_spend = model.spend_matrix([profile])[0] * 12
+        values = dict(zip(rows, model.annual_values([profile], rows)[0]))
+        # Spend of a category goes to the best rate, ties to the card with the best value alone
+        preference = {row: (-values[row], catalog.id_rank[row]) for row in rows}
+        
+        portfolios = []
+        for count in range(1, size + 1):
+            for members in itertools.combinations(rows, count):
+                if fee_budget is not None and sum(catalog.annual_fee[row] for row in members) > fee_budget:
+                    continue
+                if objective == "coverage":
+                    union = 0
+                    for row in members:
+                        union |= catalog.category_bits[row] & wanted
+                    value = (bin(union).count("1"), sum(scores[row] for row in members))
+                else:
+                    received = dict.fromkeys(members, 0.0)
+                    rewards = 0.0
+                    for column, spend in enumerate(annual_spend):
+                        owner = min(members, key=lambda row: (-model.rates[row, column], preference[row]))
+                        received[owner] += spend
+                        rewards += spend * model.rates[owner, column]
+                    fees = sum(0.0 if received[row] >= catalog.fee_waiver_threshold[row] else catalog.annual_fee[row]
+                               for row in members)
+                    forex = min(profile.international_spend * 12 * catalog.forex_markup[row] / 100 for row in members)
+                    value = (rewards - forex - fees,)
+                ids = sorted(catalog.card_ids[row] for row in members)
+                portfolios.append((value, ids))
+        return portfolios
+    
+    def test_search_matches_enumeration(self):
+        """
+        Test that branch and bound finds the best portfolios of the full enumeration while visiting fewer.
+        """
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+        optimizer = PortfolioOptimizer(self.recommendation_engine)
+        for objective, fee_budget in (("coverage", None), ("coverage", 3000), ("reward_value", None),
+                                      ("reward_value", 1500)):
+            enumerated = self.enumerate_portfolios(profile, 3, objective, fee_budget)
+            enumerated.sort(key=lambda portfolio: portfolio[0], reverse=True)
+            portfolios = optimizer.optimize(profile, 3, objective, fee_budget, limit=4)
+            self.assertEqual(len(portfolios), 4)
+            for portfolio, (value, _) in zip(portfolios, enumerated):
+                self.assertAlmostEqual(portfolio["value"], value[0], places=6)
+                if objective == "coverage":
+                    self.assertAlmostEqual(portfolio["match_score"], value[1], places=6)
+                if fee_budget is not None:
+                    self.assertLessEqual(portfolio["annual_fee"], fee_budget)
+            self.assertIn(sorted(portfolios[0]["cards"]),
+                          [ids for value, ids in enumerated if np.isclose(value, enumerated[0][0]).all()])
+            self.assertLess(optimizer.nodes_visited, len(enumerated) / 4)
+    
+    def test_search_prunes_large_catalogs(self):
+        """
+        Test that the search visits a small number of portfolios on a catalog of a few hundred cards.
+        """
+        rng = random.Random(13)
+        cards = []
+        for variant in range(20):
+            for card in self.card_db.get_all_cards():
+                cards.append(dict(card, card_id=f"{card['card_id']}_{variant}",
+                                  annual_fee=rng.choice([0, 500, 1000, 2500, 10000]),
+                                  cashback_rate=rng.choice([0, 1, 1.5, 2, 5]),
+                                  reward_rate=rng.choice([1, 2, 4, 10]),
+                                  forex_markup=rng.choice([1.5, 2, 3.5])))
+        engine = RecommendationEngine(cards)
+        optimizer = PortfolioOptimizer(engine)
+        for preferences in generate_preferences(10, seed=17):
+            preferences = dict(preferences, annual_income=2500000, age=32, employment_type="Salaried",
+                               credit_score="Above 800", monthly_category_spend=self.preferences["monthly_category_spend"],
+                               monthly_international_spend=3000)
+            profile = engine.compile_preferences(preferences)
+            self.assertEqual(len(engine._eligible_rows(profile)), 300)
+            for objective in PortfolioOptimizer.OBJECTIVES:
+                for fee_budget in (None, 3000):
+                    portfolios = optimizer.optimize(profile, 3, objective, fee_budget)
+                    self.assertEqual(len(portfolios), 3)
+                    values = [portfolio["value"] for portfolio in portfolios]
+                    self.assertEqual(values, sorted(values, reverse=True))
+                    self.assertLess(optimizer.nodes_visited, 1000)
+    
+    def test_single_card_portfolios(self):
+        """
+        Test that one-card portfolios follow the card's own reward value and coverage.
+        """
+        engine = self.recommendation_engine
+        profile = engine.compile_preferences(self.preferences)
+        rows = engine._eligible_rows(profile)
+        values = engine.compile_reward_values().annual_values([profile], rows)[0]
+        result = engine.recommend_portfolio(self.preferences, size=1, objective="reward_value", limit=2)
+        ranked = engine.recommend_cards(self.preferences, 2, ranking="reward_value")
+        self.assertEqual([portfolio["cards"] for portfolio in result["portfolios"]],
+                         [[card_id] for card_id in ranked["recommended_cards"]])
+        self.assertAlmostEqual(result["portfolios"][0]["value"], values.max())
+        
+        best = engine.recommend_portfolio(self.preferences, size=2)["portfolios"][0]
+        self.assertEqual(len(best["cards"]), 2)
+        self.assertEqual(best["value"], len(best["covered_categories"]))
+    
+    def test_invalid_requests(self):
+        """
+        Test that unknown objectives and empty portfolios are rejected.
+        """
+        with self.assertRaises(ValueError):
+            self.recommendation_engine.recommend_portfolio(self.preferences, objective="popularity")
+        with self.assertRaises(ValueError):
+            self.recommendation_engine.recommend_portfolio(self.preferences, size=0)
+        self.assertEqual(self.recommendation_engine.recommend_portfolio(self.preferences, fee_budget=-1),
+                         {"portfolios": []})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Test script for the compiled preference profile.
+This file tests answer parsing, profile fingerprints and scoring on compiled profiles.
+"""
+
+import sys
+import os
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the profile, recommendation engine and database
+from src.preference_profile import (PreferenceProfile, FeePreference, RewardPreference, LoungeImportance,
+                                    parse_select_answer)
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestPreferenceProfile(unittest.TestCase):
+    """
+    Test cases for the compiled preference profile.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+        self.preferences = {
+            "annual_income": 650000,
+            "employment_type": "Salaried",
+            "credit_score": "750-800",
+            "age": 30,
+            "primary_spending_categories": ["Dining", "Travel", "Online Shopping"],
+            "monthly_card_spend": "₹25,000 - ₹50,000",
+            "fee_preference": "Low annual fee with better benefits",
+            "reward_preference": "Reward Points",
+            "lounge_access_importance": "Not important",
+            "preferred_banks": ["HDFC Bank", "Axis Bank"]
+        }
+
+    def test_parse_select_answer(self):
+        """
+        Test that select answers are parsed into their enum members.
+        """
+        self.assertEqual(parse_select_answer("fee_preference", "No annual fee"), FeePreference.NO_ANNUAL_FEE)
+        self.assertEqual(parse_select_answer("reward_preference", "Air Miles"), RewardPreference.AIR_MILES)
+        self.assertEqual(parse_select_answer("reward_preference", "Gold"), RewardPreference.OTHER)
+        self.assertEqual(parse_select_answer("lounge_access_importance", None), LoungeImportance.OTHER)
+        self.assertEqual(parse_select_answer("lounge_access_importance", ["Very important"]), LoungeImportance.OTHER)
+
+    def test_compile_preferences(self):
+        """
+        Test that compiling parses every answer once.
+        """
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+
+        self.assertIsInstance(profile, PreferenceProfile)
+        self.assertEqual(profile.annual_spend, profile.monthly_spend * 12)
+        self.assertEqual(profile.credit_score_floor, 750)
+        self.assertEqual(profile.fee_preference, FeePreference.LOW_ANNUAL_FEE)
+        self.assertEqual(profile.lounge_access_importance, LoungeImportance.NOT_IMPORTANT)
+        self.assertEqual(profile.normalized_categories, ("dining", "travel", "shopping"))
+        self.assertEqual(profile.preferred_banks, frozenset(["HDFC Bank", "Axis Bank"]))
+        self.assertIs(self.recommendation_engine.compile_preferences(profile), profile)
+
+    def test_fingerprint(self):
+        """
+        Test that equivalent answers share a fingerprint and different answers do not.
+        """
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+        self.assertEqual(profile.fingerprint,
+                         self.recommendation_engine.compile_preferences(dict(self.preferences)).fingerprint)
+        self.assertLess(profile.fingerprint, 1 << 64)
+
+        reordered = dict(self.preferences,
+                         primary_spending_categories=["Online Shopping", "Travel", "Dining"],
+                         preferred_banks=["Axis Bank", "HDFC Bank"])
+        self.assertEqual(profile.fingerprint,
+                         self.recommendation_engine.compile_preferences(reordered).fingerprint)
+
+        changed = dict(self.preferences, reward_preference="Cashback")
+        self.assertNotEqual(profile.fingerprint,
+                            self.recommendation_engine.compile_preferences(changed).fingerprint)
+
+    def test_profile_recommendations_match_raw_preferences(self):
+        """
+        Test that recommending from a compiled profile gives the same result as from raw answers.
+        """
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+        self.assertEqual(self.recommendation_engine.recommend_cards(profile),
+                         self.recommendation_engine.recommend_cards(self.preferences))
+        self.assertEqual(self.recommendation_engine.preference_cache_key(profile),
+                         self.recommendation_engine.preference_cache_key(self.preferences))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Test script for constrained and diversified rankings.
+This file tests per-issuer and per-tier caps, network mixes and the best card per issuer mode.
+"""
+
+import sys
+import os
+import random
+import unittest
+
+import numpy as np
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the ranking constraints, recommendation engine and database
+from src.ranking_constraints import RankingConstraints, parse_constraints
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+from tests.test_recommendation_engine import generate_preferences
+
+class TestRankingConstraints(unittest.TestCase):
+    """
+    Test cases for constrained and diversified rankings.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment with a catalog of varied card copies.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        rng = random.Random(2)
+        self.cards = []
+        for variant in range(4):
+            for card in self.card_db.get_all_cards():
+                self.cards.append(dict(card, card_id=f"{card['card_id']}_{variant}",
+                                       annual_fee=rng.choice([0, 500, 1000, 2500]),
+                                       card_network=rng.choice(["Visa", "Mastercard", "RuPay"])))
+        self.recommendation_engine = RecommendationEngine(self.cards)
+    
+    def expected_ranking(self, preferences, limit, constraints):
+        """
+        Reference ranking that walks the fully sorted list of eligible cards.
+        """
+        engine = self.recommendation_engine
+        ranked = engine.recommend_cards(preferences, len(self.cards), explain=False)
+        cards = [self.cards[engine.catalog.row_of[card_id]] for card_id in ranked["recommended_cards"]]
+        if constraints.best_per_issuer:
+            cards = [card for index, card in enumerate(cards)
+                     if all(other["issuer"] != card["issuer"] for other in cards[:index])]
+        
+        selected, skipped = [], []
+        def fits(card):
+            issuers = sum(other["issuer"] == card["issuer"] for other in selected)
+            tiers = sum(engine._normalize_tier(other["card_tier"]) == engine._normalize_tier(card["card_tier"])
+                        for other in selected)
+            return ((constraints.max_per_issuer is None or issuers < constraints.max_per_issuer)
+                    and (constraints.max_per_tier is None or tiers < constraints.max_per_tier))
+        def missing():
+            return sum(max(count - sum(card["card_network"] == network for card in selected), 0)
+                       for network, count in constraints.network_mix)
+        for card in cards:
+            if len(selected) == limit:
+                break
+            if not fits(card):
+                continue
+            needed = dict(constraints.network_mix).get(card["card_network"], 0)
+            if sum(other["card_network"] == card["card_network"] for other in selected) < needed \
+                    or len(selected) + missing() < limit:
+                selected.append(card)
+            else:
+                skipped.append(card)
+        for card in skipped:
+            if len(selected) < limit and fits(card):
+                selected.append(card)
+        selected.sort(key=lambda card: (-ranked["match_scores"][card["card_id"]], card["card_id"]))
+        return [card["card_id"] for card in selected]
+    
+    def test_constrained_ranking_matches_reference(self):
+        """
+        Test constrained rankings against filtering the fully sorted eligible cards.
+        """
+        engine = self.recommendation_engine
+        all_constraints = [
+            RankingConstraints(max_per_issuer=1),
+            RankingConstraints(max_per_issuer=2, max_per_tier=2),
+            RankingConstraints(network_mix=(("Mastercard", 2), ("RuPay", 1))),
+            RankingConstraints(max_per_issuer=1, network_mix=(("Amex", 1), ("Visa", 3))),
+            RankingConstraints(best_per_issuer=True),
+            RankingConstraints(best_per_issuer=True, max_per_tier=1, network_mix=(("RuPay", 2),))
+        ]
+        for preferences in generate_preferences(15, seed=21):
+            for constraints in all_constraints:
+                for limit in (1, 5):
+                    result = engine.recommend_cards(preferences, limit, constraints=constraints)
+                    self.assertEqual(result["recommended_cards"], self.expected_ranking(preferences, limit, constraints))
+                    self.assertEqual(set(result["match_reasons"]), set(result["recommended_cards"]))
+        
+        batch = generate_preferences(6, seed=22)
+        self.assertEqual(list(engine.recommend_batch(batch, constraints=all_constraints[-1])),
+                         [engine.recommend_cards(preferences, constraints=all_constraints[-1])
+                          for preferences in batch])
+    
+    def test_constraints_with_value_ranking(self):
+        """
+        Test that constraints also apply to the rupee-based ranking modes.
+        """
+        preferences = {"annual_income": 3000000, "age": 35, "monthly_card_spend": "₹25,000 - ₹50,000"}
+        result = self.recommendation_engine.recommend_cards(preferences, 8, ranking="total_cost",
+                                                            constraints={"max_per_issuer": 1})
+        issuers = [self.cards[self.recommendation_engine.catalog.row_of[card_id]]["issuer"]
+                   for card_id in result["recommended_cards"]]
+        self.assertEqual(len(issuers), len(set(issuers)))
+        costs = [result["match_scores"][card_id] for card_id in result["recommended_cards"]]
+        self.assertEqual(costs, sorted(costs))
+    
+    def test_parse_constraints(self):
+        """
+        Test parsing constraints from request options.
+        """
+        self.assertEqual(parse_constraints({"max_per_issuer": "2", "network_mix": "Visa:2, Mastercard",
+                                            "best_per_issuer": "true"}),
+                         RankingConstraints(2, None, (("Mastercard", 1), ("Visa", 2)), True))
+        self.assertEqual(parse_constraints({"network_mix": {"RuPay": 1}}).network_mix, (("RuPay", 1),))
+        self.assertEqual(parse_constraints(None), RankingConstraints())
+        with self.assertRaises(ValueError):
+            parse_constraints({"max_per_tier": 0})
+        key = self.recommendation_engine.preference_cache_key({"age": 30})
+        self.assertNotEqual(self.recommendation_engine.preference_cache_key({"age": 30}, constraints={"max_per_issuer": 1}),
+                            key)
+        self.assertEqual(self.recommendation_engine.preference_cache_key({"age": 30}, constraints={}), key)
+
+if __name__ == "__main__":
+    unittest.main()
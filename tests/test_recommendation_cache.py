@@ -0,0 +1,111 @@
+"""
+Test script for the recommendation cache.
+This file tests the LRU/TTL cache and the canonical preference cache keys.
+"""
+
+import sys
+import os
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the cache, recommendation engine and database
+from src.recommendation_cache import RecommendationCache
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestRecommendationCache(unittest.TestCase):
+    """
+    Test cases for the recommendation cache.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+        self.preferences = {
+            "annual_income": 650000,
+            "employment_type": "Salaried",
+            "credit_score": "750-800",
+            "age": 30,
+            "primary_spending_categories": ["Dining", "Travel", "Online Shopping"],
+            "monthly_card_spend": "₹25,000 - ₹50,000",
+            "fee_preference": "Low annual fee with better benefits",
+            "reward_preference": "Reward Points",
+            "preferred_banks": ["HDFC Bank", "Axis Bank"]
+        }
+    
+    def test_lru_eviction_and_counters(self):
+        """
+        Test that the least recently used entry is evicted and lookups are counted.
+        """
+        cache = RecommendationCache(max_size=2, ttl=None)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get_or_compute("c", lambda: 0), 3)
+        self.assertEqual(cache.get_or_compute("d", lambda: 4), 4)
+        
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 2, 2))
+    
+    def test_expired_entries_are_misses(self):
+        """
+        Test that entries are not returned after their time to live.
+        """
+        cache = RecommendationCache(ttl=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+    
+    def test_equivalent_preferences_share_a_key(self):
+        """
+        Test that answer order and income/age within the same eligibility bucket do not change the key.
+        """
+        key = self.recommendation_engine.preference_cache_key(self.preferences)
+        equivalent = dict(self.preferences, annual_income=700000, age=31,
+                          primary_spending_categories=["Online Shopping", "Travel", "Dining"],
+                          preferred_banks=["Axis Bank", "HDFC Bank"])
+        self.assertEqual(self.recommendation_engine.preference_cache_key(equivalent), key)
+        self.assertEqual(self.recommendation_engine.recommend_cards(equivalent),
+                         self.recommendation_engine.recommend_cards(self.preferences))
+        
+        for changed in (dict(self.preferences, annual_income=1500000),
+                        dict(self.preferences, fee_preference="No annual fee"),
+                        dict(self.preferences, primary_spending_categories=["Dining"])):
+            self.assertNotEqual(self.recommendation_engine.preference_cache_key(changed), key)
+        self.assertNotEqual(self.recommendation_engine.preference_cache_key(self.preferences, limit=3), key)
+    
+    def test_catalog_change_notifies_listeners(self):
+        """
+        Test that catalog mutations bump the version and notify listeners.
+        """
+        cache = RecommendationCache()
+        cache.put("a", 1)
+        self.card_db.add_change_listener(lambda database: cache.clear())
+        self.card_db.remove_card("kotak_811")
+        self.assertEqual(self.card_db.version, 1)
+        self.assertIsNone(cache.get("a"))
+    
+    def test_catalog_change_starts_a_new_key_generation(self):
+        """
+        Test that results stored for an old catalog are never hit once the catalog changes.
+        """
+        key = self.recommendation_engine.preference_cache_key(self.preferences)
+        self.recommendation_engine.set_card_database(self.card_db.get_all_cards())
+        self.assertNotEqual(self.recommendation_engine.preference_cache_key(self.preferences), key)
+        
+        # A request still running on the old catalog stores its result after the clear
+        cache = RecommendationCache()
+        cache.clear()
+        cache.put(key, {"recommended_cards": ["stale"]})
+        self.assertIsNone(cache.get(self.recommendation_engine.preference_cache_key(self.preferences)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,14 +6,62 @@ This file tests the recommendation engine with various user preference combinati
 import sys
 import os
 import json
+import random
 import unittest
 
+import numpy as np
+
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the recommendation engine and database
 from src.recommendation_engine import RecommendationEngine
 from src.credit_card_database import CreditCardDatabase
+from src.user_preference_input import UserPreferenceInput
+
+
+def generate_preferences(count, seed=42):
+    """
+    Generate random user preferences from the questionnaire options.
+    """
+    rng = random.Random(seed)
+    questions = UserPreferenceInput().questions
+    profiles = []
+    for _ in range(count):
+        preferences = {
+            "annual_income": rng.choice([250000, 300000, 600000, 1000000, 1200000, 2500000]),
+            "age": rng.choice([17, 25, 30, 45, 66]),
+            "international_transactions": rng.random() < 0.5,
+            "existing_cards": rng.random() < 0.5,
+        }
+        for field_id, details in questions.items():
+            if details["type"] == "select":
+                preferences[field_id] = rng.choice(details["options"] + [""])
+            elif details["type"] == "multi_select":
+                preferences[field_id] = rng.sample(details["options"], rng.randint(0, 4))
+        # Most catalog cards only accept these employment types
+        preferences["employment_type"] = rng.choice(
+            ["Salaried", "Self-employed Professional", "Business Owner", "Student", ""])
+        profiles.append(preferences)
+    return profiles
+
+def is_eligible(card, preferences):
+    """
+    Reference per-card eligibility check used to verify the eligibility index.
+    """
+    credit_score_floors = {"Below 650": 600, "650-700": 650, "700-750": 700, "750-800": 750, "Above 800": 800}
+    if preferences.get("annual_income", 0) < card.get("min_income", 0):
+        return False
+    age = preferences.get("age", 0)
+    if age < card.get("min_age", 0) or (card.get("max_age", 100) > 0 and age > card.get("max_age", 100)):
+        return False
+    credit_score = preferences.get("credit_score", "Don't Know")
+    if credit_score != "Don't Know" and credit_score_floors.get(credit_score, 0) < card.get("credit_score_required", 0):
+        return False
+    employment_type = preferences.get("employment_type", "")
+    if employment_type and card.get("employment_type") and employment_type not in card["employment_type"]:
+        return False
+    return True
 
 class TestRecommendationEngine(unittest.TestCase):
     """
@@ -268,6 +316,194 @@ class TestRecommendationEngine(unittest.TestCase):
         print("Match Reasons:")
         for reason in recommendations["match_reasons"][top_card_id]:
             print(f"- {reason}")
+    
+    def test_vectorized_matches_per_card_scoring(self):
+        """
+        Test that the vectorized scoring mode returns exactly the same results.
+        """
+        vectorized_engine = RecommendationEngine(self.card_db.get_all_cards(), vectorized=True)
+        
+        for preferences in generate_preferences(300):
+            for limit in (1, 5, 20):
+                expected = self.recommendation_engine.recommend_cards(preferences, limit)
+                actual = vectorized_engine.recommend_cards(preferences, limit)
+                self.assertEqual(actual, expected)
+    
+    def test_scoring_tables_follow_weights_and_catalog(self):
+        """
+        Test that the compiled scoring tables are rebuilt when weights or the catalog change.
+        """
+        vectorized_engine = RecommendationEngine(self.card_db.get_all_cards(), vectorized=True)
+        tables = vectorized_engine.compile_scoring_tables()
+        self.assertIs(vectorized_engine.compile_scoring_tables(), tables)
+        
+        for engine in (self.recommendation_engine, vectorized_engine):
+            engine.weight_factors["preferred_bank_match"] = 30.0
+            engine.weight_factors["annual_fee_match"] = 0.5
+        self.assertIsNot(vectorized_engine.compile_scoring_tables(), tables)
+        for preferences in generate_preferences(100, seed=3):
+            self.assertEqual(vectorized_engine.recommend_cards(preferences),
+                             self.recommendation_engine.recommend_cards(preferences))
+        
+        tables = vectorized_engine.compile_scoring_tables()
+        cards = self.card_db.get_all_cards()[:10]
+        for engine in (self.recommendation_engine, vectorized_engine):
+            engine.set_card_database(cards)
+        self.assertIsNot(vectorized_engine.compile_scoring_tables(), tables)
+        self.assertEqual(vectorized_engine.compile_scoring_tables().tables["fee"].shape, (4, 10))
+        for preferences in generate_preferences(100, seed=4):
+            self.assertEqual(vectorized_engine.recommend_cards(preferences),
+                             self.recommendation_engine.recommend_cards(preferences))
+    
+    def test_bound_pruning_matches_full_scan(self):
+        """
+        Test that pruning by score bounds on a large catalog returns the full scan result.
+        """
+        rng = random.Random(5)
+        cards = []
+        for variant in range(125):
+            for card in self.card_db.get_all_cards():
+                cards.append(dict(card, card_id=f"{card['card_id']}_{variant}",
+                                  annual_fee=rng.choice([0, 500, 1000, 2500, 10000]),
+                                  popularity_score=rng.choice([4.0, 6.0, 8.0]),
+                                  forex_markup=rng.choice([1.5, 3.0, 3.5]),
+                                  lounge_access=rng.random() < 0.5))
+        full_scan_engine = RecommendationEngine(cards)
+        pruning_engine = RecommendationEngine(cards, vectorized=True, cluster_size=32)
+        # Prune even though the catalog is smaller than where pruning starts to pay off
+        pruning_engine.PRUNING_MIN_ROWS = 0
+        tables = pruning_engine.compile_scoring_tables()
+        self.assertGreater(len(tables.cluster_members), 1)
+        
+        scored = []
+        score_matrix = pruning_engine._score_matrix
+        def counting_score_matrix(profiles, rows):
+            scored.append(len(rows))
+            return score_matrix(profiles, rows)
+        pruning_engine._score_matrix = counting_score_matrix
+        
+        all_rows = np.arange(len(cards))
+        eligible_count = 0
+        for preferences in generate_preferences(20, seed=8):
+            profile = pruning_engine.compile_preferences(preferences)
+            scores = score_matrix([profile], all_rows)[0]
+            # Bounds add the components in another order, hence the engine's slack
+            self.assertTrue(np.all(scores <= tables.card_bounds + pruning_engine.BOUND_SLACK))
+            self.assertTrue(np.all(scores <= tables.profile_card_bounds(profile, all_rows) + pruning_engine.BOUND_SLACK))
+            cluster_bounds = tables.cluster_bounds(profile)
+            for cluster, members in enumerate(tables.cluster_members):
+                self.assertTrue(np.all(scores[members] <= cluster_bounds[cluster] + pruning_engine.BOUND_SLACK))
+            
+            for limit in (1, 5):
+                self.assertEqual(pruning_engine.recommend_cards(preferences, limit),
+                                 full_scan_engine.recommend_cards(preferences, limit))
+                eligible_count += len(pruning_engine._eligible_rows(profile))
+        # Most eligible cards are never scored
+        self.assertLess(sum(scored), eligible_count / 10)
+    
+    def test_category_bitmask_matches_nested_scan(self):
+        """
+        Test that bitmask category matching counts the same overlaps as walking the taxonomy.
+        """
+        engine = self.recommendation_engine
+        taxonomy = engine.category_taxonomy
+        
+        def broader(name):
+            names, pending = set(), [name]
+            while pending:
+                name = pending.pop()
+                names.add(name)
+                pending.extend(taxonomy.parents.get(name, ()))
+            return names
+        
+        for preferences in generate_preferences(200, seed=11):
+            profile = engine.compile_preferences(preferences)
+            for card in self.card_db.get_all_cards():
+                card_categories = [taxonomy.canonical(cat) for cat in card.get("reward_categories", [])]
+                expected = 0.0
+                for category in profile.normalized_categories:
+                    if any(cat in broader(category) for cat in card_categories):
+                        expected += 1
+                    elif any(category in broader(cat) for cat in card_categories):
+                        expected += taxonomy.partial_match_weight
+                row = engine.catalog.row_of[card["card_id"]]
+                full = sum((layer & engine.catalog.category_bits[row]).bit_count() for layer in profile.category_layers)
+                partial = sum((layer & engine.catalog.partial_category_bits[row]).bit_count()
+                              for layer in profile.category_layers)
+                self.assertEqual(full + taxonomy.partial_match_weight * partial, expected)
+        
+        # Shopping and Online Shopping normalize to the same category and both count
+        profile = engine.compile_preferences({"primary_spending_categories": ["Shopping", "Online Shopping"]})
+        self.assertEqual(len(profile.category_layers), 2)
+    
+    def test_eligibility_index_matches_linear_scan(self):
+        """
+        Test that the eligibility index selects the same cards as a per-card check.
+        """
+        cards = self.card_db.get_all_cards()
+        for preferences in generate_preferences(300, seed=7):
+            expected = [card["card_id"] for card in cards if is_eligible(card, preferences)]
+            actual = [card["card_id"] for card in self.recommendation_engine._filter_eligible_cards(
+                self.recommendation_engine.compile_preferences(preferences))]
+            self.assertEqual(actual, expected)
+    
+    def test_recommend_batch_matches_single_user(self):
+        """
+        Test that batch recommendations are identical to one-at-a-time recommendations.
+        """
+        profiles = generate_preferences(200, seed=11)
+        for limit in (1, 5):
+            results = list(self.recommendation_engine.recommend_batch(profiles, limit, chunk_size=64))
+            self.assertEqual(len(results), len(profiles))
+            for preferences, actual in zip(profiles, results):
+                self.assertEqual(actual, self.recommendation_engine.recommend_cards(preferences, limit))
+    
+    def test_ties_are_broken_on_card_id(self):
+        """
+        Test that rankings do not depend on catalog order when scores tie.
+        """
+        shuffled_cards = list(self.card_db.get_all_cards())
+        random.Random(3).shuffle(shuffled_cards)
+        engines = [
+            RecommendationEngine(shuffled_cards),
+            RecommendationEngine(shuffled_cards, vectorized=True)
+        ]
+        
+        for preferences in generate_preferences(200, seed=5):
+            expected = self.recommendation_engine.recommend_cards(preferences, 3)
+            for engine in engines:
+                self.assertEqual(engine.recommend_cards(preferences, 3), expected)
+            
+            scores = list(expected["match_scores"].items())
+            for (first_id, first_score), (second_id, second_score) in zip(scores, scores[1:]):
+                self.assertTrue(first_score > second_score or first_id < second_id)
+    
+    def test_explain_option(self):
+        """
+        Test that match reasons are only rendered when requested.
+        """
+        vectorized_engine = RecommendationEngine(self.card_db.get_all_cards(), vectorized=True)
+        preferences = {
+            "annual_income": 3500000,
+            "employment_type": "Salaried",
+            "credit_score": "Above 800",
+            "age": 40,
+            "international_transactions": True,
+            "lounge_access_importance": "Very important",
+            "preferred_banks": ["ICICI Bank"]
+        }
+        
+        for engine in (self.recommendation_engine, vectorized_engine):
+            explained = engine.recommend_cards(preferences)
+            unexplained = engine.recommend_cards(preferences, explain=False)
+            self.assertNotIn("match_reasons", unexplained)
+            self.assertEqual(unexplained["recommended_cards"], explained["recommended_cards"])
+            self.assertEqual(unexplained["match_scores"], explained["match_scores"])
+            self.assertIn("Card from your preferred bank: ICICI Bank", explained["match_reasons"]["icici_emeralde"])
+            self.assertIn("Offers 24 complimentary lounge visits per year", explained["match_reasons"]["icici_emeralde"])
+        
+        batch = next(vectorized_engine.recommend_batch([preferences], explain=False))
+        self.assertEqual(batch, self.recommendation_engine.recommend_cards(preferences, explain=False))
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,225 @@
+"""
+Test script for what-if recommendation sessions.
+This file tests that sessions re-score only changed components and match full recommendations,
+and that adaptive questionnaires only report a stable top-k that no remaining answer can change.
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the recommendation engine, database and questionnaire
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+from src.user_preference_input import UserPreferenceInput
+
+class TestRecommendationSession(unittest.TestCase):
+    """
+    Test cases for what-if recommendation sessions.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+        self.preferences = {
+            "annual_income": 1200000,
+            "employment_type": "Salaried",
+            "credit_score": "750-800",
+            "age": 30,
+            "primary_spending_categories": ["Dining", "Online Shopping"],
+            "monthly_card_spend": "₹25,000 - ₹50,000",
+            "fee_preference": "Low annual fee with better benefits",
+            "reward_preference": "Reward Points",
+            "travel_frequency": "Occasionally",
+            "preferred_banks": ["HDFC Bank"]
+        }
+    
+    def test_single_answer_changes(self):
+        """
+        Test that changing one answer re-scores only its components.
+        """
+        session = self.recommendation_engine.start_session()
+        session.recommend(self.preferences)
+        self.assertEqual(len(session.recomputed), len(session._tables.COMPONENTS))
+        
+        result = session.update({"fee_preference": "No annual fee"})
+        self.assertEqual(session.recomputed, ("fee",))
+        self.assertEqual(result, self.recommendation_engine.recommend_cards(
+            dict(self.preferences, fee_preference="No annual fee")))
+        
+        session.update({"annual_income": 5000000})
+        self.assertEqual(session.recomputed, ())
+        session.update({"preferred_banks": ["Kotak Mahindra Bank"]})
+        self.assertEqual(session.recomputed, ("preferred_bank",))
+        session.update({"primary_spending_categories": ["Dining", "Fuel"]})
+        self.assertEqual(session.recomputed, ("spending_category", "fuel"))
+    
+    def test_random_walk_matches_recommend_cards(self):
+        """
+        Test that a sequence of answer changes gives the same results as fresh recommendations.
+        """
+        rng = random.Random(3)
+        questions = UserPreferenceInput().questions
+        session = self.recommendation_engine.start_session()
+        preferences = dict(self.preferences)
+        for step in range(200):
+            field_id = rng.choice(list(questions) + ["annual_income", "age", "international_transactions"])
+            if field_id == "annual_income":
+                value = rng.choice([250000, 600000, 1200000, 3500000])
+            elif field_id == "age":
+                value = rng.choice([19, 30, 62])
+            elif field_id == "international_transactions":
+                value = rng.random() < 0.5
+            elif questions[field_id]["type"] == "multi_select":
+                value = rng.sample(questions[field_id]["options"], rng.randint(0, 3))
+            elif questions[field_id]["type"] == "select":
+                value = rng.choice(questions[field_id]["options"])
+            else:
+                continue
+            preferences[field_id] = value
+            limit = rng.choice([1, 5])
+            self.assertEqual(session.update({field_id: value}, limit) if step else session.recommend(preferences, limit),
+                             self.recommendation_engine.recommend_cards(preferences, limit))
+    
+    def test_weight_and_catalog_changes_reset_session(self):
+        """
+        Test that sessions re-score everything after the weights or the catalog change.
+        """
+        session = self.recommendation_engine.start_session()
+        session.recommend(self.preferences)
+        
+        self.recommendation_engine.weight_factors["popularity_score"] = 20.0
+        self.assertEqual(session.update({}), self.recommendation_engine.recommend_cards(self.preferences))
+        self.assertEqual(len(session.recomputed), len(session._tables.COMPONENTS))
+        
+        self.recommendation_engine.set_card_database(self.card_db.get_all_cards()[:8])
+        self.assertEqual(session.update({}), self.recommendation_engine.recommend_cards(self.preferences))
+        self.assertEqual(len(session.recomputed), len(session._tables.COMPONENTS))
+
+    def test_questionnaire_steps(self):
+        """
+        Test that a questionnaire narrows candidates step by step and scores only them.
+        """
+        questionnaire = self.recommendation_engine.start_questionnaire()
+        
+        progress = questionnaire.submit({"annual_income": 1200000, "employment_type": "Salaried",
+                                         "credit_score": "750-800"})
+        self.assertFalse(progress["eligibility_known"])
+        self.assertEqual(progress["scored_components"], [])
+        provisional_count = progress["candidate_count"]
+        self.assertIn("error", questionnaire.recommend())
+        
+        progress = questionnaire.submit({"age": 30, "residence_status": "Indian Resident"})
+        self.assertTrue(progress["eligibility_known"])
+        eligible = self.recommendation_engine._filter_eligible_cards(
+            self.recommendation_engine.compile_preferences(self.preferences))
+        self.assertEqual(progress["candidate_count"], len(eligible))
+        self.assertLessEqual(progress["candidate_count"], provisional_count)
+        self.assertEqual(len(questionnaire._scored_rows), len(eligible))
+        
+        progress = questionnaire.submit({"primary_spending_categories": ["Dining", "Online Shopping"],
+                                         "monthly_card_spend": "₹25,000 - ₹50,000"})
+        self.assertIn("spending_category", progress["scored_components"])
+        self.assertIn("fee_waiver", progress["scored_components"])
+        questionnaire.submit({"fee_preference": "Low annual fee with better benefits",
+                              "reward_preference": "Reward Points", "travel_frequency": "Occasionally"})
+        
+        result = questionnaire.recommend({"preferred_banks": ["HDFC Bank"]})
+        self.assertNotIn("fee", questionnaire.recomputed)
+        self.assertIn("preferred_bank", questionnaire.recomputed)
+        self.assertEqual(result, self.recommendation_engine.recommend_cards(self.preferences))
+        
+        # Going back and changing an eligibility answer re-scores the new candidate set
+        questionnaire.submit({"annual_income": 300000})
+        self.assertEqual(questionnaire.recommend(),
+                         self.recommendation_engine.recommend_cards(dict(self.preferences, annual_income=300000)))
+    
+    def random_answers(self, preference_input, rng):
+        """
+        Generate random answers to every question that affects the score.
+        """
+        answers = {}
+        for field_id, details in preference_input.questions.items():
+            if details["type"] == "multi_select":
+                answers[field_id] = rng.sample(details["options"], rng.randint(0, 3))
+            elif details["type"] != "number":
+                answers[field_id] = rng.choice(preference_input.get_answer_values(field_id))
+        return answers
+    
+    def test_adaptive_question_order(self):
+        """
+        Test that adaptive questions cover the questionnaire and that a stable top-k never changes.
+        """
+        fixed_input = UserPreferenceInput()
+        self.assertEqual(fixed_input.next_question({}), {"next_question": "annual_income", "top_k_stable": False})
+        self.assertEqual(fixed_input.next_question({"annual_income": 1200000})["next_question"], "employment_type")
+        
+        preference_input = UserPreferenceInput(adaptive=True)
+        rng = random.Random(7)
+        for _ in range(5):
+            answers = dict(self.random_answers(preference_input, rng), annual_income=rng.choice([400000, 1200000, 3000000]),
+                           age=rng.randint(21, 60))
+            questionnaire = self.recommendation_engine.start_questionnaire()
+            asked = []
+            stable_since = None
+            step = preference_input.next_question(questionnaire.preferences, questionnaire)
+            while step["next_question"] is not None:
+                field_id = step["next_question"]
+                self.assertNotIn(field_id, asked)
+                asked.append(field_id)
+                questionnaire.submit({field_id: answers[field_id]})
+                step = preference_input.next_question(questionnaire.preferences, questionnaire)
+                if step["top_k_stable"] and stable_since is None:
+                    stable_since = dict(questionnaire.preferences)
+            
+            self.assertEqual(sorted(asked), sorted(preference_input.questions))
+            self.assertEqual(asked[:5], ["annual_income", "employment_type", "credit_score", "age", "residence_status"])
+            self.assertTrue(step["top_k_stable"])
+            
+            # Once stable, any remaining answers give the same recommended cards
+            expected = set(questionnaire.recommend()["recommended_cards"])
+            for _ in range(10):
+                completion = dict(self.random_answers(preference_input, rng), **stable_since)
+                self.assertEqual(set(self.recommendation_engine.recommend_cards(completion)["recommended_cards"]),
+                                 expected)
+        
+        questionnaire = self.recommendation_engine.start_questionnaire()
+        questionnaire.submit({"annual_income": 1200000, "age": 30})
+        self.assertEqual(questionnaire.split_entropy("residence_status", ["NRI", "Indian Resident"]), 0.0)
+        self.assertGreater(questionnaire.split_entropy(
+            "fee_preference", preference_input.get_answer_values("fee_preference")), 0.0)
+    
+    def test_top_k_not_stable_before_eligibility_answers(self):
+        """
+        Test that the top-k is not stable while employment type or credit score can still remove cards.
+        """
+        preference_input = UserPreferenceInput(adaptive=True)
+        answers = {
+            "annual_income": 3000000, "age": 35, "employment_type": "Salaried", "credit_score": "Above 800",
+            "residence_status": "Indian Resident", "primary_spending_categories": ["Travel"],
+            "monthly_card_spend": "₹50,000 - ₹1,00,000", "international_transactions": True,
+            "fee_preference": "Don't mind higher fees for premium benefits", "reward_preference": "Air Miles",
+            "travel_frequency": "Frequently", "lounge_access_importance": "Very important",
+            "preferred_banks": [], "existing_relationship": [], "existing_cards": False,
+            "preferred_card_tier": "Premium"
+        }
+        self.assertEqual(sorted(answers), sorted(preference_input.questions))
+        for field_id, narrowing_answer in (("employment_type", "Student"), ("credit_score", "Below 650")):
+            questionnaire = self.recommendation_engine.start_questionnaire()
+            questionnaire.submit({name: value for name, value in answers.items() if name != field_id})
+            self.assertEqual(preference_input.next_question(questionnaire.preferences, questionnaire),
+                             {"next_question": field_id, "top_k_stable": False})
+            before = set(questionnaire.recommend()["recommended_cards"])
+            questionnaire.submit({field_id: narrowing_answer})
+            self.assertNotEqual(set(questionnaire.recommend()["recommended_cards"]), before)
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Test script for the reward value model.
+This file tests effective reward rates, net annual values and the reward value ranking mode.
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the reward value model, recommendation engine and database
+from src.reward_value import RewardValueModel
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+class TestRewardValue(unittest.TestCase):
+    """
+    Test cases for the reward value model.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.card_db = CreditCardDatabase(db_file)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards())
+        self.preferences = {
+            "annual_income": 1500000,
+            "age": 30,
+            "primary_spending_categories": ["Dining", "Online Shopping"],
+            "monthly_card_spend": "₹25,000 - ₹50,000",
+            "monthly_category_spend": {"Dining": 6000, "Amazon": 12000, "Fuel": 4000, "Rent": 10000}
+        }
+    
+    def expected_value(self, card, category_spend):
+        """
+        Compute a card's net annual value one category at a time, walking the taxonomy.
+        """
+        taxonomy = self.recommendation_engine.category_taxonomy
+        if card["cashback_rate"] > 0:
+            headline = card["cashback_rate"] / 100
+        else:
+            headline = card["reward_rate"] / 100 * RewardValueModel.POINT_VALUE
+        card_categories = [taxonomy.canonical(category) for category in card["reward_categories"]]
+        base = headline * RewardValueModel.BASE_RATE_SHARE if card_categories else headline
+        
+        rewards = 0.0
+        for category, amount in category_spend:
+            if any(covered in taxonomy.ancestors(category) for covered in card_categories):
+                rate = headline
+            elif any(category in taxonomy.ancestors(covered) for covered in card_categories):
+                rate = base + taxonomy.partial_match_weight * (headline - base)
+            else:
+                rate = base
+            rewards += amount * 12 * rate
+        
+        threshold = self.recommendation_engine.catalog.fee_waiver_threshold[
+            self.recommendation_engine.catalog.row_of[card["card_id"]]]
+        waived = sum(amount for _, amount in category_spend) * 12 >= threshold
+        return rewards - (0 if waived else card["annual_fee"])
+    
+    def test_category_spend(self):
+        """
+        Test that category spend is normalized, or split from the monthly spend.
+        """
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+        self.assertEqual(profile.category_spend,
+                         (("amazon", 12000.0), ("dining", 6000.0), ("fuel", 4000.0), ("rent", 10000.0)))
+        
+        split = self.recommendation_engine.compile_preferences(
+            {key: value for key, value in self.preferences.items() if key != "monthly_category_spend"})
+        self.assertEqual(split.category_spend, (("dining", 18750.0), ("shopping", 18750.0)))
+        self.assertNotEqual(profile.fingerprint, split.fingerprint)
+        
+        other = self.recommendation_engine.compile_preferences({"monthly_card_spend": "Less than ₹10,000"})
+        self.assertEqual(other.category_spend, ((RewardValueModel.OTHER_CATEGORY, 5000),))
+    
+    def test_annual_values_match_per_card_computation(self):
+        """
+        Test the vectorized net annual values against a per-card computation.
+        """
+        model = self.recommendation_engine.compile_reward_values()
+        rng = random.Random(11)
+        categories = ["Dining", "Amazon", "Online Shopping", "Travel", "Fuel", "Groceries", "Bills", "Rent"]
+        profiles = [self.recommendation_engine.compile_preferences(
+            {"monthly_category_spend": {category: rng.choice([0, 2000, 15000, 60000])
+                                        for category in rng.sample(categories, 4)}})
+            for _ in range(25)]
+        
+        values = model.annual_values(profiles, list(range(model.catalog.size)))
+        for user, profile in enumerate(profiles):
+            for row, card in enumerate(self.card_db.get_all_cards()):
+                self.assertAlmostEqual(values[user, row], self.expected_value(card, profile.category_spend))
+    
+    def test_reward_value_ranking(self):
+        """
+        Test that the reward value ranking orders eligible cards by value, alone and in batches.
+        """
+        result = self.recommendation_engine.recommend_cards(self.preferences, 16, ranking="reward_value")
+        profile = self.recommendation_engine.compile_preferences(self.preferences)
+        eligible = self.recommendation_engine._filter_eligible_cards(profile)
+        expected = sorted(eligible, key=lambda card: (-self.expected_value(card, profile.category_spend),
+                                                       card["card_id"]))
+        self.assertEqual(result["recommended_cards"], [card["card_id"] for card in expected])
+        for card in expected:
+            self.assertAlmostEqual(result["match_scores"][card["card_id"]],
+                                   self.expected_value(card, profile.category_spend))
+        self.assertTrue(result["match_reasons"][expected[0]["card_id"]][0].startswith("Estimated net annual value"))
+        
+        batch = [dict(self.preferences, monthly_category_spend={"Dining": spend}) for spend in (1000, 9000, 30000)]
+        self.assertEqual(list(self.recommendation_engine.recommend_batch(batch, ranking="reward_value")),
+                         [self.recommendation_engine.recommend_cards(preferences, ranking="reward_value")
+                          for preferences in batch])
+        
+        self.assertNotEqual(self.recommendation_engine.preference_cache_key(self.preferences),
+                            self.recommendation_engine.preference_cache_key(self.preferences, ranking="reward_value"))
+        with self.assertRaises(ValueError):
+            self.recommendation_engine.recommend_cards(self.preferences, ranking="cheapest")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Test script for statement ingestion.
+This file tests transaction categorization, streaming aggregation and card simulation on statements.
+"""
+
+import sys
+import os
+import io
+import json
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the statement ingestion pipeline, recommendation engine and database
+from src.statement_ingestion import (TransactionCategorizer, StatementAggregator, read_transactions,
+                                     parse_transaction_amount, simulate_cards, detect_format, main)
+from src.category_taxonomy import CategoryTaxonomy
+from src.recommendation_engine import RecommendationEngine
+from src.credit_card_database import CreditCardDatabase
+
+STATEMENT_CSV = """Date,Description,Amount,MCC,Currency,Billed Amount
+2024-01-03,SWIGGY BANGALORE,450.00,5814,INR,
+2024-01-05,AMAZON PAY INDIA,"2,300.00",5999,INR,
+2024-01-09,INDIAN OIL PETROL PUMP,"3,000.00",5541,INR,
+2024-01-15,PAYMENT RECEIVED,"10,000.00 Cr",,INR,
+2024-02-02,STARBUCKS LONDON,17.25,5814,GBP,"1,800.00"
+2024-02-11,Corner store,999,1234,INR,
+2024-02-20,GRAND PALACE,5000,3600,INR,
+"""
+
+class TestStatementIngestion(unittest.TestCase):
+    """
+    Test cases for statement ingestion.
+    """
+    
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        self.db_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'credit_cards.json')
+        self.category_taxonomy = CategoryTaxonomy()
+        self.card_db = CreditCardDatabase(self.db_file, self.category_taxonomy)
+        self.recommendation_engine = RecommendationEngine(self.card_db.get_all_cards(),
+                                                          category_taxonomy=self.category_taxonomy)
+        self.categorizer = TransactionCategorizer(self.category_taxonomy)
+    
+    def test_categorize(self):
+        """
+        Test merchant keyword matching, MCC lookup and their precedence.
+        """
+        self.assertEqual(self.categorizer.categorize("AMAZON PAY INDIA", 5999), "amazon")
+        self.assertEqual(self.categorizer.categorize("Swiggy*Order 1234"), "food delivery")
+        self.assertEqual(self.categorizer.categorize("Air India Ltd"), "airlines")
+        self.assertEqual(self.categorizer.categorize("INDIAN OIL CORP"), "fuel")
+        self.assertEqual(self.categorizer.categorize("Corner store", "5411"), "groceries")
+        self.assertEqual(self.categorizer.categorize("GRAND PALACE", 3600), "hotels")
+        self.assertEqual(self.categorizer.categorize("Corner store", "n/a"), "other")
+        self.assertEqual(self.categorizer.categorize(""), "other")
+        
+        # Keywords and codes given under aliases are canonicalized
+        custom = TransactionCategorizer(self.category_taxonomy, {"utilities": [4900]}, {"petrol": ["shell"]})
+        self.assertEqual(custom.categorize("SHELL PUMP 22"), "fuel")
+        self.assertEqual(custom.categorize("", 4900), "bills")
+    
+    def test_parse_transaction_amount(self):
+        """
+        Test that amounts are parsed and credits recognized.
+        """
+        self.assertEqual(parse_transaction_amount("2,300.00"), (2300.0, False))
+        self.assertEqual(parse_transaction_amount("₹ 1,00,000 Dr"), (100000.0, False))
+        self.assertEqual(parse_transaction_amount("10,000.00 Cr"), (10000.0, True))
+        self.assertEqual(parse_transaction_amount(-250), (-250.0, True))
+        self.assertEqual(parse_transaction_amount("pending"), (None, False))
+    
+    def test_statement_summary(self):
+        """
+        Test the monthly spend of a small statement in CSV, JSONL and a JSON array.
+        """
+        aggregator = StatementAggregator(self.categorizer).consume(
+            read_transactions(io.StringIO(STATEMENT_CSV)))
+        summary = aggregator.summary()
+        self.assertEqual(summary["transactions"], 6)
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["unconverted"], 0)
+        self.assertEqual(summary["months"], 2)
+        self.assertEqual(summary["monthly_category_spend"], {
+            "amazon": 1150.0, "dining": 900.0, "food delivery": 225.0, "fuel": 1500.0,
+            "hotels": 2500.0, "other": 499.5})
+        self.assertEqual(summary["monthly_international_spend"], 900.0)
+        self.assertTrue(summary["international_transactions"])
+        
+        jsonl = "".join(json.dumps(row) + "\n" for row in read_transactions(io.StringIO(STATEMENT_CSV)))
+        from_jsonl = StatementAggregator(self.categorizer).consume(read_transactions(io.StringIO(jsonl), "jsonl"))
+        self.assertEqual(from_jsonl.summary(), summary)
+        
+        array = json.dumps(list(read_transactions(io.StringIO(STATEMENT_CSV))))
+        from_json = StatementAggregator(self.categorizer).consume(read_transactions(io.StringIO(array), "json"))
+        self.assertEqual(from_json.summary(), summary)
+        self.assertEqual(detect_format("statement.json"), "json")
+        self.assertEqual(detect_format("statement.ndjson"), "jsonl")
+        with self.assertRaises(ValueError):
+            list(read_transactions(io.StringIO('{"amount": 100}'), "json"))
+    
+    def test_foreign_currency_needs_rupee_amount(self):
+        """
+        Test that foreign-currency transactions without a billed rupee amount are left out of the totals.
+        """
+        aggregator = StatementAggregator(self.categorizer).consume([
+            {"date": "2024-03-01", "merchant": "STARBUCKS LONDON", "amount": "17.25", "currency": "GBP"},
+            {"date": "2024-03-02", "merchant": "HOTEL PARIS", "amount": "120", "currency": "EUR",
+             "amount (inr)": "10,800.00"},
+            {"date": "2024-03-03", "merchant": "SWIGGY", "amount": "450", "currency": "INR"}
+        ])
+        summary = aggregator.summary()
+        self.assertEqual(summary["transactions"], 2)
+        self.assertEqual(summary["unconverted"], 1)
+        self.assertEqual(summary["monthly_international_spend"], 10800.0)
+        self.assertEqual(sum(summary["monthly_category_spend"].values()), 11250.0)
+    
+    def test_streaming_in_chunks(self):
+        """
+        Test that small chunks over a long generated statement give the same totals as a direct sum.
+        """
+        rng = random.Random(3)
+        merchants = [("AMAZON", 5999), ("Zomato", 5812), ("BPCL", 5541), ("Local", 5411), ("Unknown", 1)]
+        expected = {}
+        
+        def transactions():
+            for _ in range(50000):
+                merchant, mcc = rng.choice(merchants)
+                amount = rng.randint(1, 5000)
+                category = self.categorizer.categorize(merchant, mcc)
+                expected[category] = expected.get(category, 0) + amount
+                yield {"date": f"2024-{rng.randint(1, 12):02d}-01", "merchant": merchant, "amount": amount, "mcc": mcc}
+        
+        aggregator = StatementAggregator(self.categorizer, chunk_size=1000).consume(transactions())
+        self.assertEqual(aggregator.transaction_count, 50000)
+        self.assertEqual(aggregator.month_count, 12)
+        self.assertEqual(len(aggregator._amounts), 1000)
+        for category, total in expected.items():
+            self.assertAlmostEqual(aggregator.totals[self.categorizer.column_of[category]], total)
+    
+    def test_simulation_feeds_ranking(self):
+        """
+        Test that the simulated values match the reward value ranking on the statement's spend.
+        """
+        aggregator = StatementAggregator(self.categorizer).consume(read_transactions(io.StringIO(STATEMENT_CSV)))
+        cards = simulate_cards(self.recommendation_engine, aggregator.preferences())
+        self.assertEqual(len(cards), len(self.card_db.get_all_cards()))
+        for card in cards:
+            self.assertAlmostEqual(card["net_annual_value"],
+                                   card["annual_rewards"] - card["annual_forex_cost"] - card["annual_fee"],
+                                   places=1)
+        
+        preferences = dict({"annual_income": 3000000, "age": 35}, **aggregator.preferences())
+        result = self.recommendation_engine.recommend_cards(preferences, 16, ranking="reward_value")
+        eligible = set(result["recommended_cards"])
+        self.assertEqual(result["recommended_cards"], [card["card_id"] for card in cards if card["card_id"] in eligible])
+    
+    def test_command_line(self):
+        """
+        Test the command line interface on a statement file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            statement_file = os.path.join(directory, "statement.csv")
+            preferences_file = os.path.join(directory, "answers.json")
+            with open(statement_file, "w", encoding="utf-8") as f:
+                f.write(STATEMENT_CSV)
+            with open(preferences_file, "w") as f:
+                json.dump({"annual_income": 3000000, "age": 35}, f)
+            
+            output = io.StringIO()
+            with redirect_stdout(output):
+                main([statement_file, "--preferences", preferences_file, "--limit", "3", "--db", self.db_file])
+        
+        result = json.loads(output.getvalue())
+        self.assertEqual(result["summary"]["transactions"], 6)
+        self.assertEqual(len(result["cards"]), 3)
+        self.assertEqual(len(result["recommendations"]["recommended_cards"]), 3)
+
+if __name__ == "__main__":
+    unittest.main()